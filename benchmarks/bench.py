@@ -0,0 +1,296 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Benchmarks sobre las ROMs de roms/
+#
+#   python benchmarks/bench.py                       (mide y compara con la base)
+#   python benchmarks/bench.py --save-baseline --runs 7   (reescribe baseline.json)
+#   python benchmarks/bench.py --engine interprete --cycles 50000 --threshold 0.3
+#
+# Por ROM, sin ventana y sin teclado, siempre con la misma semilla:
+#   instr_per_sec : instrucciones por segundo (mejor de --repeat corridas) de
+#                   exactamente --cycles instrucciones ejecutadas: las esperas
+#                   no se saltean, así también las ROMs que terminan en un
+#                   bucle de espera (los logos) tienen valor
+#   dxyn_us       : microsegundos por DXYN, por diferencia contra la misma ROM
+#                   con los DXYN cambiados por 6F00 (ver bench_dxyn): el
+#                   motor corre sin instrumentar, con el DXYN en línea del JIT
+#   render_us     : mediana en microsegundos por draw_graphics (SDL "dummy"),
+#                   con al menos RENDER_MIN_SAMPLES dibujos
+#   peak_kib      : pico de memoria de Python durante la corrida (tracemalloc)
+#
+# Cada métrica se mide en una corrida aparte para que la instrumentación de
+# una no ensucie a las otras. Con baseline.json presente, una ROM que empeore
+# más que --threshold (fracción) en cualquier métrica, o que se quede sin
+# valor en una métrica que la base sí tiene, hace fallar el script
+# (código de salida 1). Los números dependen de la máquina: la base se regenera
+# con --save-baseline en el host donde se van a comparar.
+#
+# Con --runs N la suite entera corre N veces y se une métrica por métrica
+# (aggregate): la base guarda la peor de las N, así el ruido de un host
+# cargado no dispara regresiones, y la comparación usa la mejor.
+# -----------------------------------------------------------------------------
+import argparse, itertools, json, os, platform, statistics, sys, time, tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import config as cfg
+from chip8_funciones import load_game
+from chip8_maquina import create_machine
+from chip8_perfil import attach_profiler
+from chip8_roms import prepare_rom
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+ROM_DIR = os.path.join(RAIZ, "roms")
+SEED = 1
+DXYN_PAIRS = 9
+RENDER_MIN_SAMPLES = 30
+
+# métrica → True si "más alto es mejor"
+METRICS = {"instr_per_sec": True, "dxyn_us": False, "render_us": False, "peak_kib": False}
+
+
+# -----------------------------------------------------------------------------
+def _maquina(rom, engine, saltear=True):
+    m = create_machine(rom, engine, rng_seed=SEED)
+    if not saltear:
+        m._skip_idle = lambda n_frames: 0      # las esperas también se ejecutan
+    return m
+
+
+def bench_speed(rom, engine, cycles, repeat):
+    """
+    Instrucciones por segundo: la mejor de 'repeat' corridas de exactamente
+    'cycles' instrucciones ejecutadas (sin saltear esperas).
+    """
+    mejor = 0.0
+    for _ in range(repeat):
+        m = _maquina(rom, engine, saltear=False)
+        t0 = time.perf_counter()
+        m.run_cycles(cycles)
+        dt = time.perf_counter() - t0
+        mejor = max(mejor, (m.cycles - m.skipped_cycles) / dt if dt else 0.0)
+    return mejor
+
+
+def _sin_dibujos(rom):
+    """La ROM con cada DXYN alcanzable cambiado por 6F00 (VF = 0: un DXYN sin colisión)."""
+    preparada = prepare_rom(rom)
+    datos = bytearray(preparada.rom)
+    for pc, opcode in preparada.analysis().instructions.items():
+        i = pc - cfg.PROGRAM_START
+        if opcode & 0xF000 == 0xD000 and 0 <= i < len(datos) - 1:
+            datos[i:i + 2] = b"\x6F\x00"
+    return bytes(datos)
+
+
+def _cronometrar(rom, engine, cycles):
+    """(segundos, instrucciones ejecutadas) de una corrida de 'cycles' ciclos."""
+    m = _maquina(rom, engine)
+    t0 = time.perf_counter()
+    m.run_cycles(cycles)
+    return time.perf_counter() - t0, m.cycles - m.skipped_cycles
+
+
+def bench_dxyn(rom, engine, cycles):
+    """
+    Costo (µs) de un DXYN con el motor sin instrumentar: la ROM contra
+    _sin_dibujos(rom), las dos con la misma cantidad de ciclos. Las demás
+    instrucciones se descuentan con el costo por instrucción de la segunda:
+        (t - (ejecutadas - dxyn) * t_sin / ejecutadas_sin) / dxyn
+    Es la mediana de DXYN_PAIRS pares de corridas seguidas (una resta de dos
+    tiempos parecidos: el ruido de cada par se cancela mejor que el de las
+    mejores corridas por separado). Los DXYN ejecutados se cuentan aparte,
+    con el perfilador. Si la ROM decide por VF de las colisiones (pong), la
+    corrida sin dibujos toma otro camino y el número es aproximado. None si
+    la ROM no dibuja.
+    """
+    m = _maquina(rom, "interprete")
+    familias = attach_profiler(m).family_count
+    m.run_cycles(cycles)
+    dxyn = familias["DXYN"]
+    if not dxyn:
+        return None
+    sin_dibujos, estimaciones = _sin_dibujos(rom), []
+    for r in (rom, sin_dibujos):
+        _cronometrar(r, engine, cycles)     # fuera de la medición: la traducción del JIT
+    for _ in range(DXYN_PAIRS):
+        t, ejecutadas = _cronometrar(rom, engine, cycles)
+        t_sin, ejecutadas_sin = _cronometrar(sin_dibujos, engine, cycles)
+        estimaciones.append((t - (ejecutadas - dxyn) * t_sin / ejecutadas_sin) / dxyn)
+    return statistics.median(estimaciones) * 1e6
+
+
+def bench_render(rom, engine, cycles):
+    """
+    Mediana (µs) de draw_graphics en los frames con filas sucias. Si hubo
+    menos de RENDER_MIN_SAMPLES (los logos dibujan en dos o tres frames),
+    los mismos frames se vuelven a dibujar en rueda hasta juntarlas.
+    """
+    try:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        import pygame
+        from chip8_funciones import setup_graphics, draw_graphics
+    except ImportError:
+        return None
+    pygame.display.init()
+    setup_graphics(cfg.SCALE)
+
+    m = _maquina(rom, engine)
+    tiempos, dibujados = [], []
+    for _ in range(cycles // m.cycles_per_frame):
+        m.run_frames(1)
+        if m.dirty_rows:
+            t0 = time.perf_counter()
+            draw_graphics(m.gfx, m.dirty_rows)
+            tiempos.append(time.perf_counter() - t0)
+            if len(dibujados) < RENDER_MIN_SAMPLES:
+                dibujados.append((list(m.gfx), m.dirty_rows))
+            m.dirty_rows = 0
+    for gfx, filas in itertools.islice(itertools.cycle(dibujados),
+                                       max(0, RENDER_MIN_SAMPLES - len(tiempos))):
+        t0 = time.perf_counter()
+        draw_graphics(gfx, filas)
+        tiempos.append(time.perf_counter() - t0)
+    pygame.display.quit()
+    return statistics.median(tiempos) * 1e6 if tiempos else None
+
+
+def bench_memory(rom, engine, cycles):
+    """Pico de memoria (KiB) asignada por Python al crear y correr la máquina."""
+    tracemalloc.start()
+    try:
+        m = _maquina(rom, engine)
+        m.run_cycles(cycles)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / 1024
+
+
+# -----------------------------------------------------------------------------
+def run_suite(roms, engine, cycles, repeat, render=True):
+    """
+    Corre todas las métricas para cada ROM; devuelve {nombre: {métrica: valor}}
+    (sin render_us si render es False).
+    """
+    _maquina(None, engine)      # arma (y cachea) la tabla de decodificación fuera de la medición
+    resultados = {}
+    for ruta in roms:
+        rom = load_game(ruta)
+        metricas = {
+            "instr_per_sec": _redondear(bench_speed(rom, engine, cycles, repeat), 0),
+            "dxyn_us": _redondear(bench_dxyn(rom, engine, cycles)),
+            "peak_kib": _redondear(bench_memory(rom, engine, cycles)),
+        }
+        if render:
+            metricas["render_us"] = _redondear(bench_render(rom, engine, cycles))
+        resultados[os.path.basename(ruta)] = metricas
+    return resultados
+
+
+def aggregate(corridas, peor):
+    """
+    Une varias corridas de run_suite métrica por métrica: la peor de cada
+    una (peor=True, para la base) o la mejor. Los None no cuentan.
+    """
+    elegidas = {}
+    for rom, metricas in corridas[0].items():
+        elegidas[rom] = {}
+        for metrica in metricas:
+            valores = [c[rom][metrica] for c in corridas if c[rom][metrica] is not None]
+            elegir = min if peor == METRICS[metrica] else max
+            elegidas[rom][metrica] = elegir(valores) if valores else None
+    return elegidas
+
+
+def _redondear(valor, decimales=2):
+    return None if valor is None else round(valor, decimales or None)
+
+
+# -----------------------------------------------------------------------------
+def compare(resultados, base, threshold):
+    """
+    Compara contra la base. Devuelve la lista de regresiones como textos
+    ("rom métrica: base → actual"). Una métrica sin valor en la base o que
+    no se midió no se compara; con valor en la base y sin valor ahora es una
+    regresión (la medición dejó de funcionar).
+    """
+    regresiones = []
+    for rom, metricas in resultados.items():
+        previas = base.get(rom, {})
+        for metrica, mas_es_mejor in METRICS.items():
+            antes, ahora = previas.get(metrica), metricas.get(metrica)
+            if not antes or metrica not in metricas:
+                continue
+            if ahora is None:
+                regresiones.append(f"{rom} {metrica}: {antes} → sin valor")
+                continue
+            cambio = (ahora - antes) / antes
+            if (-cambio if mas_es_mejor else cambio) > threshold:
+                regresiones.append(f"{rom} {metrica}: {antes} → {ahora} ({cambio:+.0%})")
+    return regresiones
+
+
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del emulador CHIP-8")
+    parser.add_argument("--engine", choices=("interprete", "jit"), default=cfg.ENGINE)
+    parser.add_argument("--cycles", type=int, default=100_000,
+                        help="instrucciones por ROM (por defecto 100000)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="corridas de velocidad por ROM; se toma la mejor")
+    parser.add_argument("--runs", type=int, default=1,
+                        help="veces que corre la suite entera; se guarda la peor de cada "
+                             "métrica (con --save-baseline) o se compara la mejor")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="empeoramiento tolerado como fracción (por defecto 0.25)")
+    parser.add_argument("--baseline", default=BASELINE, help="archivo JSON de la base")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="guarda los resultados como nueva base")
+    parser.add_argument("--no-render", action="store_true", help="no mide draw_graphics")
+    parser.add_argument("--json", help="guarda también los resultados en este archivo")
+    parser.add_argument("roms", nargs="*", help="ROMs a medir (por defecto todas las de roms/)")
+    args = parser.parse_args(argv)
+
+    roms = args.roms or sorted(os.path.join(ROM_DIR, f) for f in os.listdir(ROM_DIR)
+                               if f.endswith(".ch8"))
+    corridas = [run_suite(roms, args.engine, args.cycles, args.repeat, not args.no_render)
+                for _ in range(args.runs)]
+    resultados = aggregate(corridas, peor=args.save_baseline)
+
+    print(f"{'ROM':24} {'instr/s':>12} {'DXYN µs':>9} {'render µs':>10} {'pico KiB':>9}")
+    for rom, r in resultados.items():
+        instr = f"{r['instr_per_sec']:,}" if r["instr_per_sec"] is not None else "-"
+        print(f"{rom:24} {instr:>12} {r['dxyn_us'] or '-':>9} "
+              f"{r.get('render_us') or '-':>10} {r['peak_kib']:>9}")
+
+    informe = {"engine": args.engine, "cycles": args.cycles, "runs": args.runs,
+               "aggregate": "peor" if args.save_baseline else "mejor",
+               "python": platform.python_version(), "results": resultados}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2)
+        print(f"base guardada en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("sin base para comparar (usar --save-baseline)")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        base = json.load(f)
+    if (base.get("engine"), base.get("cycles")) != (args.engine, args.cycles):
+        print(f"la base es de engine={base.get('engine')} cycles={base.get('cycles')}: "
+              "no se compara")
+        return 0
+    regresiones = compare(resultados, base["results"], args.threshold)
+    for r in regresiones:
+        print(f"REGRESIÓN {r}")
+    print(f"{len(regresiones)} regresiones (umbral {args.threshold:.0%})")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
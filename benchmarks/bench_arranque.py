@@ -0,0 +1,114 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Benchmark del arranque de un proceso headless
+#
+#   python benchmarks/bench_arranque.py              (mide y verifica los topes)
+#   python benchmarks/bench_arranque.py --repeat 20 --max-import-ms 40
+#
+# Lanza 'python -X importtime main.py ROM --headless --max-cycles N' varias
+# veces (como un lote o un fuzzer que arranca miles de procesos cortos) y
+# toma el mejor de --repeat:
+#   import_ms  : imports del proceso, sin los del propio intérprete (los de
+#                'python -c pass'), sumando el tiempo acumulado de cada
+#                import de primer nivel que informa -X importtime
+#   proceso_ms : tiempo de pared del proceso entero menos el de 'python -c pass'
+#   tabla_ms   : armar la tabla de decodificación (decode_table) en frío
+# Falla (código 1) si algún módulo del núcleo (config, chip8_maquina,
+# chip8_jit, ...) o el camino headless importa Pygame, o si import_ms o
+# proceso_ms superan su tope.
+# -----------------------------------------------------------------------------
+import argparse, os, re, subprocess, sys, time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROM = os.path.join(RAIZ, "roms", "pong.ch8")
+NUCLEO = ("config", "chip8_instrucciones", "chip8_decodificador", "chip8_maquina",
+          "chip8_jit", "chip8_funciones", "chip8_estado", "chip8_grabacion",
+          "chip8_lotes", "chip8_verificador", "chip8_servidor", "chip8_fuzz", "main")
+
+_LINEA = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)")
+
+
+# -----------------------------------------------------------------------------
+def _importtime(args):
+    """(pared en s, {módulo de primer nivel: µs acumulados}, módulos importados)."""
+    t0 = time.perf_counter()
+    salida = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=RAIZ,
+                            capture_output=True, text=True, check=True)
+    pared = time.perf_counter() - t0
+    primer_nivel, modulos = {}, set()
+    for linea in salida.stderr.splitlines():
+        m = _LINEA.match(linea)
+        if m:
+            modulos.add(m.group(3))
+            if not m.group(2):
+                primer_nivel[m.group(3)] = int(m.group(1))
+    return pared, primer_nivel, modulos
+
+
+def bench_proceso(rom, ciclos, repeat):
+    """(import_ms, proceso_ms, los 5 imports más caros, módulos importados)."""
+    vacio = min((_importtime(["-c", "pass"]) for _ in range(repeat)), key=lambda r: r[0])
+    base = sum(vacio[1].values())
+    mejor = None
+    for _ in range(repeat):
+        r = _importtime(["main.py", rom, "--headless", "--max-cycles", str(ciclos)])
+        if mejor is None or r[0] < mejor[0]:
+            mejor = r
+    pared, primer_nivel, modulos = mejor
+    propios = {k: v for k, v in primer_nivel.items() if k not in vacio[1]}
+    caros = sorted(propios.items(), key=lambda kv: -kv[1])[:5]
+    return ((sum(primer_nivel.values()) - base) / 1e3, (pared - vacio[0]) * 1e3,
+            caros, modulos)
+
+
+def bench_tabla():
+    """Milisegundos para armar la tabla de decodificación en un proceso nuevo."""
+    codigo = ("import time; from chip8_decodificador import decode_table; "
+              "t = time.perf_counter(); decode_table(); print(time.perf_counter() - t)")
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ,
+                            capture_output=True, text=True, check=True)
+    return float(salida.stdout.split()[-1]) * 1e3
+
+
+def nucleo_con_pygame():
+    """Módulos de NUCLEO que, importados solos, arrastran a Pygame."""
+    return [m for m in NUCLEO if "pygame" in _importtime(["-c", f"import {m}"])[2]]
+
+
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del arranque headless CHIP-8")
+    parser.add_argument("--rom", default=ROM)
+    parser.add_argument("--cycles", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=60.0,
+                        help="tope de import_ms (por defecto 60)")
+    parser.add_argument("--max-startup-ms", type=float, default=150.0,
+                        help="tope de proceso_ms (por defecto 150)")
+    args = parser.parse_args(argv)
+
+    import_ms, proceso_ms, caros, modulos = bench_proceso(args.rom, args.cycles, args.repeat)
+    tabla_ms = min(bench_tabla() for _ in range(3))
+    con_pygame = nucleo_con_pygame()
+
+    print(f"import_ms   {import_ms:8.1f}   (" +
+          ", ".join(f"{k} {v / 1e3:.1f}" for k, v in caros) + ")")
+    print(f"proceso_ms  {proceso_ms:8.1f}   ({os.path.basename(args.rom)}, "
+          f"{args.cycles} instrucciones, sobre 'python -c pass')")
+    print(f"tabla_ms    {tabla_ms:8.1f}")
+
+    fallas = []
+    if "pygame" in modulos:
+        fallas.append("la corrida headless importó pygame")
+    if con_pygame:
+        fallas.append("importan pygame: " + ", ".join(con_pygame))
+    if import_ms > args.max_import_ms:
+        fallas.append(f"import_ms {import_ms:.1f} > {args.max_import_ms:g}")
+    if proceso_ms > args.max_startup_ms:
+        fallas.append(f"proceso_ms {proceso_ms:.1f} > {args.max_startup_ms:g}")
+    for f in fallas:
+        print(f"FALLA {f}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
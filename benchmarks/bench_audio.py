@@ -0,0 +1,129 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Benchmark del audio (chip8_audio)
+#
+#   python benchmarks/bench_audio.py                 (mide y verifica los topes)
+#   python benchmarks/bench_audio.py --frames 20000 --max-overhead 0.03
+#
+# Sin dispositivo de audio (NullSink), así mide sólo lo que el audio le
+# cuesta al emulador:
+#   buffer_ms      : generar la onda cuadrada (una sola vez, al abrir)
+#   update_ns      : Beeper.update() por frame, con y sin cambio de estado
+#   frame_us       : un frame de la ROM (por defecto roms/7-beep.ch8) sin
+#                    audio (mejor de --repeat)
+#   overhead       : update_ns / frame_us: lo que el audio le suma a cada
+#                    frame (medir la diferencia entre dos corridas enteras
+#                    queda por debajo del ruido)
+#   latency_frames : frames entre el FX18 y el encendido del tono (tope: 1)
+# Falla (código 1) si el overhead supera --max-overhead o si la latencia o
+# la duración del tono no son las esperadas.
+# -----------------------------------------------------------------------------
+import argparse, os, sys, time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import config as cfg
+from chip8_audio import Beeper, NullSink, square_wave
+from chip8_funciones import load_game
+from chip8_maquina import create_machine
+
+BEEP_ROM = os.path.join(RAIZ, "roms", "7-beep.ch8")
+
+
+# -----------------------------------------------------------------------------
+def bench_buffer(repeat):
+    """Milisegundos para generar el buffer (mejor de 'repeat')."""
+    mejor = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        square_wave()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor * 1e3
+
+
+def bench_update(n=200_000):
+    """Nanosegundos por update(): ST estable y ST que alterna cada frame."""
+    beeper = Beeper(NullSink())
+    t0 = time.perf_counter()
+    for _ in range(n):
+        beeper.update(5)
+    estable = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for i in range(n):
+        beeper.update(i & 1)
+    alterna = (time.perf_counter() - t0) / n
+    return estable * 1e9, alterna * 1e9
+
+
+def bench_frame(rom, engine, frames, repeat):
+    """Microsegundos por frame de la ROM, de a un run_frames(1) como la ventana."""
+    mejor = float("inf")
+    for _ in range(repeat):
+        m = create_machine(rom, engine, rng_seed=1)
+        m.run_frames(1)             # traducción del JIT fuera de la medición
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            m.run_frames(1)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor / frames * 1e6
+
+
+def check_latency(engine, st=6):
+    """
+    ROM mínima: LD V0, st / LD ST, V0 / JP a sí mismo. Devuelve (frames
+    desde el FX18 hasta el encendido, frames que sonó el tono).
+    """
+    rom = bytes([0x60, st, 0xF0, 0x18, 0x12, 0x04])
+    m = create_machine(rom, engine, rng_seed=1, cycles_per_frame=cfg.CYCLES_PER_FRAME)
+    beeper = Beeper(NullSink())
+    encendido, sonando = None, 0
+    for frame in range(st + 4):
+        m.run_frames(1)
+        beeper.update(m.sound_timer)
+        if beeper.sonando:
+            sonando += 1
+            if encendido is None:
+                encendido = frame       # el FX18 corre en el frame 0
+    return encendido, sonando
+
+
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del audio del emulador CHIP-8")
+    parser.add_argument("--engine", choices=("interprete", "jit"), default=cfg.ENGINE)
+    parser.add_argument("--frames", type=int, default=10_000)
+    parser.add_argument("--rom", default=BEEP_ROM, help="ROM para frame_us (por defecto 7-beep)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-overhead", type=float, default=0.05,
+                        help="overhead máximo por frame (fracción, por defecto 0.05)")
+    args = parser.parse_args(argv)
+
+    rom = load_game(args.rom)
+    buffer_ms = bench_buffer(args.repeat)
+    estable, alterna = bench_update()
+    frame_us = bench_frame(rom, args.engine, args.frames, args.repeat)
+    overhead = estable / (frame_us * 1e3)
+    encendido, sonando = check_latency(args.engine)
+    buffer_frames = cfg.AUDIO_BUFFER / cfg.AUDIO_RATE * cfg.TIMER_HZ
+
+    print(f"buffer_ms      {buffer_ms:10.3f}   ({len(square_wave())} muestras)")
+    print(f"update_ns      {estable:10.1f}   (estable)  {alterna:.1f} (alternando)")
+    print(f"frame_us       {frame_us:10.2f}   ({os.path.basename(args.rom)}, {args.engine})")
+    print(f"overhead       {overhead:10.2%}   (por frame)")
+    print(f"latency_frames {encendido!s:>10}   (0 = al final del frame del FX18; "
+          f"+ {buffer_frames:.2f} frames del buffer del mixer)")
+
+    fallas = []
+    if overhead > args.max_overhead:
+        fallas.append(f"overhead {overhead:.2%} > {args.max_overhead:.0%}")
+    if encendido is None or encendido > 0:
+        fallas.append(f"el tono no arrancó en el borde del frame del FX18 ({encendido})")
+    if sonando != 6 - 1:
+        fallas.append(f"con ST = 6 el tono duró {sonando} frames (se esperaban 5)")
+    for f in fallas:
+        print(f"FALLA {f}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Benchmark del hilo de emulación (chip8_hilos)
+#
+#   python benchmarks/bench_hilos.py                 (mide y verifica el tope)
+#   python benchmarks/bench_hilos.py --seconds 5 --present-ms 0 16 50
+#
+# Sin ventana: el hilo principal hace de render y simula un present de
+# --present-ms milisegundos por frame, con sleep (vsync: suelta el GIL) y con
+# espera activa (un blit lento: lo retiene). Por cada caso informa:
+#   emu_hz    : frames emulados por segundo (deberían ser TIMER_HZ)
+#   render_hz : frames nuevos presentados por segundo (sólo se publican los
+#               que cambian: pong dibuja unos 27 por segundo)
+#   salteados : frames publicados que el render nunca llegó a ver
+# Falla (código 1) si la emulación cae por debajo de --min-ratio * TIMER_HZ.
+# -----------------------------------------------------------------------------
+import argparse, os, sys, time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import config as cfg
+from chip8_audio import Beeper, NullSink
+from chip8_funciones import load_game
+from chip8_hilos import EmulationThread, FrameMailbox, SharedKeys
+from chip8_maquina import create_machine
+
+ROM = os.path.join(RAIZ, "roms", "pong.ch8")
+
+
+# -----------------------------------------------------------------------------
+def _present(ms, activo):
+    if activo:
+        fin = time.perf_counter() + ms / 1000
+        while time.perf_counter() < fin:
+            pass
+    elif ms:
+        time.sleep(ms / 1000)
+
+
+def bench_case(rom, engine, segundos, present_ms, activo):
+    """(emu_hz, render_hz, salteados) con un present de present_ms por frame."""
+    m = create_machine(rom, engine, rng_seed=1)
+    teclado, buzon = SharedKeys(), FrameMailbox()
+    hilo = EmulationThread(m, teclado, buzon, Beeper(NullSink()))
+    hilo.start()
+    t0, presentados = time.perf_counter(), 0
+    while time.perf_counter() - t0 < segundos:
+        if presentados % 30 == 0:
+            teclado.key_event(1, presentados % 60 == 0)   # pong: mueve la paleta
+        if buzon.take() is not None:
+            _present(present_ms, activo)
+        else:
+            time.sleep(0.001)
+        presentados += 1
+    hilo.stop()
+    hilo.join()
+    dt = time.perf_counter() - t0
+    if hilo.error is not None:
+        raise hilo.error
+    return m.frames / dt, buzon.tomados / dt, buzon.publicados - buzon.tomados
+
+
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del hilo de emulación CHIP-8")
+    parser.add_argument("--engine", choices=("interprete", "jit"), default=cfg.ENGINE)
+    parser.add_argument("--rom", default=ROM)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--present-ms", type=float, nargs="+", default=[0, 16, 50])
+    parser.add_argument("--min-ratio", type=float, default=0.95,
+                        help="emu_hz mínimo como fracción de TIMER_HZ (por defecto 0.95)")
+    args = parser.parse_args(argv)
+
+    rom = load_game(args.rom)
+    fallas = []
+    print(f"{'present':>12} {'emu_hz':>8} {'render_hz':>10} {'salteados':>10}")
+    for ms in args.present_ms:
+        for activo in (False, True):
+            if activo and not ms:
+                continue
+            emu, render, salteados = bench_case(rom, args.engine, args.seconds, ms, activo)
+            caso = f"{ms:g} ms {'activo' if activo else 'sleep'}"
+            print(f"{caso:>12} {emu:8.1f} {render:10.1f} {salteados:10d}")
+            if emu < args.min_ratio * cfg.TIMER_HZ:
+                fallas.append(f"{caso}: la emulación corrió a {emu:.1f} Hz")
+    for f in fallas:
+        print(f"FALLA {f}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
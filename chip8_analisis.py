@@ -0,0 +1,283 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Analizador estático y desensamblador
+#
+#   python main.py disasm roms/pong.ch8 [--dot cfg.dot] [--json analisis.json]
+#
+# Sin ejecutar la ROM: recorre el código alcanzable desde PROGRAM_START
+# siguiendo 1NNN, 2NNN (y su retorno), BNNN y los skips, arma el grafo de
+# flujo de control por bloques básicos y separa código de datos. Además:
+#   - marca escrituras FX33/FX55 que caen sobre código (automodificación) y
+#     las que no se pueden resolver (I desconocido en ese punto);
+#   - anota los destinos de ANNN (normalmente sprites) y los BNNN (saltos
+#     indirectos: sólo se sigue el destino con V0 = 0).
+# Los inicios de bloque son los mismos lugares donde empieza un bloque del
+# JIT, así Chip8JIT.precompile() puede traducirlos antes de correr.
+# -----------------------------------------------------------------------------
+import json
+
+import config as cfg
+from chip8_decodificador import resolve_quirks
+from chip8_funciones import fetch_opcode, decode_opcode
+from chip8_roms import prepare_rom
+
+_SKIPS = {0x3, 0x4, 0x5, 0x9}
+_ARITMETICA = {0x0: "LD", 0x1: "OR", 0x2: "AND", 0x3: "XOR", 0x4: "ADD",
+               0x5: "SUB", 0x6: "SHR", 0x7: "SUBN", 0xE: "SHL"}
+_FX = {0x07: "LD V{x:X}, DT", 0x0A: "LD V{x:X}, K", 0x15: "LD DT, V{x:X}",
+       0x18: "LD ST, V{x:X}", 0x1E: "ADD I, V{x:X}", 0x29: "LD F, V{x:X}",
+       0x33: "LD B, V{x:X}", 0x55: "LD [I], V{x:X}", 0x65: "LD V{x:X}, [I]",
+       0x30: "LD HF, V{x:X}", 0x75: "LD R, V{x:X}", 0x85: "LD V{x:X}, R"}
+_SUPER_CHIP = {0x00FB: "SCR", 0x00FC: "SCL", 0x00FD: "EXIT", 0x00FE: "LOW", 0x00FF: "HIGH"}
+
+
+# -----------------------------------------------------------------------------
+def disassemble(opcode):
+    """Mnemónico (estilo Cowgod) de un opcode; ".word 0xNNNN" si no existe."""
+    d = decode_opcode(opcode)
+    op, x, y, n, kk, nnn = d["op"], d["x"], d["y"], d["n"], d["kk"], d["nnn"]
+    if opcode == 0x00E0: return "CLS"
+    if opcode == 0x00EE: return "RET"
+    if opcode in _SUPER_CHIP: return _SUPER_CHIP[opcode]
+    if opcode & 0xFFF0 == 0x00C0: return f"SCD {n}"
+    if op == 0x0: return f"SYS 0x{nnn:03X}"
+    if op == 0x1: return f"JP 0x{nnn:03X}"
+    if op == 0x2: return f"CALL 0x{nnn:03X}"
+    if op == 0x3: return f"SE V{x:X}, 0x{kk:02X}"
+    if op == 0x4: return f"SNE V{x:X}, 0x{kk:02X}"
+    if op == 0x5 and n == 0: return f"SE V{x:X}, V{y:X}"
+    if op == 0x6: return f"LD V{x:X}, 0x{kk:02X}"
+    if op == 0x7: return f"ADD V{x:X}, 0x{kk:02X}"
+    if op == 0x8 and n in _ARITMETICA: return f"{_ARITMETICA[n]} V{x:X}, V{y:X}"
+    if op == 0x9 and n == 0: return f"SNE V{x:X}, V{y:X}"
+    if op == 0xA: return f"LD I, 0x{nnn:03X}"
+    if op == 0xB: return f"JP V0, 0x{nnn:03X}"
+    if op == 0xC: return f"RND V{x:X}, 0x{kk:02X}"
+    if op == 0xD: return f"DRW V{x:X}, V{y:X}, {n}"
+    if op == 0xE and kk == 0x9E: return f"SKP V{x:X}"
+    if op == 0xE and kk == 0xA1: return f"SKNP V{x:X}"
+    if op == 0xF and kk in _FX: return _FX[kk].format(x=x)
+    return f".word 0x{opcode:04X}"
+
+
+def _sucesores(addr, opcode):
+    """Direcciones a las que puede seguir la instrucción en addr (sin 00EE ni 00FD)."""
+    d = decode_opcode(opcode)
+    op, nnn = d["op"], d["nnn"]
+    if opcode in (0x00EE, 0x00FD):
+        return []
+    if op in (0x1, 0xB):
+        return [nnn]
+    if op == 0x2:
+        return [nnn, addr + 2]          # la subrutina y el punto de retorno
+    if op in _SKIPS and (op in (0x3, 0x4) or d["n"] == 0) \
+            or op == 0xE and d["kk"] in (0x9E, 0xA1):
+        return [addr + 2, addr + 4]
+    return [addr + 2]
+
+
+def block_ends_flow(opcode):
+    """True si el opcode cierra un bloque básico (salto, llamada, retorno, EXIT o skip)."""
+    return len(_sucesores(0, opcode)) != 1 or opcode >> 12 in (0x1, 0xB)
+
+
+# -----------------------------------------------------------------------------
+class RomAnalysis:
+    """
+    Resultado de analyze_rom():
+      instructions : {dirección: opcode} alcanzables
+      blocks       : {inicio: (fin, [sucesores])} bloques básicos (CFG)
+      calls        : destinos de 2NNN (subrutinas)
+      indirect     : direcciones de BNNN
+      unknown      : opcodes alcanzables que no existen (se ejecutan como nop)
+      sprites      : destinos de ANNN
+      self_mod     : [(dirección, inicio, fin)] FX33/FX55 que pisan código
+      unresolved   : direcciones de FX33/FX55 con I desconocido
+      data         : [(inicio, fin)] rangos de la ROM que no son código
+    """
+
+    def __init__(self, memoria, fin_rom):
+        self.memory = memoria
+        self.rom_end = fin_rom
+        self.instructions = {}
+        self.blocks = {}
+        self.calls = set()
+        self.indirect = set()
+        self.unknown = set()
+        self.sprites = set()
+        self.self_mod = []
+        self.unresolved = []
+        self.data = []
+
+    # -------------------------------------------------------------------------
+    def code_bytes(self):
+        """Conjunto de direcciones de memoria ocupadas por código alcanzable."""
+        return {a + i for a in self.instructions for i in (0, 1)}
+
+    def listing(self):
+        """Desensamblado con etiquetas: código alcanzable y bloques de datos."""
+        lineas = []
+        datos = {inicio: fin for inicio, fin in self.data}
+        addr = cfg.PROGRAM_START
+        while addr < self.rom_end:
+            if addr in datos:
+                fin = datos[addr]
+                for i in range(addr, fin, 8):
+                    bytes_ = ", ".join(f"0x{b:02X}" for b in self.memory[i:min(i + 8, fin)])
+                    lineas.append(f"0x{i:03X}            .byte {bytes_}")
+                addr = fin
+                continue
+            if addr in self.calls:
+                lineas.append(f"sub_{addr:03X}:")
+            elif addr in self.blocks:
+                lineas.append(f"L_{addr:03X}:")
+            opcode = self.instructions.get(addr)
+            if opcode is None:          # byte suelto entre instrucciones desalineadas
+                lineas.append(f"0x{addr:03X}  {self.memory[addr]:02X}        .byte")
+                addr += 1
+                continue
+            marca = "  ; automodificación" if any(a == addr for a, _, _ in self.self_mod) else ""
+            lineas.append(f"0x{addr:03X}  {opcode:04X}      {disassemble(opcode)}{marca}")
+            addr += 2
+        return "\n".join(lineas)
+
+    def to_dot(self):
+        """CFG en formato Graphviz."""
+        lineas = ["digraph cfg {", '  node [shape=box fontname="monospace"];']
+        for inicio, (fin, sucesores) in sorted(self.blocks.items()):
+            cuerpo = "\\l".join(f"{a:03X}: {disassemble(self.instructions[a])}"
+                                for a in range(inicio, fin, 2) if a in self.instructions)
+            lineas.append(f'  b{inicio:03X} [label="{cuerpo}\\l"];')
+            for s in sucesores:
+                if s in self.blocks:
+                    lineas.append(f"  b{inicio:03X} -> b{s:03X};")
+        lineas.append("}")
+        return "\n".join(lineas)
+
+    def report(self):
+        """Resumen como dict listo para JSON."""
+        h = lambda a: f"0x{a:03X}"
+        return {
+            "rom_end": h(self.rom_end),
+            "instructions": len(self.instructions),
+            "blocks": {h(i): {"end": h(f), "succ": [h(s) for s in ss]}
+                       for i, (f, ss) in sorted(self.blocks.items())},
+            "calls": [h(a) for a in sorted(self.calls)],
+            "indirect_jumps": [h(a) for a in sorted(self.indirect)],
+            "unknown_opcodes": [h(a) for a in sorted(self.unknown)],
+            "sprites": [h(a) for a in sorted(self.sprites)],
+            "self_modifying": [{"at": h(a), "start": h(i), "end": h(f)}
+                               for a, i, f in self.self_mod],
+            "unresolved_writes": [h(a) for a in self.unresolved],
+            "data": [[h(i), h(f)] for i, f in self.data],
+        }
+
+
+# -----------------------------------------------------------------------------
+def analyze_rom(rom, quirks=None):
+    """
+    Analiza una ROM (bytes, lista de enteros o PreparedRom) y devuelve un
+    RomAnalysis. quirks: perfil o dict como Chip8.quirks (sólo importa
+    bulk_inc_i, para seguir I después de FX55/FX65).
+    """
+    preparada = prepare_rom(rom)
+    memoria, fin_rom = preparada.image, cfg.PROGRAM_START + len(preparada.rom)
+    bulk_inc_i = resolve_quirks(quirks)["bulk_inc_i"]
+    an = RomAnalysis(memoria, fin_rom)
+
+    # 1) Instrucciones alcanzables (recorrido de todos los caminos)
+    lideres = {cfg.PROGRAM_START}
+    pendientes = [cfg.PROGRAM_START]
+    while pendientes:
+        addr = pendientes.pop()
+        if addr in an.instructions or not 0 <= addr < cfg.MEM_SIZE - 1:
+            continue
+        opcode = fetch_opcode(memoria, addr)
+        an.instructions[addr] = opcode
+        d = decode_opcode(opcode)
+        sucesores = _sucesores(addr, opcode)
+        if d["op"] == 0x2:
+            an.calls.add(d["nnn"])
+        elif d["op"] == 0xB:
+            an.indirect.add(addr)
+        elif d["op"] == 0xA:
+            an.sprites.add(d["nnn"])
+        if disassemble(opcode).startswith(".word"):
+            an.unknown.add(addr)
+        if block_ends_flow(opcode):
+            lideres.update(sucesores)
+        pendientes.extend(sucesores)
+
+    # 2) Bloques básicos: de cada líder hasta el próximo líder o fin de bloque
+    for inicio in sorted(l for l in lideres if l in an.instructions):
+        addr = inicio
+        while True:
+            opcode = an.instructions[addr]
+            if block_ends_flow(opcode):
+                an.blocks[inicio] = (addr + 2, _sucesores(addr, opcode))
+                break
+            if addr + 2 in lideres or addr + 2 not in an.instructions:
+                an.blocks[inicio] = (addr + 2, [addr + 2])
+                break
+            addr += 2
+
+    # 3) Escrituras a memoria, siguiendo I dentro de cada bloque
+    codigo = an.code_bytes()
+    for inicio, (fin, _) in an.blocks.items():
+        i_reg = None                                # I desconocido al entrar
+        for addr in range(inicio, fin, 2):
+            d = decode_opcode(an.instructions[addr])
+            op, kk, x = d["op"], d["kk"], d["x"]
+            if op == 0xA:
+                i_reg = d["nnn"]
+            elif op == 0xF and kk in (0x33, 0x55):
+                largo = 3 if kk == 0x33 else x + 1
+                if i_reg is None:
+                    an.unresolved.append(addr)
+                elif any(a in codigo for a in range(i_reg, i_reg + largo)):
+                    an.self_mod.append((addr, i_reg, i_reg + largo))
+                if kk == 0x55 and bulk_inc_i and i_reg is not None:
+                    i_reg = (i_reg + largo) & 0x0FFF
+            elif op == 0xF and kk in (0x1E, 0x29):
+                i_reg = None
+            elif op == 0xF and kk == 0x65 and bulk_inc_i and i_reg is not None:
+                i_reg = (i_reg + x + 1) & 0x0FFF
+
+    # 4) Datos: rangos de la ROM que no son código alcanzable
+    inicio = None
+    for addr in range(cfg.PROGRAM_START, fin_rom + 1):
+        es_dato = addr < fin_rom and addr not in codigo
+        if es_dato and inicio is None:
+            inicio = addr
+        elif not es_dato and inicio is not None:
+            an.data.append((inicio, addr))
+            inicio = None
+    return an
+
+
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="main.py disasm",
+                                     description="Desensamblador y analizador de ROMs CHIP-8")
+    parser.add_argument("rom")
+    parser.add_argument("--dot", help="guarda el CFG en formato Graphviz")
+    parser.add_argument("--json", help="guarda el análisis como JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.rom, "rb") as f:
+        an = analyze_rom(f.read())
+    print(an.listing())
+    print(f"; {len(an.instructions)} instrucciones en {len(an.blocks)} bloques, "
+          f"{len(an.calls)} subrutinas, {sum(f - i for i, f in an.data)} bytes de datos")
+    for addr, inicio, fin in an.self_mod:
+        print(f"; automodificación: 0x{addr:03X} escribe 0x{inicio:03X}-0x{fin - 1:03X}")
+    if an.unresolved:
+        print("; escrituras con I desconocido en " +
+              ", ".join(f"0x{a:03X}" for a in an.unresolved))
+    if args.dot:
+        with open(args.dot, "w", encoding="utf-8") as f:
+            f.write(an.to_dot())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(an.report(), f, indent=1)
+    return 0
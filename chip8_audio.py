@@ -0,0 +1,123 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Audio: el beep del sound timer
+#
+#   beeper = create_beeper()            # pygame.mixer, o NullSink sin audio
+#   maquina.run_frames(1)
+#   beeper.update(maquina.sound_timer)  # una vez por frame, en el borde
+#
+# El tono es una onda cuadrada que se genera una sola vez (array('h'), un
+# número entero de períodos para que el bucle no haga clic) y el mixer la
+# repite sola con loops=-1. Por frame sólo se mira si ST > 0 y, si cambió,
+# se arranca o se corta el bucle: nada se sintetiza por instrucción y la CPU
+# no se entera de que hay audio.
+#
+# Latencia: FX18 escribe ST durante un frame; al final de ese frame (antes
+# de dibujar) update() ya arrancó el tono, más el buffer del mixer
+# (AUDIO_BUFFER muestras, ~12 ms a 44,1 kHz). Como el tono sale en el borde
+# siguiente a la escritura y se corta en el borde en que ST llega a 0, dura
+# ST-1 frames enteros: ST = 1 no suena, igual que en la COSMAC VIP.
+# -----------------------------------------------------------------------------
+from array import array
+
+import config as cfg
+
+
+# -----------------------------------------------------------------------------
+def square_wave(frecuencia=cfg.BEEP_HZ, muestras_por_s=cfg.AUDIO_RATE,
+                volumen=cfg.AUDIO_VOLUME, canales=1):
+    """
+    Buffer de onda cuadrada (array('h'), 16 bits con signo, canales
+    intercalados) de unos 100 ms, con un número entero de períodos para
+    repetirlo sin saltos. La frecuencia real queda a menos de 10 Hz de la
+    pedida.
+    """
+    periodos = max(1, round(frecuencia / 10))
+    total = round(periodos * muestras_por_s / frecuencia)
+    alto = round(32767 * volumen)
+    muestras = array("h", (alto if (2 * periodos * i // total) % 2 == 0 else -alto
+                           for i in range(total)))
+    if canales > 1:
+        muestras = array("h", (s for s in muestras for _ in range(canales)))
+    return muestras
+
+
+# -----------------------------------------------------------------------------
+class NullSink:
+    """
+    Salida muda (modo headless, sin dispositivo de audio, benchmarks): no
+    reproduce nada pero cuenta cuántas veces se encendió el tono.
+    """
+
+    def __init__(self):
+        self.encendidos = 0
+
+    def start(self):
+        self.encendidos += 1
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class PygameSink:
+    """Bucle de la onda cuadrada en un canal de pygame.mixer."""
+
+    def __init__(self, frecuencia=cfg.BEEP_HZ, volumen=cfg.AUDIO_VOLUME):
+        import pygame
+        if pygame.mixer.get_init() is None:
+            pygame.mixer.init(cfg.AUDIO_RATE, -16, 1, cfg.AUDIO_BUFFER)
+        muestras_por_s, _, canales = pygame.mixer.get_init()
+        self.sonido = pygame.mixer.Sound(
+            buffer=square_wave(frecuencia, muestras_por_s, volumen, canales).tobytes())
+
+    def start(self):
+        self.sonido.play(loops=-1)
+
+    def stop(self):
+        self.sonido.stop()
+
+    def close(self):
+        import pygame
+        self.sonido.stop()
+        pygame.mixer.quit()
+
+
+def create_beeper(mute=False):
+    """
+    Beeper sobre pygame.mixer; con mute, sin AUDIO_ENABLED o si no hay
+    dispositivo de audio (pygame.error), sobre un NullSink.
+    """
+    if mute or not cfg.AUDIO_ENABLED:
+        return Beeper(NullSink())
+    try:
+        return Beeper(PygameSink())
+    except Exception:                   # sin mixer o sin dispositivo: mudo
+        return Beeper(NullSink())
+
+
+# -----------------------------------------------------------------------------
+class Beeper:
+    """
+    Compuerta del tono: update(sound_timer) en cada borde de frame lo
+    enciende cuando ST pasa a ser > 0 y lo apaga cuando vuelve a 0.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.sonando = False
+
+    def update(self, sound_timer):
+        if (sound_timer > 0) != self.sonando:
+            self.sonando = not self.sonando
+            if self.sonando:
+                self.sink.start()
+            else:
+                self.sink.stop()
+
+    def close(self):
+        if self.sonando:
+            self.sink.stop()
+            self.sonando = False
+        self.sink.close()
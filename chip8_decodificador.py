@@ -0,0 +1,165 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Tabla de decodificación precalculada
+#
+# En vez de descomponer cada opcode en un dict y recorrer una cadena de
+# if/elif en cada instrucción, se arma UNA vez una tabla con las 65.536
+# entradas posibles. Cada entrada es una tupla (handler, x, y, arg):
+#   handler : función op_* de chip8_instrucciones, (maquina, x, y, arg),
+#             que ejecuta la instrucción modificando la máquina
+#   x, y    : registros ya extraídos del opcode
+#   arg     : n, kk o nnn según la instrucción
+# Los quirks se resuelven al armar la tabla (se elige la variante op_*
+# correspondiente), así el dispatch no lee 'cfg.' ni ramifica por quirk en
+# cada instrucción. Hay una tabla por set de quirks (perfil), compartida por
+# todas las máquinas que lo usan: un mismo proceso puede correr máquinas con
+# perfiles distintos. Los opcodes SUPER-CHIP (00CN, 00FB-00FF, DXY0, FX30,
+# FX75, FX85) están siempre: en CHIP-8 serían SYS ignorados o un DXY0 vacío.
+# Con strict=True (fuzzing) los opcodes desconocidos y 0NNN lanzan
+# UnknownOpcodeError en vez de ignorarse.
+# -----------------------------------------------------------------------------
+from itertools import repeat
+
+import config as cfg
+from chip8_instrucciones import (
+    op_nop, op_unknown, op_00E0, op_00EE, op_00CN, op_00FB, op_00FC, op_00FD,
+    op_00FE, op_00FF, op_1NNN, op_2NNN, op_3XNN, op_4XNN, op_5XY0,
+    op_6XNN, op_7XNN, op_8XY0, op_8XY1, op_8XY1_vf, op_8XY2, op_8XY2_vf,
+    op_8XY3, op_8XY3_vf, op_8XY4, op_8XY5, op_8XY6, op_8XY6_vy, op_8XY7,
+    op_8XYE, op_8XYE_vy, op_9XY0, op_ANNN, op_BNNN, op_BXNN, op_CXNN,
+    op_DXYN, op_DXYN_wrap, op_DXY0, op_DXY0_wrap, op_EX9E, op_EXA1,
+    op_FX0A, op_FX07, op_FX15, op_FX18, op_FX1E, op_FX1E_vf, op_FX29, op_FX30,
+    op_FX33, op_FX55, op_FX55_inc, op_FX65, op_FX65_inc, op_FX75, op_FX85
+)
+
+
+# -----------------------------------------------------------------------------
+def build_decode_table(shift_uses_vy=cfg.QUIRK_SHIFT_USES_VY,
+                       addi_sets_vf=cfg.QUIRK_ADDI_SETS_VF,
+                       bulk_inc_i=cfg.FX_BULK_INC_I,
+                       dxyn_wrap=cfg.DXYN_WRAP,
+                       jump_uses_vx=cfg.QUIRK_JUMP_USES_VX,
+                       logic_resets_vf=cfg.QUIRK_LOGIC_RESETS_VF,
+                       strict=False):
+    """
+    Arma la tabla de 65.536 entradas (handler, x, y, arg) con los quirks
+    dados ya resueltos. Opcodes desconocidos → op_nop (op_unknown con strict).
+    """
+    h_8 = {
+        0x0: op_8XY0,
+        0x1: op_8XY1_vf if logic_resets_vf else op_8XY1,
+        0x2: op_8XY2_vf if logic_resets_vf else op_8XY2,
+        0x3: op_8XY3_vf if logic_resets_vf else op_8XY3,
+        0x4: op_8XY4, 0x5: op_8XY5, 0x7: op_8XY7,
+        0x6: op_8XY6_vy if shift_uses_vy else op_8XY6,
+        0xE: op_8XYE_vy if shift_uses_vy else op_8XYE,
+    }
+    h_e = {0x9E: op_EX9E, 0xA1: op_EXA1}
+    h_0 = {0x00E0: op_00E0, 0x00EE: op_00EE, 0x00FB: op_00FB, 0x00FC: op_00FC,
+           0x00FD: op_00FD, 0x00FE: op_00FE, 0x00FF: op_00FF}
+    h_f = {
+        0x07: op_FX07, 0x0A: op_FX0A, 0x15: op_FX15, 0x18: op_FX18,
+        0x1E: op_FX1E_vf if addi_sets_vf else op_FX1E, 0x29: op_FX29,
+        0x30: op_FX30, 0x33: op_FX33, 0x75: op_FX75, 0x85: op_FX85,
+        0x55: op_FX55_inc if bulk_inc_i else op_FX55,
+        0x65: op_FX65_inc if bulk_inc_i else op_FX65,
+    }
+    # Familias cuyo handler depende sólo del nibble alto, y la máscara que
+    # saca su 'arg' del opcode (n, kk o nnn).
+    h_op = {
+        0x1: (op_1NNN, 0xFFF), 0x2: (op_2NNN, 0xFFF), 0x3: (op_3XNN, 0xFF),
+        0x4: (op_4XNN, 0xFF),  0x6: (op_6XNN, 0xFF),  0x7: (op_7XNN, 0xFF),
+        0xA: (op_ANNN, 0xFFF), 0xB: (op_BXNN if jump_uses_vx else op_BNNN, 0xFFF),
+        0xC: (op_CXNN, 0xFF),
+        0xD: (op_DXYN_wrap if dxyn_wrap else op_DXYN, 0xF),
+    }
+
+    # Se arma por familias: cada tramo de opcodes (una familia o un
+    # sub-opcode) se llena de una vez con zip() sobre columnas x/y/arg
+    # (listas indexadas por opcode), en vez de clasificar cada opcode con una
+    # cadena de if/elif en Python: varias veces más rápido, que importa en
+    # los procesos cortos (lotes, fuzzing) que arman su propia tabla. Las
+    # columnas son locales: se liberan al volver.
+    X = [x for x in range(16) for _ in range(256)] * 16
+    Y = [y for y in range(16) for _ in range(16)] * 256
+    ARG = {0xF: list(range(16)) * 4096, 0xFF: list(range(256)) * 256,
+           0xFFF: list(range(4096)) * 16}
+
+    def entradas(handler, tramo, mascara):
+        args = ARG[mascara][tramo] if mascara else repeat(0)
+        return list(zip(repeat(handler), X[tramo], Y[tramo], args))
+
+    # op_nop/op_unknown no usan x, y ni arg: todos los desconocidos comparten
+    # una sola tupla y sólo se crean las de los opcodes que existen.
+    tabla = [(op_unknown if strict else op_nop, 0, 0, 0)] * 0x10000
+    for op, (handler, mascara) in h_op.items():
+        tramo = slice(op << 12, (op + 1) << 12)
+        tabla[tramo] = entradas(handler, tramo, mascara)
+    tramo = slice(0xD000, 0xE000, 0x10)
+    tabla[tramo] = entradas(op_DXY0_wrap if dxyn_wrap else op_DXY0, tramo, 0)
+    tabla[0x00C0:0x00D0] = entradas(op_00CN, slice(0x00C0, 0x00D0), 0xF)
+    for opcode, handler in h_0.items():
+        tabla[opcode] = (handler, X[opcode], Y[opcode], 0)
+    for op, handler in ((0x5, op_5XY0), (0x9, op_9XY0)):
+        tramo = slice(op << 12, (op + 1) << 12, 0x10)
+        tabla[tramo] = entradas(handler, tramo, 0)
+    for n, handler in h_8.items():
+        tramo = slice(0x8000 + n, 0x9000, 0x10)
+        tabla[tramo] = entradas(handler, tramo, 0xF)
+    for familia, h in ((0xE, h_e), (0xF, h_f)):
+        for kk, handler in h.items():
+            tramo = slice((familia << 12) + kk, (familia + 1) << 12, 0x100)
+            tabla[tramo] = entradas(handler, tramo, 0xFF)
+    return tabla
+
+
+# -----------------------------------------------------------------------------
+QUIRKS = ("shift_uses_vy", "addi_sets_vf", "bulk_inc_i", "dxyn_wrap",
+          "jump_uses_vx", "logic_resets_vf")
+
+
+def resolve_quirks(quirks=None):
+    """
+    Dict completo de quirks a partir de: None (config.py: QUIRK_PROFILE o, si
+    es None, las constantes sueltas), el nombre de un perfil de
+    QUIRK_PROFILES o un dict, que puede ser parcial (lo que falta sale de
+    config.py). Lanza ValueError con un perfil o un quirk desconocido.
+    """
+    if cfg.QUIRK_PROFILE is not None:
+        base = dict(cfg.QUIRK_PROFILES[cfg.QUIRK_PROFILE])
+    else:
+        base = {
+            "shift_uses_vy":   cfg.QUIRK_SHIFT_USES_VY,
+            "addi_sets_vf":    cfg.QUIRK_ADDI_SETS_VF,
+            "bulk_inc_i":      cfg.FX_BULK_INC_I,
+            "dxyn_wrap":       cfg.DXYN_WRAP,
+            "jump_uses_vx":    cfg.QUIRK_JUMP_USES_VX,
+            "logic_resets_vf": cfg.QUIRK_LOGIC_RESETS_VF,
+        }
+    if quirks is None:
+        return base
+    if isinstance(quirks, str):
+        if quirks not in cfg.QUIRK_PROFILES:
+            raise ValueError(f"Perfil de quirks desconocido: {quirks!r} "
+                             f"(hay {', '.join(cfg.QUIRK_PROFILES)})")
+        return dict(cfg.QUIRK_PROFILES[quirks])
+    desconocidos = set(quirks) - set(QUIRKS)
+    if desconocidos:
+        raise ValueError(f"Quirks desconocidos: {', '.join(sorted(desconocidos))}")
+    base.update((k, bool(v)) for k, v in quirks.items())
+    return base
+
+
+_TABLAS = {}    # (tupla de quirks, strict) → tabla
+
+def decode_table(quirks=None, strict=False):
+    """
+    Tabla para un set de quirks (lo que acepta resolve_quirks; None = los de
+    config.py). Se arma la primera vez que se pide ese set y se reusa.
+    strict: opcodes desconocidos → UnknownOpcodeError en vez de ignorarse.
+    """
+    q = resolve_quirks(quirks)
+    clave = (tuple(q[k] for k in QUIRKS), bool(strict))
+    tabla = _TABLAS.get(clave)
+    if tabla is None:
+        tabla = _TABLAS[clave] = build_decode_table(**q, strict=strict)
+    return tabla
@@ -0,0 +1,165 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Save states: snapshot/restore binario y anillo para rebobinar
+#
+# Formato (versión 3, little-endian), sin pickle:
+#   cabecera   : _CABECERA (magia b"C8ST", versión, quirks (bits en el orden
+#                de chip8_decodificador.QUIRKS), PC, I, DT, ST, puntero de
+#                pila, tecla pressed_once, teclas, filas de gfx, bytes por
+#                fila, ciclos, frames, ciclos salteados)
+#   V0..VF     : 16 bytes
+#   flags RPL  : 16 bytes (FX75/FX85 de SUPER-CHIP)
+#   pila       : las largo_pila entradas ocupadas, uint16
+#   memoria    : MEM_SIZE bytes
+#   gfx        : filas * bytes_por_fila (cada fila big-endian, x=0 en el bit alto;
+#                64x32 o 128x64 según el modo)
+#   RNG        : 625 * uint32 (estado de Mersenne Twister) + double gauss_next
+#                (NaN = None)
+# Restaurar son copias de slices sobre un memoryview: microsegundos. La
+# memoria se copia e invalida de a páginas de _PAGINA bytes y sólo las que
+# cambiaron: volver a un estado de la misma partida no descarta lo que el
+# JIT ya tradujo del código que no se tocó.
+#
+# skipped_cycles viaja en el estado (cycles - skipped_cycles sigue siendo lo
+# ejecutado después de load_state) pero hash_state lo cuenta como 0: es
+# contabilidad del motor, no del programa (el JIT a veces corre un frame
+# ocioso que el intérprete saltea), y el hash tiene que ser el mismo con los
+# dos motores (ver chip8_grabacion).
+# -----------------------------------------------------------------------------
+import hashlib, math, struct
+from array import array
+from collections import deque
+
+import config as cfg
+from chip8_decodificador import QUIRKS
+from chip8_instrucciones import screen_width
+
+MAGIC = b"C8ST"
+VERSION = 3
+
+_CABECERA = struct.Struct("<4sBBHHBBBBHHBxQQQ")
+_RNG = struct.Struct("<625Id")
+_PAGINA = 256
+
+
+# -----------------------------------------------------------------------------
+def _quirks_a_bits(quirks):
+    return sum(1 << i for i, q in enumerate(QUIRKS) if quirks[q])
+
+
+def save_state(m):
+    """Devuelve el estado completo de la máquina m como bytes."""
+    return _serializar(m, m.skipped_cycles)
+
+
+def hash_state(m):
+    """
+    SHA-256 (hex) del estado completo sin skipped_cycles; dos corridas
+    iguales dan el mismo hash, con cualquier motor.
+    """
+    return hashlib.sha256(_serializar(m, 0)).hexdigest()
+
+
+def _serializar(m, salteados):
+    bytes_fila = screen_width(m.gfx) // 8
+    teclas = sum(1 << k for k in range(16) if m.keys[k])
+    tecla = 0xFF if m.pressed_once is None else m.pressed_once
+    _, mt, gauss = m.rng.getstate()
+
+    partes = [
+        _CABECERA.pack(MAGIC, VERSION, _quirks_a_bits(m.quirks), m.pc, m.index,
+                       m.delay_timer, m.sound_timer, m.sp, tecla, teclas,
+                       len(m.gfx), bytes_fila, m.cycles, m.frames, salteados),
+        bytes(m.v_reg),
+        bytes(m.flags),
+        struct.pack(f"<{m.sp}H", *m.stack[:m.sp]),
+        m.memory,
+        b"".join(fila.to_bytes(bytes_fila, "big") for fila in m.gfx),
+        _RNG.pack(*mt, math.nan if gauss is None else gauss),
+    ]
+    return b"".join(partes)
+
+
+# -----------------------------------------------------------------------------
+def load_state(m, datos):
+    """
+    Restaura en m un estado generado por save_state. Lanza ValueError si el
+    formato/versión no coincide o si el estado es de otra configuración de
+    quirks o de memoria.
+    """
+    mv = memoryview(datos)
+    (magia, version, quirks, pc, index, dt, st, largo_pila, tecla, teclas,
+     filas, bytes_fila, ciclos, frames, salteados) = _CABECERA.unpack_from(mv, 0)
+    if magia != MAGIC:
+        raise ValueError("No es un save state CHIP-8 compatible")
+    if version != VERSION:
+        raise ValueError(f"Save state de la versión {version}; esta lee la {VERSION}")
+    if quirks != _quirks_a_bits(m.quirks):
+        raise ValueError("El save state usa otra configuración de quirks")
+    if largo_pila > len(m.stack):
+        raise ValueError("Save state con una pila más profunda que STACK_DEPTH")
+
+    pos = _CABECERA.size
+    v_reg = mv[pos:pos + 16]; pos += 16
+    flags = mv[pos:pos + 16]; pos += 16
+    pila = mv[pos:pos + 2 * largo_pila]; pos += 2 * largo_pila
+    memoria = mv[pos:pos + cfg.MEM_SIZE]; pos += cfg.MEM_SIZE
+    gfx = mv[pos:pos + filas * bytes_fila]; pos += filas * bytes_fila
+    if len(memoria) != len(m.memory) or len(mv) != pos + _RNG.size:
+        raise ValueError("Save state truncado o de otro tamaño de memoria")
+    rng = _RNG.unpack_from(mv, pos)
+
+    for a in range(0, cfg.MEM_SIZE, _PAGINA):
+        pagina = memoria[a:a + _PAGINA]
+        if m.memory[a:a + _PAGINA] != pagina:
+            m.memory[a:a + _PAGINA] = pagina
+            m.invalidate(a, a + _PAGINA)
+    m.v_reg[:] = array("B", v_reg)
+    m.flags[:] = array("B", flags)
+    pila = struct.unpack(f"<{largo_pila}H", pila)
+    m.stack[:] = array("H", pila + (0,) * (len(m.stack) - largo_pila))
+    m.sp = largo_pila
+    m.gfx[:] = [int.from_bytes(gfx[i:i + bytes_fila], "big")
+                for i in range(0, len(gfx), bytes_fila)]
+    m.pc, m.index = pc, index
+    m.delay_timer, m.sound_timer = dt, st
+    m.keys = [bool(teclas >> k & 1) for k in range(16)]
+    m.pressed_once = None if tecla == 0xFF else tecla
+    m.cycles, m.frames, m.skipped_cycles = ciclos, frames, salteados
+    gauss = rng[-1]
+    m.rng.setstate((3, rng[:-1], None if math.isnan(gauss) else gauss))
+
+    m.dirty_rows = (1 << len(m.gfx)) - 1     # hay que redibujar todo
+
+
+# -----------------------------------------------------------------------------
+class RewindRing:
+    """
+    Anillo con los últimos 'capacidad' estados (p. ej. uno por frame) para
+    rebobinar o para bifurcar corridas desde un punto anterior.
+    """
+
+    def __init__(self, capacidad=600):
+        self._estados = deque(maxlen=capacidad)
+
+    def __len__(self):
+        return len(self._estados)
+
+    def push(self, m):
+        """Guarda el estado actual de m (descarta el más viejo si está lleno)."""
+        self._estados.append(save_state(m))
+
+    def rewind(self, m, pasos=1):
+        """
+        Saca los últimos 'pasos' estados del anillo y restaura en m el más
+        viejo de ellos (1 = el último guardado). Llamarlo una vez por frame
+        rebobina de a un frame. Devuelve False si no hay tantos estados.
+        """
+        if pasos < 1 or pasos > len(self._estados):
+            return False
+        for _ in range(pasos):
+            datos = self._estados.pop()
+        load_state(m, datos)
+        return True
+
+    def clear(self):
+        self._estados.clear()
@@ -0,0 +1,224 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Flujo de framebuffer comprimido por deltas
+#
+#   frames = capture_frames(maquina, 3600)          # generador de gfx por frame
+#   write_stream("corrida.c8fb", encode_frames(frames))
+#   lector = FrameStreamReader("corrida.c8fb")
+#   gfx = lector.frame(1234)                        # busca el keyframe previo
+#
+# Cada frame se guarda como un registro:
+#   "K" keyframe : número de frame, ancho, alto y las filas completas (PackBits)
+#   "D" delta    : máscara de filas cambiadas + XOR de esas filas contra el
+#                  frame anterior (PackBits; el XOR es casi todo ceros)
+#   "R" repetir  : cantidad de frames seguidos sin cambios
+# Cada KEYFRAME_EVERY frames (y cuando cambia la resolución) va un keyframe,
+# así cualquier frame se reconstruye desde el keyframe anterior sin leer todo.
+#
+# Archivo: _CABECERA (magia b"C8FB", versión, ancho, alto) + registros; la
+# resolución de la cabecera es la inicial, cada keyframe trae la suya.
+# Las filas son enteros de 'ancho' bits (x=0 en el bit alto), como m.gfx.
+# -----------------------------------------------------------------------------
+import bisect, struct
+
+import config as cfg
+from chip8_instrucciones import screen_width
+
+MAGIC = b"C8FB"
+VERSION = 1
+KEYFRAME_EVERY = 300            # un keyframe cada 5 s a 60 Hz
+
+_CABECERA = struct.Struct("<4sBBB")
+_KEYFRAME = struct.Struct("<cIBBH")     # b"K", frame, ancho, alto, largo
+_DELTA = struct.Struct("<cQH")          # b"D", máscara de filas, largo
+_REPETIR = struct.Struct("<cH")         # b"R", cantidad
+
+
+# -----------------------------------------------------------------------------
+# PackBits: encabezado h; h < 128 → h+1 bytes literales; h > 128 → el byte
+# siguiente repetido 257-h veces (2..128).
+# -----------------------------------------------------------------------------
+def pack_bits(datos):
+    salida = bytearray()
+    i, n = 0, len(datos)
+    while i < n:
+        j = i + 1
+        while j < n and j - i < 128 and datos[j] == datos[i]:
+            j += 1
+        if j - i >= 2:
+            salida += bytes((257 - (j - i), datos[i]))
+            i = j
+            continue
+        # Literal hasta que empiece una repetición o se llegue a 128 bytes
+        j = i + 1
+        while j < n and j - i < 128 and not (j + 1 < n and datos[j] == datos[j + 1]):
+            j += 1
+        salida.append(j - i - 1)
+        salida += datos[i:j]
+        i = j
+    return bytes(salida)
+
+
+def unpack_bits(datos):
+    salida = bytearray()
+    i, n = 0, len(datos)
+    while i < n:
+        h = datos[i]
+        if h < 128:
+            salida += datos[i + 1:i + h + 2]
+            i += h + 2
+        else:
+            salida += datos[i + 1:i + 2] * (257 - h)
+            i += 2
+    return bytes(salida)
+
+
+# -----------------------------------------------------------------------------
+def capture_frames(maquina, n_frames):
+    """Corre n frames y entrega una copia de gfx (tupla de filas) después de cada uno."""
+    for _ in range(n_frames):
+        maquina.run_frames(1)
+        yield tuple(maquina.gfx)
+
+
+def _filas_a_bytes(filas, bytes_fila):
+    return b"".join(f.to_bytes(bytes_fila, "big") for f in filas)
+
+
+def encode_frames(frames, keyframe_every=KEYFRAME_EVERY):
+    """
+    Generador: recibe frames (secuencias de filas) y entrega los registros
+    codificados (bytes). Los frames repetidos se acumulan en un solo "R".
+    El ancho sale de la cantidad de filas (64x32 o 128x64 de SUPER-CHIP).
+    """
+    previo, repetidos = None, 0
+    for numero, gfx in enumerate(frames):
+        ancho = screen_width(gfx)
+        bytes_fila = ancho // 8
+        if previo is not None and len(gfx) == len(previo) \
+                and numero % keyframe_every != 0:
+            mascara, cambios = 0, []
+            for y, (a, b) in enumerate(zip(previo, gfx)):
+                if a != b:
+                    mascara |= 1 << y
+                    cambios.append(a ^ b)
+            if not mascara:
+                repetidos += 1
+                if repetidos == 0xFFFF:
+                    yield _REPETIR.pack(b"R", repetidos)
+                    repetidos = 0
+                continue
+            if repetidos:
+                yield _REPETIR.pack(b"R", repetidos)
+                repetidos = 0
+            cuerpo = pack_bits(_filas_a_bytes(cambios, bytes_fila))
+            yield _DELTA.pack(b"D", mascara, len(cuerpo)) + cuerpo
+        else:
+            if repetidos:
+                yield _REPETIR.pack(b"R", repetidos)
+                repetidos = 0
+            cuerpo = pack_bits(_filas_a_bytes(gfx, bytes_fila))
+            yield _KEYFRAME.pack(b"K", numero, ancho, len(gfx), len(cuerpo)) + cuerpo
+        previo = gfx
+    if repetidos:
+        yield _REPETIR.pack(b"R", repetidos)
+
+
+def write_stream(ruta_archivo, registros, ancho=cfg.SCREEN_W, alto=cfg.SCREEN_H):
+    """Escribe la cabecera y los registros (p. ej. de encode_frames) a un archivo."""
+    with open(ruta_archivo, "wb") as f:
+        f.write(_CABECERA.pack(MAGIC, VERSION, ancho, alto))
+        for registro in registros:
+            f.write(registro)
+
+
+# -----------------------------------------------------------------------------
+def _registros(datos, pos=0):
+    """Recorre los registros de datos desde pos: (tipo, pos, pos_siguiente)."""
+    n = len(datos)
+    while pos < n:
+        tipo = datos[pos:pos + 1]
+        if tipo == b"K":
+            *_, largo = _KEYFRAME.unpack_from(datos, pos)
+            fin = pos + _KEYFRAME.size + largo
+        elif tipo == b"D":
+            *_, largo = _DELTA.unpack_from(datos, pos)
+            fin = pos + _DELTA.size + largo
+        elif tipo == b"R":
+            fin = pos + _REPETIR.size
+        else:
+            raise ValueError(f"Registro desconocido {tipo!r} en {pos}")
+        yield tipo, pos, fin
+        pos = fin
+
+
+def decode_records(datos, pos=0, gfx=None):
+    """
+    Generador: decodifica los registros de datos (desde pos) y entrega cada
+    frame como lista de filas. 'gfx' es el frame anterior si pos no es un
+    keyframe.
+    """
+    ancho = cfg.SCREEN_W
+    for tipo, inicio, fin in _registros(datos, pos):
+        if tipo == b"K":
+            _, _, ancho, alto, _ = _KEYFRAME.unpack_from(datos, inicio)
+            crudo = unpack_bits(datos[inicio + _KEYFRAME.size:fin])
+            bf = ancho // 8
+            gfx = [int.from_bytes(crudo[i:i + bf], "big") for i in range(0, alto * bf, bf)]
+            yield list(gfx)
+        elif tipo == b"D":
+            _, mascara, _ = _DELTA.unpack_from(datos, inicio)
+            crudo = unpack_bits(datos[inicio + _DELTA.size:fin])
+            bf, i, y = ancho // 8, 0, 0
+            while mascara:
+                if mascara & 1:
+                    gfx[y] ^= int.from_bytes(crudo[i:i + bf], "big")
+                    i += bf
+                mascara >>= 1
+                y += 1
+            yield list(gfx)
+        else:
+            (_, veces) = _REPETIR.unpack_from(datos, inicio)
+            for _ in range(veces):
+                yield list(gfx)
+
+
+# -----------------------------------------------------------------------------
+class FrameStreamReader:
+    """
+    Lector de un archivo de flujo: len(lector) frames, iteración secuencial y
+    frame(i) con búsqueda al keyframe anterior (índice armado al abrir
+    recorriendo sólo las cabeceras de los registros).
+    """
+
+    def __init__(self, ruta_archivo):
+        with open(ruta_archivo, "rb") as f:
+            self._datos = f.read()
+        magia, version, self.ancho, self.alto = _CABECERA.unpack_from(self._datos)
+        if magia != MAGIC or version != VERSION:
+            raise ValueError("No es un flujo de framebuffer CHIP-8 compatible")
+
+        self._keyframes, self._posiciones = [], []   # número de frame, posición
+        total = 0
+        for tipo, inicio, _ in _registros(self._datos, _CABECERA.size):
+            if tipo == b"K":
+                self._keyframes.append(total)
+                self._posiciones.append(inicio)
+            total += _REPETIR.unpack_from(self._datos, inicio)[1] if tipo == b"R" else 1
+        self._total = total
+
+    def __len__(self):
+        return self._total
+
+    def __iter__(self):
+        return decode_records(self._datos, _CABECERA.size)
+
+    def frame(self, numero):
+        """Frame 'numero' (lista de filas), decodificando desde el keyframe anterior."""
+        if not 0 <= numero < self._total:
+            raise IndexError(numero)
+        k = bisect.bisect_right(self._keyframes, numero) - 1
+        actual = self._keyframes[k]
+        for gfx in decode_records(self._datos, self._posiciones[k]):
+            if actual == numero:
+                return gfx
+            actual += 1
@@ -1,114 +1,233 @@
 # -----------------------------------------------------------------------------
 # Importamos las librerias 
+#
+# Pygame se importa dentro de las funciones de ventana/teclado: cargar la
+# ROM, volcar o hashear gfx y guardar PNGs no lo necesitan, y un proceso
+# headless se ahorra su import (la mayor parte del arranque).
 # -----------------------------------------------------------------------------
-import pygame
+import hashlib, struct, zlib
 import config as cfg 
+from chip8_instrucciones import screen_width
 
 # -----------------------------------------------------------------------------
-def process_input(events, KEY_MAPPINGS):
+def resolve_key_mappings(KEY_MAPPINGS):
     """
-    A partir de 'events' del frame:
-      - chip8_keys: lista de 16 bools (estado continuo)
-      - pressed_once: 0x0..0xF si hubo KEYDOWN mapeado, o None
+    {tecla CHIP-8: nombre} (config.KEY_MAPPINGS) → {tecla CHIP-8: pygame.K_*}.
+    Lanza ValueError si un nombre no es una tecla de Pygame.
     """
-    keys = pygame.key.get_pressed()
-    chip8_keys = [False] * 16
-    for k, pgk in KEY_MAPPINGS.items():
-        chip8_keys[k] = keys[pgk]
+    import pygame
+    resueltas = {}
+    for k, nombre in KEY_MAPPINGS.items():
+        codigo = getattr(pygame, f"K_{nombre}", None)
+        if codigo is None:
+            raise ValueError(f"Tecla desconocida en KEY_MAPPINGS: {nombre!r}")
+        resueltas[k] = codigo
+    return resueltas
 
-    pressed_once = None
+
+def process_key_events(events, teclado, KEY_MAPPINGS):
+    """
+    Vuelca los KEYDOWN/KEYUP mapeados de 'events' en el teclado compartido
+    (chip8_hilos.SharedKeys) que lee el hilo de emulación. KEY_MAPPINGS ya
+    resuelto (ver resolve_key_mappings). Al perder el foco se sueltan todas
+    las teclas. Devuelve False si llegó un QUIT.
+    """
+    import pygame
+    seguir = True
     for e in events:
-        if e.type == pygame.KEYDOWN:
+        if e.type in (pygame.KEYDOWN, pygame.KEYUP):
             for k, pgk in KEY_MAPPINGS.items():
                 if e.key == pgk:
-                    pressed_once = k
+                    teclado.key_event(k, e.type == pygame.KEYDOWN)
                     break
-    return chip8_keys, pressed_once
+        elif e.type == pygame.WINDOWFOCUSLOST:
+            teclado.release_all()
+        elif e.type == pygame.QUIT:
+            seguir = False
+    return seguir
 
 # -----------------------------------------------------------------------------
-def tick_timers(delay_timer, sound_timer, accumulator_ms, dt_ms):
+def tick_timers(delay_timer, sound_timer):
     """
-    Disminuye DT y ST a 60 Hz usando acumulador en ms.
+    Disminuye DT y ST una vez. Se llama exactamente una vez por frame
+    (TIMER_HZ = 60), después de ejecutar el presupuesto de instrucciones.
     """
-    accumulator_ms += dt_ms
-    step = 1000.0 / 60.0
-    while accumulator_ms >= step:
-        if delay_timer > 0:
-            delay_timer -= 1
-        if sound_timer > 0:
-            sound_timer -= 1
-        accumulator_ms -= step
-    return delay_timer, sound_timer, accumulator_ms
+    if delay_timer > 0:
+        delay_timer -= 1
+    if sound_timer > 0:
+        sound_timer -= 1
+    return delay_timer, sound_timer
 
 
 # -----------------------------------------------------------------------------
 def load_game(ruta_archivo):
     """
-    Lee un archivo binario y devuelve su contenido como una lista de bytes.
+    Lee un archivo binario y devuelve su contenido.
 
     Parámetros:
         ruta_archivo (str): Ruta al archivo a leer.
 
     Retorna:
-        list[int]: Lista de enteros (0-255) representando cada byte del archivo.
+        bytes: el contenido tal cual (se copia a memoria con un slice; para
+        lotes grandes ver chip8_roms.prepare_rom_file, con mmap y caché).
     """
     with open(ruta_archivo, "rb") as f:
-        contenido = f.read()  # Leo todo el archivo como bytes
-    return list(contenido)
+        return f.read()
 
 
 # -----------------------------------------------------------------------------
+# Render por superficies
+#
+# El framebuffer se refleja en una superficie de ancho x alto (8 bits, paleta
+# BG/FG) que comparte memoria con '_pixeles'. Al presentar sólo se copian las
+# filas sucias, se escala con un único blit, se pega encima la grilla
+# (pre-renderizada una vez) y se actualizan sólo los rectángulos cambiados.
+# La ventana siempre mide SCREEN_W*SCALE x SCREEN_H*SCALE: en alta
+# resolución SUPER-CHIP (128x64) cada píxel ocupa SCALE/2 y, cuando cambia la
+# cantidad de filas de gfx, las superficies se rearman y se redibuja todo.
+# -----------------------------------------------------------------------------
+_BYTE_A_PIXELES = [bytes((b >> (7 - i)) & 1 for i in range(8)) for b in range(256)]
+
+
 def setup_graphics(SCALE):
     """
     Inicializa la ventana de Pygame con el tamaño adecuado según
-    la resolución CHIP-8 (64x32) y el factor de escala SCALE.
-    """
-    global pantalla
-    ancho_px = 64 * SCALE+1
-    alto_px = 32 * SCALE+1
-    pantalla = pygame.display.set_mode((ancho_px, alto_px))
-    pygame.display.set_caption("Emulador CHIP-8")
-    pantalla.fill((0, 0, 0))
+    la resolución CHIP-8 (64x32) y el factor de escala SCALE, y prepara
+    las superficies del render.
+    """
+    import pygame
+    global pantalla, _escala_base
+    _escala_base = SCALE
+    pantalla = pygame.display.set_mode((cfg.SCREEN_W * SCALE + 1, cfg.SCREEN_H * SCALE + 1))
+    pygame.display.set_caption(cfg.WINDOW_TITLE)
+    _preparar_superficies(cfg.SCREEN_W, cfg.SCREEN_H)
     pygame.display.flip()
 
 
+def _preparar_superficies(ancho, alto):
+    """Superficies del render para una resolución de ancho x alto píxeles."""
+    import pygame
+    global _pixeles, _chica, _escalada, _grilla, _escala, _ancho, _alto
+    _ancho, _alto = ancho, alto
+    _escala = max(1, _escala_base * cfg.SCREEN_W // ancho)
+    SCALE = _escala
+    pantalla.fill(cfg.BG_COLOR)
+
+    paleta = [cfg.BG_COLOR, cfg.FG_COLOR]
+    _pixeles = bytearray(ancho * alto)                      # 0/1 por píxel
+    _chica = pygame.image.frombuffer(_pixeles, (ancho, alto), "P")
+    _chica.set_palette(paleta)
+    _escalada = pygame.Surface((ancho * SCALE, alto * SCALE), depth=8)
+    _escalada.set_palette(paleta)
+
+    # Grilla: líneas sobre un fondo con colorkey (transparente al pegarla)
+    _grilla = None
+    if cfg.GRID_ON:
+        clave = (255, 0, 255) if cfg.GRID_COLOR != (255, 0, 255) else (0, 255, 0)
+        _grilla = pygame.Surface(pantalla.get_size())
+        _grilla.fill(clave)
+        _grilla.set_colorkey(clave)
+        # Horizontales (alto celdas ⇒ alto+1 líneas) y verticales (ancho ⇒ ancho+1)
+        for y in range(alto + 1):
+            pygame.draw.line(_grilla, cfg.GRID_COLOR, (0, y * SCALE), (ancho * SCALE, y * SCALE), 1)
+        for x in range(ancho + 1):
+            pygame.draw.line(_grilla, cfg.GRID_COLOR, (x * SCALE, 0), (x * SCALE, alto * SCALE), 1)
+        pantalla.blit(_grilla, (0, 0))
+
+
 # -----------------------------------------------------------------------------
-def draw_graphics(gfx, SCALE):
-    """
-    Dibuja el contenido de gfx en la ventana usando SCALE para escalar cada píxel.
-    gfx es una lista de 32 filas x 64 columnas, con valores 0 (apagado) o 1 (encendido).
-    """
-    
-    pantalla.fill((0, 0, 0)) #Limpiar fondo (negro)
-
-    # 2) Dibujar píxeles (blanco encendido, negro apagado)
-    for y in range(32):
-        for x in range(64):
-            if gfx[y][x]:
-                pygame.draw.rect(
-                    pantalla,
-                    (255, 255, 255),
-                    (x * SCALE, y * SCALE, SCALE, SCALE)
-                )
-
-    # 3) Dibujar la grilla por encima de todo
-    color_grid = (64, 64, 64)
-
-    # Horizontales (32 celdas ⇒ 33 líneas, incluyendo bordes)
-    for y in range(33):
-        pygame.draw.line(
-            pantalla, cfg.GRID_COLOR,
-            (0, y * SCALE), (64 * SCALE, y * SCALE), 1
-        )
-
-    # Verticales (64 celdas ⇒ 65 líneas, incluyendo bordes)
-    for x in range(65):
-        pygame.draw.line(
-            pantalla, cfg.GRID_COLOR,
-            (x * SCALE, 0), (x * SCALE, 32 * SCALE), 1
-        )
+def draw_graphics(gfx, dirty_rows=None):
+    """
+    Presenta gfx (32 filas de 64 bits, o 64 de 128 en alta resolución).
+    dirty_rows es una máscara de bits (bit y = fila y cambió); None redibuja
+    todo. Se llama como máximo una vez por frame.
+    """
+    import pygame
+    alto = len(gfx)
+    if alto != _alto:
+        _preparar_superficies(screen_width(gfx), alto)
+        dirty_rows = None
+    ancho = _ancho
+    if dirty_rows is None:
+        dirty_rows = (1 << alto) - 1
 
-    pygame.display.flip()
+    # 1) Copiar las filas sucias al buffer de la superficie chica
+    bytes_fila = ancho // 8
+    for y in range(alto):
+        if dirty_rows >> y & 1:
+            fila = gfx[y].to_bytes(bytes_fila, "big")
+            _pixeles[y * ancho:(y + 1) * ancho] = b"".join([_BYTE_A_PIXELES[b] for b in fila])
+
+    # 2) Escalar una sola vez (8 bits → 8 bits, sin conversiones)
+    pygame.transform.scale(_chica, _escalada.get_size(), _escalada)
+
+    # 3) Pegar sólo las franjas de filas consecutivas sucias (+ grilla)
+    rects = []
+    y = 0
+    while y < alto:
+        if dirty_rows >> y & 1:
+            y0 = y
+            while y < alto and dirty_rows >> y & 1:
+                y += 1
+            rect = pygame.Rect(0, y0 * _escala, ancho * _escala + 1, (y - y0) * _escala + 1)
+            pantalla.blit(_escalada, rect.topleft, rect)
+            if _grilla is not None:
+                pantalla.blit(_grilla, rect.topleft, rect)
+            rects.append(rect)
+        y += 1
+
+    pygame.display.update(rects)
+
+
+# -----------------------------------------------------------------------------
+def dump_graphics(gfx):
+    """
+    Devuelve gfx como texto ('#' encendido, '.' apagado), una línea por fila.
+    Útil en modo --headless, donde no hay ventana.
+    """
+    ancho = screen_width(gfx)
+    return "\n".join(format(fila, f"0{ancho}b").replace("0", ".").replace("1", "#")
+                     for fila in gfx)
+
+
+# -----------------------------------------------------------------------------
+def graphics_bytes(gfx):
+    """gfx empaquetado a bytes: ancho/8 bytes por fila, de arriba a abajo."""
+    bytes_fila = screen_width(gfx) // 8
+    return b"".join(fila.to_bytes(bytes_fila, "big") for fila in gfx)
+
+
+def hash_graphics(gfx):
+    """Hash SHA-256 (hex) del framebuffer; sirve para comparar corridas."""
+    return hashlib.sha256(graphics_bytes(gfx)).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+def save_png(gfx, ruta_archivo, escala=1):
+    """
+    Guarda gfx como PNG en escala de grises de 1 bit (sin Pygame: zlib + struct).
+    Cada píxel CHIP-8 ocupa escala x escala píxeles de la imagen.
+    """
+    ancho_gfx = screen_width(gfx)
+    ancho, alto = ancho_gfx * escala, len(gfx) * escala
+    bytes_fila = (ancho + 7) // 8
+    crudo = bytearray()
+    for fila in gfx:
+        if escala > 1:
+            bits = format(fila, f"0{ancho_gfx}b")
+            fila = int("".join(b * escala for b in bits), 2)
+        linea = b"\x00" + fila.to_bytes(bytes_fila, "big")   # filtro 0 + datos
+        crudo += linea * escala
+
+    def chunk(tipo, datos):
+        return (struct.pack(">I", len(datos)) + tipo + datos
+                + struct.pack(">I", zlib.crc32(tipo + datos) & 0xFFFFFFFF))
+
+    with open(ruta_archivo, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", ancho, alto, 1, 0, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(bytes(crudo), 9)))
+        f.write(chunk(b"IEND", b""))
 
 
 # -----------------------------------------------------------------------------
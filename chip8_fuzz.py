@@ -0,0 +1,388 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Fuzzing de la entrada guiado por cobertura, en un pool de procesos
+#
+#   python main.py fuzz roms/pong.ch8 --seconds 60 --jobs 4
+#   python main.py fuzz roms/maze.ch8 --dir fuzz-maze --frames 1200 --cycles-per-frame 100
+#
+# Un caso es una grabación de chip8_grabacion (semilla de CXNN + corridas de
+# teclado por frame): cada uno se reproduce sin ventana en una máquina JIT con
+# la tabla estricta (strict=True) y, si termina con una excepción o alcanza
+# código nuevo, se guarda como .c8in, con los quirks del fuzzing (--quirks o
+# los de config.py). Así cualquier caso se reproduce, sin repetir --quirks, con
+#   python main.py ROM --replay DIR/crashes/StackError-2A4.c8in --strict
+#
+# Cobertura: CoverageJIT anota, por cada bloque traducido que corre entero,
+# la arista (fin del bloque, PC siguiente). El fin del bloque identifica a su
+# terminador (salto, skip, CALL, RET, ...), así que las aristas son las ramas
+# tomadas; no dependen de dónde cortó el presupuesto de un frame (los
+# prefijos de un bloque que no entra no llegan al terminador y no anotan) y
+# el costo es un set.add() por bloque, no por instrucción.
+#
+# Cada proceso arma una sola CoverageJIT y la resetea entre casos (semilla,
+# cycles_per_frame y ROM de nuevo, aristas vacías): las traducciones de la
+# ROM intacta y las variantes del código automodificado quedan en la
+# PreparedRom (chip8_roms), así un caso no vuelve a compilar lo del anterior.
+#
+# Instantáneas: de cada caso del corpus se guarda el estado (save_state)
+# después de cada una de sus corridas. Un caso mutado comparte con su padre
+# las corridas anteriores a la primera que cambió (con la misma semilla), así
+# que arranca con load_state desde el prefijo guardado más largo y sólo
+# reproduce el resto. Las aristas del prefijo ya están en la cobertura (las
+# sumó el padre) y el estado final, las fallas y el .c8in guardado son los
+# mismos que reproduciéndolo entero. Las instrucciones del informe son sólo
+# las ejecutadas; las del prefijo restaurado se cuentan aparte.
+#
+# Casos repetidos: un tercio de las mutaciones da un caso que el proceso ya
+# corrió (una corrida borrada y vuelta a insertar, recortes a --frames). La
+# reproducción es determinista, así que no puede sumar aristas ni fallas: se
+# descarta sin correrlo (por case_name) y sólo se cuenta.
+#
+# Fallas: StackError (RET con la pila vacía, CALL con la pila llena),
+# IndexError (FX33/FX55/FX65/DXYN fuera de memoria, PC al final de la
+# memoria), UnknownOpcodeError (opcode desconocido o 0NNN) y cualquier otra
+# excepción. Se agrupan por (tipo, PC): se guarda el primer caso de cada una.
+#
+# Directorio compartido (--dir): corpus/ con los casos que sumaron cobertura
+# y crashes/ con las fallas (.c8in + .txt con el mensaje, los quirks y la
+# línea para reproducirla). Cada proceso del pool muta su propio corpus y,
+# cada SYNC_SECONDS, levanta los casos nuevos que guardaron los demás (y los
+# de corridas anteriores, al arrancar) si son de la misma ROM y los mismos
+# quirks.
+# -----------------------------------------------------------------------------
+import argparse, hashlib, os, random, time
+
+import config as cfg
+from chip8_decodificador import decode_table, resolve_quirks
+from chip8_estado import load_state, save_state
+from chip8_grabacion import InputRecorder, load_recording, play_run, rom_hash
+from chip8_jit import Chip8JIT
+from chip8_roms import prepare_rom_file
+
+SYNC_SECONDS = 1.0
+REPETICIONES = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+# -----------------------------------------------------------------------------
+class CoverageJIT(Chip8JIT):
+    """
+    Chip8JIT que junta en 'aristas' las ramas tomadas: (fin del bloque << 12)
+    | PC siguiente, una por bloque ejecutado entero. Las anota el mismo
+    código traducido (chip8_jit.translate_region con aristas=True).
+    """
+    _anotar_aristas = True
+    _interpretar_en_frio = False    # el código interpretado no anota aristas
+
+    def reset(self):
+        super().reset()
+        self.aristas = set()
+
+
+# -----------------------------------------------------------------------------
+# Casos: {"seed", "cycles_per_frame", "corridas": [(repeticiones, máscara,
+# tecla o None)]}, lo mismo que guarda InputRecorder.
+# -----------------------------------------------------------------------------
+def load_case(ruta_archivo):
+    """Caso desde un .c8in (ver chip8_grabacion.load_recording)."""
+    grabacion = load_recording(ruta_archivo)
+    corridas = [(rep, sum(1 << k for k in range(16) if teclas[k]), tecla)
+                for rep, teclas, tecla in grabacion["corridas"]]
+    return {"seed": grabacion["seed"], "cycles_per_frame": grabacion["cycles_per_frame"],
+            "corridas": corridas, "rom_hash": grabacion["rom_hash"],
+            "quirks": grabacion["quirks"]}
+
+
+def save_case(caso, rom, maquina, ruta_archivo):
+    """
+    Escribe el caso como grabación, con los quirks y el hash del estado final
+    de maquina.
+    """
+    grabador = InputRecorder(rom, caso["seed"], caso["cycles_per_frame"], maquina.quirks)
+    for rep, mascara, tecla in caso["corridas"]:
+        grabador.record([bool(mascara >> k & 1) for k in range(16)], tecla, rep)
+    temporal = f"{ruta_archivo}.{os.getpid()}.tmp"
+    grabador.save(temporal, maquina)
+    os.replace(temporal, ruta_archivo)      # los otros procesos nunca ven uno a medias
+
+
+def case_name(caso):
+    """Nombre de archivo estable para un caso (hash de su contenido)."""
+    clave = repr((caso["seed"], caso["cycles_per_frame"], caso["corridas"]))
+    return hashlib.sha1(clave.encode()).hexdigest()[:16] + ".c8in"
+
+
+def run_case(rom, caso, quirks=None, maquina=None, desde=None, instantaneas=None):
+    """
+    Reproduce el caso en una CoverageJIT estricta. Devuelve (máquina, error):
+    error es None o la excepción con la que terminó la ROM. maquina: la
+    CoverageJIT de un caso anterior (con los mismos quirks) para volver a
+    usar: se resetea y se le carga la ROM, la semilla y el cycles_per_frame
+    del caso, sin armarla de nuevo. desde: lo que devuelve find_snapshot,
+    para arrancar del estado guardado de un prefijo del caso. instantaneas:
+    dict donde guardar el estado después de cada corrida.
+    """
+    if maquina is None:
+        m = CoverageJIT(rom, rng_seed=caso["seed"], cycles_per_frame=caso["cycles_per_frame"],
+                        quirks=quirks, strict=True)
+    else:
+        m = maquina
+        m.reset()
+        m.load_rom(rom)
+        m.rng.seed(caso["seed"])
+        m.cycles_per_frame = caso["cycles_per_frame"]
+    corridas, hechas = caso["corridas"], 0
+    if desde is not None:
+        hechas, estado, _ = desde
+        load_state(m, estado)
+    try:
+        for i in range(hechas, len(corridas)):
+            rep, mascara, tecla = corridas[i]
+            play_run(m, rep, [bool(mascara >> k & 1) for k in range(16)], tecla)
+            if instantaneas is not None:
+                instantaneas[_clave_instantanea(caso, i + 1)] = (
+                    save_state(m), m.cycles - m.skipped_cycles)
+    except Exception as e:      # la ROM rompió: es lo que se busca
+        return m, e
+    return m, None
+
+
+def _clave_instantanea(caso, corridas):
+    return caso["seed"], caso["cycles_per_frame"], tuple(caso["corridas"][:corridas])
+
+
+def find_snapshot(caso, instantaneas):
+    """
+    (corridas, estado, instrucciones) del prefijo más largo del caso que
+    tiene un estado guardado en instantaneas (ver run_case), o None.
+    instrucciones: las ejecutadas hasta ese estado.
+    """
+    for k in range(len(caso["corridas"]), 0, -1):
+        guardado = instantaneas.get(_clave_instantanea(caso, k))
+        if guardado is not None:
+            return (k,) + guardado
+    return None
+
+
+def crash_pc(m):
+    """PC de la instrucción que lanzó la excepción (el PC ya avanzó, salvo en el fetch)."""
+    return m.pc if m.pc >= cfg.MEM_SIZE - 1 else (m.pc - 2) & 0x0FFF
+
+
+# -----------------------------------------------------------------------------
+def _corrida_al_azar(rng):
+    mascara = 0
+    for _ in range(rng.choice((0, 1, 1, 2))):
+        mascara |= 1 << rng.randrange(16)
+    if rng.random() < 0.3:
+        tecla = rng.randrange(16)
+        return (rng.choice((1, 1, 2, 4)), mascara | 1 << tecla, tecla)
+    return (rng.choice(REPETICIONES), mascara, None)
+
+
+def mutate(caso, rng, corpus, max_frames):
+    """
+    Caso nuevo a partir de 'caso': entre 1 y 4 mutaciones (semilla, una tecla,
+    una corrida nueva, borrada o más larga/corta, una pulsación para FX0A o
+    el final de otro caso del corpus), recortado a max_frames.
+    """
+    seed, corridas = caso["seed"], list(caso["corridas"])
+    for _ in range(rng.randint(1, 4)):
+        tipo = rng.randrange(7)
+        i = rng.randrange(len(corridas)) if corridas else 0
+        if tipo == 0:
+            seed = rng.randrange(1 << 32)
+        elif tipo == 1 and corridas:
+            rep, mascara, tecla = corridas[i]
+            corridas[i] = (rep, mascara ^ 1 << rng.randrange(16), tecla)
+        elif tipo == 2 or not corridas:
+            corridas.insert(rng.randint(0, len(corridas)), _corrida_al_azar(rng))
+        elif tipo == 3 and len(corridas) > 1:
+            del corridas[i]
+        elif tipo == 4:
+            rep, mascara, tecla = corridas[i]
+            corridas[i] = (max(1, rng.choice((rep * 2, rep // 2, rng.choice(REPETICIONES)))),
+                           mascara, tecla)
+        elif tipo == 5:
+            rep, mascara, _ = corridas[i]
+            tecla = rng.randrange(16)
+            corridas[i:i + 1] = [(1, mascara | 1 << tecla, tecla), (rep, mascara, None)]
+        else:
+            otro = rng.choice(corpus)["corridas"]
+            j = rng.randrange(len(otro)) if otro else 0
+            corridas = corridas[:i] + list(otro[j:])
+
+    recortadas, frames = [], 0
+    for rep, mascara, tecla in corridas:
+        if frames >= max_frames:
+            break
+        rep = min(rep, max_frames - frames)
+        frames += rep
+        recortadas.append((rep, mascara, tecla))
+    return {"seed": seed, "cycles_per_frame": caso["cycles_per_frame"],
+            "corridas": recortadas or [(max_frames, 0, None)]}
+
+
+# -----------------------------------------------------------------------------
+def fuzz_worker(tarea):
+    """
+    Un proceso del pool: muta casos del corpus durante tarea["seconds"] (o
+    tarea["runs"] ejecuciones) y guarda en tarea["dir"] los que suman aristas
+    y los que fallan. Devuelve un informe dict (ejecuciones, casos repetidos
+    descartados, instrucciones ejecutadas y restauradas de instantáneas,
+    segundos, aristas, corpus nuevos y fallas).
+    """
+    rom = prepare_rom_file(tarea["rom"])
+    quirks, max_frames = tarea.get("quirks"), tarea["frames"]
+    rng = random.Random(tarea["seed"])
+    dir_corpus = os.path.join(tarea["dir"], "corpus")
+    dir_fallas = os.path.join(tarea["dir"], "crashes")
+    propio = (rom_hash(rom.rom), resolve_quirks(quirks))
+
+    cobertura, corpus, conocidos, fallas = set(), [], set(), []
+    informe = {"worker": tarea["worker"], "ejecuciones": 0, "repetidos": 0,
+               "instrucciones": 0, "restauradas": 0, "nuevos": 0, "fallas": fallas}
+    maquina = None      # una sola por proceso, reusada en cada caso
+    instantaneas = {}   # de los casos del corpus, ver run_case
+    corridos = set()    # case_name de todo lo que corrió este proceso
+
+    def ejecutar(caso, guardar=False):
+        nonlocal maquina
+        corridos.add(case_name(caso))
+        desde = find_snapshot(caso, instantaneas)
+        m, error = run_case(rom, caso, quirks, maquina, desde,
+                            instantaneas if guardar else None)
+        maquina = m
+        previas = desde[2] if desde is not None else 0
+        informe["ejecuciones"] += 1
+        informe["instrucciones"] += m.cycles - m.skipped_cycles - previas
+        informe["restauradas"] += previas
+        if error is not None:
+            clave = (type(error).__name__, crash_pc(m))
+            if clave not in {(f["tipo"], f["pc"]) for f in fallas}:
+                base = os.path.join(dir_fallas, f"{clave[0]}-{clave[1]:03X}")
+                if not os.path.exists(base + ".c8in"):
+                    save_case(caso, rom.rom, m, base + ".c8in")
+                    activos = [q for q, v in m.quirks.items() if v]
+                    with open(base + ".txt", "w", encoding="utf-8") as f:
+                        f.write(f"{clave[0]}: {error}\n"
+                                f"quirks: {quirks or 'config.py'} "
+                                f"({', '.join(activos) or 'ninguno activo'})\n"
+                                f"python main.py {tarea['rom']} --replay {base}.c8in --strict\n")
+                fallas.append({"tipo": clave[0], "pc": clave[1], "mensaje": str(error),
+                               "archivo": base + ".c8in"})
+        nuevas = not m.aristas <= cobertura
+        cobertura.update(m.aristas)
+        return m, error, nuevas
+
+    def sincronizar():
+        """Casos que guardaron los otros procesos (o corridas anteriores)."""
+        for nombre in sorted(os.listdir(dir_corpus)):
+            if nombre in conocidos or not nombre.endswith(".c8in"):
+                continue
+            conocidos.add(nombre)
+            try:
+                caso = load_case(os.path.join(dir_corpus, nombre))
+            except (OSError, ValueError):
+                continue
+            if (caso.pop("rom_hash"), caso.pop("quirks")) == propio:
+                ejecutar(caso, guardar=True)
+                corpus.append(caso)
+
+    t0 = time.perf_counter()
+    sincronizar()
+    if not corpus:
+        semilla = {"seed": tarea["seed"], "cycles_per_frame": tarea["cycles_per_frame"],
+                   "corridas": [(max_frames, 0, None)]}
+        ejecutar(semilla, guardar=True)
+        corpus.append(semilla)
+
+    proxima_sync = time.perf_counter() + SYNC_SECONDS
+    fin = t0 + tarea["seconds"] if tarea.get("seconds") else None
+    while True:
+        ahora = time.perf_counter()
+        if fin is not None and ahora >= fin:
+            break
+        if (tarea.get("runs") is not None
+                and informe["ejecuciones"] + informe["repetidos"] >= tarea["runs"]):
+            break
+        if ahora >= proxima_sync:
+            sincronizar()
+            proxima_sync = ahora + SYNC_SECONDS
+        caso = mutate(rng.choice(corpus), rng, corpus, max_frames)
+        nombre = case_name(caso)
+        if nombre in corridos:
+            informe["repetidos"] += 1
+            continue
+        m, error, nuevas = ejecutar(caso)
+        if nuevas and error is None:
+            # Otra vez, desde el mismo prefijo, guardando sus instantáneas: no
+            # se sabe de antemano qué casos entran al corpus y guardar las de
+            # todos cuesta más que repetir los pocos que entran.
+            m, _ = run_case(rom, caso, quirks, m, find_snapshot(caso, instantaneas),
+                            instantaneas)
+            conocidos.add(nombre)
+            save_case(caso, rom.rom, m, os.path.join(dir_corpus, nombre))
+            corpus.append(caso)
+            informe["nuevos"] += 1
+
+    informe["segundos"] = time.perf_counter() - t0
+    informe["aristas"] = cobertura
+    return informe
+
+
+def run_fuzz(tarea, jobs=None):
+    """Lanza un fuzz_worker por proceso (semillas distintas); devuelve sus informes."""
+    os.makedirs(os.path.join(tarea["dir"], "corpus"), exist_ok=True)
+    os.makedirs(os.path.join(tarea["dir"], "crashes"), exist_ok=True)
+    procesos = jobs or os.cpu_count() or 1
+    tareas = [dict(tarea, worker=i, seed=tarea["seed"] + i) for i in range(procesos)]
+    if procesos == 1:
+        return [fuzz_worker(tareas[0])]
+    from concurrent.futures import ProcessPoolExecutor
+    decode_table(tarea.get("quirks"), strict=True)    # los procesos del pool la heredan
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(fuzz_worker, tareas))
+
+
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py fuzz",
+                                     description="Fuzzing de la entrada guiado por cobertura")
+    parser.add_argument("rom", help="ROM a fuzzear")
+    parser.add_argument("--dir", help="directorio compartido de corpus y fallas "
+                                      "(por defecto fuzz-<rom>)")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--seconds", type=float, default=60.0,
+                       help="duración por proceso (por defecto 60)")
+    grupo.add_argument("--runs", type=int,
+                       help="casos por proceso, repetidos incluidos (en vez de --seconds)")
+    parser.add_argument("--frames", type=int, default=600,
+                        help="frames por caso como máximo (por defecto 600)")
+    parser.add_argument("--cycles-per-frame", type=int, default=cfg.CYCLES_PER_FRAME,
+                        help=f"instrucciones por frame (por defecto {cfg.CYCLES_PER_FRAME})")
+    parser.add_argument("--quirks", choices=tuple(cfg.QUIRK_PROFILES), metavar="PERFIL")
+    parser.add_argument("--seed", type=int, default=0, help="semilla del primer proceso")
+    parser.add_argument("--jobs", type=int,
+                        help="procesos del pool (por defecto: todos los núcleos)")
+    args = parser.parse_args(argv)
+
+    nombre = os.path.splitext(os.path.basename(args.rom))[0]
+    tarea = {"rom": args.rom, "dir": args.dir or f"fuzz-{nombre}",
+             "seconds": None if args.runs is not None else args.seconds, "runs": args.runs,
+             "frames": args.frames, "cycles_per_frame": args.cycles_per_frame,
+             "quirks": args.quirks, "seed": args.seed}
+    informes = run_fuzz(tarea, args.jobs)
+
+    aristas, fallas = set(), {}
+    for inf in informes:
+        aristas |= inf["aristas"]
+        for f in inf["fallas"]:
+            fallas.setdefault((f["tipo"], f["pc"]), f)
+        dt = inf["segundos"] or 1e-9
+        print(f"proceso {inf['worker']:2}: {inf['ejecuciones']:>7} casos "
+              f"({inf['ejecuciones'] / dt:8.1f}/s)  {inf['instrucciones'] / dt:13,.0f} instr/s "
+              f"(+{inf['restauradas'] / dt:,.0f} restauradas)  {inf['repetidos']:>7} repetidos  "
+              f"{len(inf['aristas']):>6} aristas  {inf['nuevos']:>4} al corpus")
+    for (tipo, pc), f in sorted(fallas.items()):
+        print(f"FALLA {tipo} en 0x{pc:03X}: {f['mensaje']}  ({f['archivo']})")
+    print(f"{len(aristas)} aristas, {len(fallas)} fallas distintas en {tarea['dir']}")
+    return 1 if fallas else 0
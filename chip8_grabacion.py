@@ -0,0 +1,160 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Grabación y reproducción determinista de la entrada
+#
+#   python main.py roms/pong.ch8 --record pong.c8in     (juega y graba)
+#   python main.py roms/pong.ch8 --replay pong.c8in     (reproduce sin ventana)
+#
+# Con la misma ROM, los mismos quirks, la misma semilla de CXNN y el mismo
+# teclado frame a frame
+# la máquina ejecuta exactamente el mismo flujo de instrucciones: sirve para
+# benchmarks comparables y para verificar el hash del estado final.
+#
+# Formato (versión 4, little-endian; en la 3 el hash final es de un save
+# state sin ciclos salteados, la 2 no guardaba los quirks y en la 1 el hash
+# final es de antes de que la memoria incluyera la fuente grande de
+# SUPER-CHIP):
+#   cabecera : _CABECERA (magia b"C8IN", versión, quirks (un bit por quirk en
+#              el orden de chip8_decodificador.QUIRKS), cycles_per_frame,
+#              semilla, frames, SHA-256 de la ROM, SHA-256 del estado final)
+#   cuerpo   : zlib de corridas _CORRIDA (repeticiones, máscara de 16 teclas,
+#              pressed_once con 0xFF = ninguna). El teclado casi nunca cambia
+#              entre frames, así que una partida entera ocupa pocos bytes.
+# -----------------------------------------------------------------------------
+import hashlib, random, struct, zlib
+
+from chip8_decodificador import QUIRKS, resolve_quirks
+from chip8_estado import hash_state
+
+MAGIC = b"C8IN"
+VERSION = 4
+
+_CABECERA = struct.Struct("<4sBBHQI32s32s")
+_CORRIDA = struct.Struct("<IHB")
+
+
+# -----------------------------------------------------------------------------
+def rom_hash(rom):
+    """SHA-256 (bytes) de la ROM (bytes o lista de enteros)."""
+    return hashlib.sha256(bytes(rom)).digest()
+
+
+def new_seed():
+    """Semilla nueva para grabar cuando config.RNG_SEED es None."""
+    return random.SystemRandom().randrange(1 << 32)
+
+
+def _teclas_a_mascara(chip8_keys):
+    return sum(1 << k for k in range(16) if chip8_keys[k])
+
+
+def _quirks_a_bits(quirks):
+    return sum(1 << i for i, q in enumerate(QUIRKS) if quirks[q])
+
+
+# -----------------------------------------------------------------------------
+class InputRecorder:
+    """
+    Acumula el teclado de cada frame (chip8_keys, pressed_once) como corridas
+    de frames idénticos. Uso: record(...) una vez por frame, antes de
+    run_frames(1); save(ruta, maquina) al terminar. quirks: los de la máquina
+    que se graba (lo que acepta chip8_decodificador.resolve_quirks).
+    """
+
+    def __init__(self, rom, seed, cycles_per_frame, quirks=None):
+        self.rom_hash = rom_hash(rom)
+        self.seed = seed
+        self.cycles_per_frame = cycles_per_frame
+        self.quirks = resolve_quirks(quirks)
+        self.frames = 0
+        self._corridas = []          # [repeticiones, máscara, tecla]
+
+    def record(self, chip8_keys, pressed_once, frames=1):
+        """Teclado de los próximos 'frames' frames (el mismo en todos)."""
+        mascara = _teclas_a_mascara(chip8_keys)
+        tecla = 0xFF if pressed_once is None else pressed_once
+        if self._corridas and self._corridas[-1][1:] == [mascara, tecla]:
+            self._corridas[-1][0] += frames
+        else:
+            self._corridas.append([frames, mascara, tecla])
+        self.frames += frames
+
+    def save(self, ruta_archivo, maquina):
+        """Escribe la grabación junto con el hash del estado final de maquina."""
+        cuerpo = b"".join(_CORRIDA.pack(*c) for c in self._corridas)
+        cabecera = _CABECERA.pack(MAGIC, VERSION, _quirks_a_bits(self.quirks),
+                                  self.cycles_per_frame, self.seed, self.frames,
+                                  self.rom_hash, bytes.fromhex(hash_state(maquina)))
+        with open(ruta_archivo, "wb") as f:
+            f.write(cabecera + zlib.compress(cuerpo, 9))
+
+
+# -----------------------------------------------------------------------------
+def load_recording(ruta_archivo):
+    """
+    Lee una grabación. Devuelve un dict con seed, cycles_per_frame, quirks
+    (dict completo), frames, rom_hash, final_hash (hex) y corridas
+    [(repeticiones, teclas, tecla)].
+    Lanza ValueError si el archivo no es una grabación válida.
+    """
+    with open(ruta_archivo, "rb") as f:
+        datos = f.read()
+    if len(datos) < _CABECERA.size:
+        raise ValueError("Grabación truncada")
+    (magia, version, bits, cpf, seed, frames, rom_h, final_h) = _CABECERA.unpack_from(datos)
+    if magia != MAGIC:
+        raise ValueError("No es una grabación de entrada CHIP-8 compatible")
+    if version != VERSION:
+        raise ValueError(f"Grabación de la versión {version}; esta lee la {VERSION} "
+                         "(sin quirks o con otro hash del estado final): hay que volver "
+                         "a grabarla")
+
+    cuerpo = zlib.decompress(datos[_CABECERA.size:])
+    corridas = [(rep, [bool(mascara >> k & 1) for k in range(16)],
+                 None if tecla == 0xFF else tecla)
+                for rep, mascara, tecla in _CORRIDA.iter_unpack(cuerpo)]
+    if sum(c[0] for c in corridas) != frames:
+        raise ValueError("La grabación no coincide con su cantidad de frames")
+    return {"seed": seed, "cycles_per_frame": cpf,
+            "quirks": {q: bool(bits >> i & 1) for i, q in enumerate(QUIRKS)},
+            "frames": frames, "rom_hash": rom_h, "final_hash": final_h.hex(),
+            "corridas": corridas}
+
+
+def recording_quirks(grabacion, quirks=None):
+    """
+    Quirks con los que reproducir la grabación: los que guardó. Con quirks
+    pedidos explícitamente (lo que acepta resolve_quirks) que no coinciden,
+    ValueError: con otros quirks la ROM no repite el mismo flujo.
+    """
+    if quirks is not None and resolve_quirks(quirks) != grabacion["quirks"]:
+        distintos = sorted(k for k, v in resolve_quirks(quirks).items()
+                           if grabacion["quirks"][k] != v)
+        raise ValueError(f"La grabación usa otros quirks ({', '.join(distintos)}); "
+                         "se reproduce sin --quirks")
+    return grabacion["quirks"]
+
+
+# -----------------------------------------------------------------------------
+def replay(maquina, grabacion):
+    """
+    Reproduce la grabación en maquina (creada con su semilla, su
+    cycles_per_frame y sus quirks) tan rápido como se pueda, de a una
+    corrida (play_run). Devuelve el hash del estado final.
+    """
+    for repeticiones, teclas, tecla in grabacion["corridas"]:
+        play_run(maquina, repeticiones, teclas, tecla)
+    return hash_state(maquina)
+
+
+def play_run(maquina, repeticiones, teclas, tecla):
+    """
+    Una corrida de una grabación. Sin tecla nueva se ejecuta con un solo
+    run_frames(); con tecla nueva, frame a frame, igual que el frontend.
+    """
+    if tecla is None:
+        maquina.set_keys(teclas, None)
+        maquina.run_frames(repeticiones)
+    else:
+        for _ in range(repeticiones):
+            maquina.set_keys(teclas, tecla)
+            maquina.run_frames(1)
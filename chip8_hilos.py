@@ -0,0 +1,206 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Emulación en un hilo aparte del render
+#
+#   teclado, buzon = SharedKeys(), FrameMailbox()
+#   hilo = EmulationThread(maquina, teclado, buzon, beeper)
+#   hilo.start()
+#   ...  # hilo principal: eventos → teclado.key_event(), buzon.take() → draw_graphics
+#   hilo.stop(); hilo.join()
+#
+# El hilo de emulación avanza un frame cada 1/TIMER_HZ con plazos absolutos
+# (como el planificador de chip8_servidor) y nunca espera a la ventana: al
+# terminar un frame con filas sucias publica una copia inmutable de gfx (una
+# tupla de filas). Publicar es reasignar una referencia, que bajo el GIL es
+# atómico, así que hace de triple buffer sin locks: la emulación siempre
+# escribe un frame nuevo, el render toma el último completo y los intermedios
+# que no llegó a ver se descartan. Un present lento o el vsync hacen que se
+# vean menos frames, no que la máquina corra más lento.
+#
+# El teclado es un array('B') de 16 teclas que escribe el hilo principal con
+# cada KEYDOWN/KEYUP y que la emulación lee una vez por frame. Las pulsaciones
+# para FX0A van por una deque (append/popleft son atómicos): si llegan varias
+# entre dos frames se entregan de a una por frame, sin perder ninguna.
+# -----------------------------------------------------------------------------
+import threading, time
+from array import array
+from collections import deque
+
+import config as cfg
+
+WAIT_POLL_SECONDS = 0.25        # cada cuánto se revisa terminar/max_cycles en una espera
+
+
+# -----------------------------------------------------------------------------
+class SharedKeys:
+    """
+    Teclado compartido: key_event() desde el hilo de la ventana, read() desde
+    el de emulación. 'despertar' se activa con cada evento (para salir de una
+    espera de FX0A).
+    """
+
+    def __init__(self):
+        self.estado = array("B", bytes(16))
+        self._pulsadas = deque()
+        self.despertar = threading.Event()
+
+    def key_event(self, tecla, presionada):
+        self.estado[tecla] = presionada
+        if presionada:
+            self._pulsadas.append(tecla)
+        self.despertar.set()
+
+    def release_all(self):
+        """Suelta todas las teclas (p. ej. si la ventana pierde el foco)."""
+        self.estado[:] = array("B", bytes(16))
+        self.despertar.set()
+
+    def read(self):
+        """(chip8_keys, pressed_once) para el próximo frame."""
+        try:
+            tecla = self._pulsadas.popleft()
+        except IndexError:
+            tecla = None
+        return [bool(k) for k in self.estado], tecla
+
+
+# -----------------------------------------------------------------------------
+class FrameMailbox:
+    """
+    Último frame completo publicado por la emulación. take() (del lado del
+    render) lo entrega una sola vez junto con la máscara de filas que cambiaron
+    respecto del frame que el render presentó antes.
+    """
+
+    def __init__(self):
+        self._ultimo = None         # (número de frame, tupla de filas)
+        self._visto = None          # el último que tomó el render
+        self.publicados = 0
+        self.tomados = 0
+
+    def publish(self, numero, gfx):
+        self._ultimo = (numero, tuple(gfx))
+        self.publicados += 1
+
+    def take(self):
+        """
+        (gfx, filas sucias) del último frame publicado, o None si no hay uno
+        nuevo. filas es None (redibujar todo) en el primero o si cambió la
+        resolución.
+        """
+        ultimo = self._ultimo
+        if ultimo is self._visto:
+            return None
+        previo, self._visto = self._visto, ultimo
+        self.tomados += 1
+        gfx = ultimo[1]
+        if previo is None or len(previo[1]) != len(gfx):
+            return gfx, None
+        filas = 0
+        for y, (a, b) in enumerate(zip(previo[1], gfx)):
+            if a != b:
+                filas |= 1 << y
+        return gfx, filas
+
+
+# -----------------------------------------------------------------------------
+class EmulationThread(threading.Thread):
+    """
+    Corre la máquina a TIMER_HZ frames por segundo: teclado compartido →
+    run_frames(1) → beep → publicación en el buzón. Con 'grabador' guarda el
+    teclado de cada frame; con max_cycles termina sola. Si la ROM espera una
+    tecla (FX0A o JP a sí misma) y no suena el beep, se bloquea hasta el
+    próximo evento de teclado y pone al día los frames esperados (cada
+    WAIT_POLL_SECONDS, así también termina por stop() o max_cycles);
+    mientras tanto 'esperando' está activo (con el último frame ya
+    publicado), así la ventana también puede dormir hasta un evento.
+    Una excepción de la ROM termina el hilo y queda en 'error'.
+    """
+
+    def __init__(self, maquina, teclado, buzon, beeper, grabador=None, max_cycles=None):
+        super().__init__(name="chip8-emulacion", daemon=True)
+        self.maquina = maquina
+        self.teclado = teclado
+        self.buzon = buzon
+        self.beeper = beeper
+        self.grabador = grabador
+        self.max_cycles = max_cycles
+        self.terminar = threading.Event()
+        self.esperando = threading.Event()
+        self.error = None
+
+    def stop(self):
+        """Pide terminar (también despierta una espera de tecla)."""
+        self.terminar.set()
+        self.teclado.despertar.set()
+
+    def run(self):
+        try:
+            self._bucle()
+        except Exception as e:
+            self.error = e
+
+    # -------------------------------------------------------------------------
+    def _bucle(self):
+        m, teclado, grabador = self.maquina, self.teclado, self.grabador
+        periodo, reloj = 1 / cfg.TIMER_HZ, time.perf_counter
+        self.buzon.publish(m.frames, m.gfx)
+        m.dirty_rows = 0
+        proximo = reloj()
+        while not self.terminar.is_set():
+            teclado.despertar.clear()        # un evento desde acá corta la espera
+            chip8_keys, pressed_once = teclado.read()
+            if grabador is not None:
+                grabador.record(chip8_keys, pressed_once)
+            m.set_keys(chip8_keys, pressed_once)
+            m.run_frames(1)
+            self.beeper.update(m.sound_timer)
+            if m.dirty_rows:
+                self.buzon.publish(m.frames, m.gfx)
+                m.dirty_rows = 0
+            if self._al_limite():
+                break
+
+            if m.waiting_for_key() and not self.beeper.sonando:
+                self._esperar_tecla(chip8_keys)
+                if self._al_limite():
+                    break
+                proximo = reloj()            # el frame siguiente se mide desde acá
+                continue
+            proximo += periodo
+            espera = proximo - reloj()
+            if espera > 0:
+                time.sleep(espera)
+            else:
+                proximo = reloj()            # atrasado: no recupera
+
+    def _al_limite(self):
+        return self.max_cycles is not None and self.maquina.cycles >= self.max_cycles
+
+    def _esperar_tecla(self, chip8_keys):
+        """
+        Bloquea hasta un evento de teclado y adelanta los frames esperados.
+        Se despierta cada WAIT_POLL_SECONDS para ponerlos al día y mirar
+        terminar y max_cycles (sin pasarse del frame que lo alcanza).
+        """
+        m, reloj = self.maquina, time.perf_counter
+        t0, hechos = reloj(), 0
+        self.esperando.set()
+        try:
+            while True:
+                evento = self.teclado.despertar.wait(WAIT_POLL_SECONDS)
+                if self.terminar.is_set():
+                    return
+                esperados = int((reloj() - t0) * cfg.TIMER_HZ) - hechos
+                if self.max_cycles is not None:
+                    faltan = -(-(self.max_cycles - m.cycles) // m.cycles_per_frame)
+                    esperados = min(esperados, faltan)
+                if esperados > 0:
+                    if self.grabador is not None:
+                        self.grabador.record(chip8_keys, None, esperados)
+                    m.set_keys(chip8_keys, None)
+                    m.run_frames(esperados)
+                    hechos += esperados
+                if evento or self._al_limite():
+                    return
+        finally:
+            self.esperando.clear()
@@ -1,311 +1,512 @@
 # -----------------------------------------------------------------------------
-# Importamos las librerias 
+# Importamos las librerias
 # -----------------------------------------------------------------------------
-import random
-import config as cfg 
+import config as cfg
 
 # -----------------------------------------------------------------------------
-def op_00E0(gfx):
+# Todas las instrucciones tienen la misma firma (m, x, y, arg) y modifican la
+# máquina m en el lugar: la tabla de decodificación las enlaza directamente,
+# sin adaptadores ni tuplas de estado que desarmar en cada instrucción.
+#   x, y : registros ya extraídos del opcode
+#   arg  : n, kk o nnn según la instrucción
+# Cuando corren, m.pc ya apunta a la instrucción siguiente (los skips suman 2).
+# Las variantes de quirks son funciones aparte (op_8XY6 / op_8XY6_vy, ...):
+# el quirk se elige al armar la tabla, no en cada instrucción.
+#
+# SUPER-CHIP: m.gfx tiene SCREEN_H filas de SCREEN_W bits (baja resolución)
+# o HIRES_H filas de HIRES_W bits (00FF); el ancho sale de la cantidad de
+# filas (ver screen_width). Los scrolls mueven filas enteras de la lista o
+# desplazan cada fila como entero, nunca píxel por píxel.
+# -----------------------------------------------------------------------------
+class StackError(RuntimeError):
+    """CALL con la pila llena (STACK_DEPTH niveles) o RET con la pila vacía."""
+
+
+class UnknownOpcodeError(RuntimeError):
+    """Opcode desconocido o 0NNN con una tabla estricta (ver op_unknown)."""
+
+
+# -----------------------------------------------------------------------------
+def screen_width(gfx):
+    """Ancho en píxeles de un framebuffer: 64 con 32 filas, 128 con 64."""
+    return cfg.SCREEN_W * len(gfx) // cfg.SCREEN_H
+
+
+# -----------------------------------------------------------------------------
+def op_nop(m, x, y, arg):
+    """Opcode desconocido / 0NNN (SYS): se ignora."""
+
+
+def op_unknown(m, x, y, arg):
     """
-    CLS: Clear screen.
+    Opcode desconocido / 0NNN en una tabla estricta (decode_table(strict=True)):
+    lanza UnknownOpcodeError. El PC ya apunta a la instrucción siguiente.
     """
-    gfx = [[0 for _ in range(64)] for _ in range(32)]
-    return gfx
+    pc = (m.pc - 2) & 0x0FFF
+    opcode = (m.memory[pc] << 8) | m.memory[pc + 1]
+    raise UnknownOpcodeError(f"Opcode desconocido {opcode:04X} en 0x{pc:03X}")
 
 
 # -----------------------------------------------------------------------------
-def op_1NNN(pc, nnn):
+def op_00E0(m, x, y, arg):
+    """
+    CLS: Clear screen. Pone en cero las filas del framebuffer en el lugar
+    (sin crear una lista nueva).
+    """
+    gfx = m.gfx
+    for fila in range(len(gfx)):
+        gfx[fila] = 0
+    m.dirty_rows = (1 << len(gfx)) - 1
+
+
+# -----------------------------------------------------------------------------
+# SUPER-CHIP: pantalla
+# -----------------------------------------------------------------------------
+def op_00CN(m, x, y, n):
+    """SCD n: baja la pantalla n filas (de la resolución actual)."""
+    gfx = m.gfx
+    if n:
+        gfx[:0] = [0] * n
+        del gfx[-n:]
+        m.dirty_rows = (1 << len(gfx)) - 1
+
+def op_00FB(m, x, y, arg):
+    """SCR: corre la pantalla 4 píxeles a la derecha (un shift por fila)."""
+    gfx = m.gfx
+    gfx[:] = [fila >> 4 for fila in gfx]
+    m.dirty_rows = (1 << len(gfx)) - 1
+
+def op_00FC(m, x, y, arg):
+    """SCL: corre la pantalla 4 píxeles a la izquierda (un shift por fila)."""
+    gfx = m.gfx
+    mascara = (1 << screen_width(gfx)) - 1
+    gfx[:] = [(fila << 4) & mascara for fila in gfx]
+    m.dirty_rows = (1 << len(gfx)) - 1
+
+def op_00FD(m, x, y, arg):
+    """EXIT: la ROM termina; el PC queda en 00FD (como un JP a sí mismo)."""
+    m.pc -= 2
+
+def _resolucion(m, alto):
+    """Cambia la cantidad de filas de gfx (en el lugar) y la deja en blanco."""
+    m.gfx[:] = [0] * alto
+    m.dirty_rows = (1 << alto) - 1
+
+def op_00FE(m, x, y, arg):
+    """LOW: baja resolución (SCREEN_W x SCREEN_H), pantalla en blanco."""
+    _resolucion(m, cfg.SCREEN_H)
+
+def op_00FF(m, x, y, arg):
+    """HIGH: alta resolución (HIRES_W x HIRES_H), pantalla en blanco."""
+    _resolucion(m, cfg.HIRES_H)
+
+
+# -----------------------------------------------------------------------------
+def op_1NNN(m, x, y, nnn):
     """
     JP addr: Salta a la dirección nnn.
     """
-    pc = nnn
-    return pc
+    m.pc = nnn
 
 
 # -----------------------------------------------------------------------------
-def op_6XNN(v_reg, x, kk):
+def op_6XNN(m, x, y, kk):
     """
     LD Vx, byte: Vx = kk
     """
-    v_reg[x] = kk
-    return v_reg
+    m.v_reg[x] = kk
 
 
 # -----------------------------------------------------------------------------
-def op_7XNN(v_reg, x, kk):
+def op_7XNN(m, x, y, kk):
     """
     ADD Vx, byte: Vx += kk (sin carry)
     """
+    v_reg = m.v_reg
     v_reg[x] = (v_reg[x] + kk) & 0xFF
-    return v_reg
 
 
 # -----------------------------------------------------------------------------
-def op_ANNN(index, nnn):
+def op_ANNN(m, x, y, nnn):
     """
     LD I, addr: I = nnn
     """
-    index = nnn
-    return index
+    m.index = nnn
 
 
 # -----------------------------------------------------------------------------
-def op_2NNN(pc, nnn, stack):
+def op_2NNN(m, x, y, nnn):
     """
     CALL addr: Llama a la subrutina en nnn.
-    Empuja el PC actual a la pila y salta a nnn.
+    Empuja el PC actual (la dirección de retorno) a la pila y salta a nnn.
+    La pila es fija de STACK_DEPTH niveles: uno más es StackError.
     """
-    stack.append(pc)  # Guarda la dirección de retorno
-    pc = nnn
-    return pc, stack
+    sp = m.sp
+    if sp >= cfg.STACK_DEPTH:
+        raise StackError(f"CALL (2NNN) con la pila llena ({cfg.STACK_DEPTH} niveles)")
+    m.stack[sp] = m.pc
+    m.sp = sp + 1
+    m.pc = nnn
 
 
 # -----------------------------------------------------------------------------
-def op_00EE(stack):
+def op_00EE(m, x, y, arg):
     """
     RET: Vuelve de una subrutina.
     Extrae de la pila la última dirección y salta a ella.
     """
-    if stack:
-        pc = stack.pop()
-    else:
-        raise RuntimeError("RET (00EE) llamado con la pila vacía")
-    return pc, stack
+    sp = m.sp
+    if not sp:
+        raise StackError("RET (00EE) llamado con la pila vacía")
+    m.sp = sp - 1
+    m.pc = m.stack[sp - 1]
 
 # -----------------------------------------------------------------------------
-def op_3XNN(pc, v_reg, x, kk):
+def op_3XNN(m, x, y, kk):
     """
     SE Vx, byte: Salta la siguiente instrucción si Vx == kk.
     """
-    if v_reg[x] == kk:
-        pc += 2
-    return pc
+    if m.v_reg[x] == kk:
+        m.pc += 2
 
 # -----------------------------------------------------------------------------
-def op_4XNN(pc, v_reg, x, kk):
+def op_4XNN(m, x, y, kk):
     """
     SNE Vx, byte: Salta la siguiente instrucción si Vx != kk.
     """
-    if v_reg[x] != kk:
-        pc += 2
-    return pc
+    if m.v_reg[x] != kk:
+        m.pc += 2
 
 
 # -----------------------------------------------------------------------------
-def op_5XY0(pc, v_reg, x, y):
+def op_5XY0(m, x, y, n):
     """
     SE Vx, Vy: Salta la siguiente instrucción si Vx == Vy.
     (Solo si el último nibble es 0, de ahí el '0' en 5XY0)
     """
-    if v_reg[x] == v_reg[y]:
-        pc += 2
-    return pc
+    if m.v_reg[x] == m.v_reg[y]:
+        m.pc += 2
 
 
 # -----------------------------------------------------------------------------
-def op_9XY0(pc, v_reg, x, y):
+def op_9XY0(m, x, y, n):
     """
     SNE Vx, Vy: Salta la siguiente instrucción si Vx != Vy.
     (Solo si el último nibble es 0, de ahí el '0' en 9XY0)
     """
-    if v_reg[x] != v_reg[y]:
-        pc += 2
-    return pc
+    if m.v_reg[x] != m.v_reg[y]:
+        m.pc += 2
 
 # -----------------------------------------------------------------------------
-def op_8XY0(v_reg, x, y):
+def op_8XY0(m, x, y, n):
     """LD Vx, Vy"""
-    v_reg[x] = v_reg[y]
-    return v_reg
+    m.v_reg[x] = m.v_reg[y]
 
 # -----------------------------------------------------------------------------
-def op_8XY1(v_reg, x, y):
+def op_8XY1(m, x, y, n):
     """OR Vx, Vy"""
+    m.v_reg[x] |= m.v_reg[y]
+
+def op_8XY1_vf(m, x, y, n):
+    """OR Vx, Vy con QUIRK_LOGIC_RESETS_VF: además VF = 0"""
+    v_reg = m.v_reg
     v_reg[x] |= v_reg[y]
-    return v_reg
+    v_reg[0xF] = 0
 
 # -----------------------------------------------------------------------------
-def op_8XY2(v_reg, x, y):
+def op_8XY2(m, x, y, n):
     """AND Vx, Vy"""
+    m.v_reg[x] &= m.v_reg[y]
+
+def op_8XY2_vf(m, x, y, n):
+    """AND Vx, Vy con QUIRK_LOGIC_RESETS_VF: además VF = 0"""
+    v_reg = m.v_reg
     v_reg[x] &= v_reg[y]
-    return v_reg
+    v_reg[0xF] = 0
 
 # -----------------------------------------------------------------------------
-def op_8XY3(v_reg, x, y):
+def op_8XY3(m, x, y, n):
     """XOR Vx, Vy"""
+    m.v_reg[x] ^= m.v_reg[y]
+
+def op_8XY3_vf(m, x, y, n):
+    """XOR Vx, Vy con QUIRK_LOGIC_RESETS_VF: además VF = 0"""
+    v_reg = m.v_reg
     v_reg[x] ^= v_reg[y]
-    return v_reg
+    v_reg[0xF] = 0
 
 # -----------------------------------------------------------------------------
-def op_8XY4(v_reg, x, y):
+def op_8XY4(m, x, y, n):
     """ADD Vx, Vy con carry"""
+    v_reg = m.v_reg
     total = v_reg[x] + v_reg[y]
     v_reg[0xF] = 1 if total > 0xFF else 0
     v_reg[x] = total & 0xFF
-    return v_reg
 
 # -----------------------------------------------------------------------------
-def op_8XY5(v_reg, x, y):
+def op_8XY5(m, x, y, n):
     """SUB Vx, Vy (Vx = Vx - Vy) con borrow"""
     # 8XY5: Vx = Vx - Vy ; VF = 1 si Vx >= Vy, si no 0
+    v_reg = m.v_reg
     v_reg[0xF] = 1 if v_reg[x] >= v_reg[y] else 0
     v_reg[x] = (v_reg[x] - v_reg[y]) & 0xFF
-    return v_reg
 
 # -----------------------------------------------------------------------------
-def op_8XY6(v_reg, x, y, quirk=cfg.QUIRK_SHIFT_USES_VY):
+def op_8XY6(m, x, y, n):
     """SHR Vx >> 1"""
-    if quirk:
-        v_reg[0xF] = v_reg[y] & 0x1
-        v_reg[x]   = (v_reg[y] >> 1) & 0xFF
-    else:
-        v_reg[0xF] = v_reg[x] & 0x1
-        v_reg[x] >>= 1
-    return v_reg
+    v_reg = m.v_reg
+    v_reg[0xF] = v_reg[x] & 0x1
+    v_reg[x] >>= 1
+
+def op_8XY6_vy(m, x, y, n):
+    """SHR con QUIRK_SHIFT_USES_VY: Vx = Vy >> 1"""
+    v_reg = m.v_reg
+    v_reg[0xF] = v_reg[y] & 0x1
+    v_reg[x]   = (v_reg[y] >> 1) & 0xFF
 
 # -----------------------------------------------------------------------------
-def op_8XY7(v_reg, x, y):
+def op_8XY7(m, x, y, n):
     """SUBN Vx, Vy (Vx = Vy - Vx) con borrow"""
     # 8XY7: Vx = Vy - Vx ; VF = 1 si Vy >= Vx, si no 0
+    v_reg = m.v_reg
     v_reg[0xF] = 1 if v_reg[y] >= v_reg[x] else 0
-    v_reg[x] = (v_reg[y] - v_reg[x]) & 0xFF# 
-    return v_reg
+    v_reg[x] = (v_reg[y] - v_reg[x]) & 0xFF
 
 # -----------------------------------------------------------------------------
-def op_8XYE(v_reg, x, y, quirk=cfg.QUIRK_SHIFT_USES_VY):
-    if quirk:
-        v_reg[0xF] = (v_reg[y] & 0x80) >> 7
-        v_reg[x]   = (v_reg[y] << 1) & 0xFF
-    else:
-        v_reg[0xF] = (v_reg[x] & 0x80) >> 7
-        v_reg[x]   = (v_reg[x] << 1) & 0xFF
-    return v_reg
+def op_8XYE(m, x, y, n):
+    """SHL Vx << 1"""
+    v_reg = m.v_reg
+    v_reg[0xF] = (v_reg[x] & 0x80) >> 7
+    v_reg[x]   = (v_reg[x] << 1) & 0xFF
+
+def op_8XYE_vy(m, x, y, n):
+    """SHL con QUIRK_SHIFT_USES_VY: Vx = Vy << 1"""
+    v_reg = m.v_reg
+    v_reg[0xF] = (v_reg[y] & 0x80) >> 7
+    v_reg[x]   = (v_reg[y] << 1) & 0xFF
 
 # -----------------------------------------------------------------------------
-def op_BNNN(pc, v_reg, nnn):
+def op_BNNN(m, x, y, nnn):
     """
     JP V0, addr: PC = nnn + V0
     """
-    return (nnn + (v_reg[0] & 0xFF)) & 0x0FFF
+    m.pc = (nnn + (m.v_reg[0] & 0xFF)) & 0x0FFF
+
+def op_BXNN(m, x, y, nnn):
+    """
+    JP VX, addr con QUIRK_JUMP_USES_VX (CHIP-48/SUPER-CHIP): PC = XNN + VX
+    """
+    m.pc = (nnn + m.v_reg[x]) & 0x0FFF
 
 # -----------------------------------------------------------------------------
-def op_CXNN(v_reg, x, kk, rng=random):
+def op_CXNN(m, x, y, kk):
     """
     RND Vx, byte: Vx = (random_byte & kk)
-    rng debe exponer .randint(0, 255); por defecto, 'random' estándar de Python.
+    m.rng debe exponer .randint(0, 255) (un random.Random por máquina).
     """
-    v_reg[x] = rng.randint(0, 255) & kk
-    return v_reg
+    m.v_reg[x] = m.rng.randint(0, 255) & kk
 
 # -----------------------------------------------------------------------------
-def op_DXYN(gfx, v_reg, x, y, n, memory, index):
+def _dibujar(m, x, y, n, wrap):
     """
     DRW Vx, Vy, nibble: XOR de un sprite de 8xn en (Vx, Vy).
-    - Wrap-around en bordes.
+
+    gfx es una lista de filas; cada fila es un entero de 'ancho' bits (64 o
+    128) con el píxel x=0 en el bit más alto. Cada fila del sprite se
+    desplaza a su posición y se aplica con un único XOR; la colisión es un
+    único AND.
+    - La posición inicial siempre envuelve (Vx % ancho, Vy % alto).
+    - wrap=True: lo que se sale por los bordes reaparece del otro lado;
+      wrap=False: se recorta.
     - VF = 1 si hubo colisión (algún bit pasó de 1->0).
+    - Marca en m.dirty_rows las filas tocadas.
     """
-    vx = v_reg[x] & 0xFF
-    vy = v_reg[y] & 0xFF
-    v_reg[0xF] = 0  # VF por defecto
+    gfx, v_reg, memory, index = m.gfx, m.v_reg, m.memory, m.index
+    alto = len(gfx)
+    ancho = cfg.SCREEN_W * alto // cfg.SCREEN_H
+    mascara = (1 << ancho) - 1
+    vx = v_reg[x] % ancho
+    vy = v_reg[y] % alto
+    colision = 0
+
+    # Filas tocadas: n bits a partir de Vy (antes de que DXYN pise VF), con wrap
+    filas = ((1 << n) - 1) << vy
+    m.dirty_rows |= (filas | (filas >> alto)) & ((1 << alto) - 1)
 
     for row in range(n):
+        py = vy + row
+        if py >= alto:
+            if not wrap:
+                break
+            py -= alto
         sprite_byte = memory[(index + row) & 0x0FFF]
-        py = (vy + row) % 32
-        for col in range(8):
-            if (sprite_byte & (0x80 >> col)) != 0:
-                px = (vx + col) % 64
-                if gfx[py][px] == 1:
-                    v_reg[0xF] = 1
-                gfx[py][px] ^= 1
-    return gfx, v_reg
+        bits = (sprite_byte << (ancho - 8)) >> vx
+        if wrap:
+            bits |= (sprite_byte << (2 * ancho - 8 - vx)) & mascara
+        if gfx[py] & bits:
+            colision = 1
+        gfx[py] ^= bits
+
+    v_reg[0xF] = colision
+
+def _dibujar_16(m, x, y, wrap):
+    """
+    DRW Vx, Vy, 0 (SUPER-CHIP): como _dibujar, con un sprite de 16x16
+    (32 bytes desde I, dos por fila).
+    """
+    gfx, v_reg, memory, index = m.gfx, m.v_reg, m.memory, m.index
+    alto = len(gfx)
+    ancho = cfg.SCREEN_W * alto // cfg.SCREEN_H
+    mascara = (1 << ancho) - 1
+    vx = v_reg[x] % ancho
+    vy = v_reg[y] % alto
+    colision = 0
+
+    filas = 0xFFFF << vy
+    m.dirty_rows |= (filas | (filas >> alto)) & ((1 << alto) - 1)
+
+    for row in range(16):
+        py = vy + row
+        if py >= alto:
+            if not wrap:
+                break
+            py -= alto
+        sprite = (memory[(index + 2 * row) & 0x0FFF] << 8) | memory[(index + 2 * row + 1) & 0x0FFF]
+        bits = (sprite << (ancho - 16)) >> vx
+        if wrap:
+            bits |= (sprite << (2 * ancho - 16 - vx)) & mascara
+        if gfx[py] & bits:
+            colision = 1
+        gfx[py] ^= bits
+
+    v_reg[0xF] = colision
+
+def op_DXYN(m, x, y, n):
+    """DRW Vx, Vy, nibble con DXYN_WRAP=False (el sprite se recorta en los bordes)."""
+    _dibujar(m, x, y, n, False)
+
+def op_DXYN_wrap(m, x, y, n):
+    """DRW Vx, Vy, nibble con DXYN_WRAP=True (el sprite envuelve)."""
+    _dibujar(m, x, y, n, True)
+
+def op_DXY0(m, x, y, n):
+    """DRW Vx, Vy, 0: sprite de 16x16 que se recorta en los bordes."""
+    _dibujar_16(m, x, y, False)
+
+def op_DXY0_wrap(m, x, y, n):
+    """DRW Vx, Vy, 0: sprite de 16x16 con DXYN_WRAP=True (envuelve)."""
+    _dibujar_16(m, x, y, True)
 
 
 # -----------------------------------------------------------------------------
-# E: Teclado 
+# E: Teclado
 # -----------------------------------------------------------------------------
-def op_EX9E(pc, v_reg, x, chip8_keys):
+def op_EX9E(m, x, y, kk):
     """SKP Vx: salta si la tecla Vx está presionada."""
-    if chip8_keys[v_reg[x] & 0xF]:
-        pc += 2
-    return pc
+    if m.keys[m.v_reg[x] & 0xF]:
+        m.pc += 2
 
 # -----------------------------------------------------------------------------
-def op_EXA1(pc, v_reg, x, chip8_keys):
+def op_EXA1(m, x, y, kk):
     """SKNP Vx: salta si la tecla Vx NO está presionada."""
-    if not chip8_keys[v_reg[x] & 0xF]:
-        pc += 2
-    return pc
+    if not m.keys[m.v_reg[x] & 0xF]:
+        m.pc += 2
 
 # -----------------------------------------------------------------------------
-def op_FX0A(v_reg, x, pressed_once):
+def op_FX0A(m, x, y, kk):
     """
     LD Vx, K: espera una tecla y la guarda en Vx.
-    Devuelve (v_reg, waiting) donde waiting=True si no hubo tecla (repetir opcode).
+    Sin tecla el PC vuelve a FX0A (se repite); la tecla se consume una sola vez.
     """
-    if pressed_once is None:
-        return v_reg, True
-    v_reg[x] = pressed_once & 0xF
-    return v_reg, False
+    if m.pressed_once is None:
+        m.pc -= 2
+    else:
+        m.v_reg[x] = m.pressed_once & 0xF
+        m.pressed_once = None
 
 # -----------------------------------------------------------------------------
 # F: Timers
 # -----------------------------------------------------------------------------
-def op_FX07(v_reg, x, delay_timer):
+def op_FX07(m, x, y, kk):
     """LD Vx, DT"""
-    v_reg[x] = delay_timer & 0xFF
-    return v_reg
+    m.v_reg[x] = m.delay_timer & 0xFF
 
 # -----------------------------------------------------------------------------
-def op_FX15(delay_timer, v_reg, x):
+def op_FX15(m, x, y, kk):
     """LD DT, Vx"""
-    return v_reg[x] & 0xFF
+    m.delay_timer = m.v_reg[x] & 0xFF
 
 # -----------------------------------------------------------------------------
-def op_FX18(sound_timer, v_reg, x):
+def op_FX18(m, x, y, kk):
     """LD ST, Vx"""
-    return v_reg[x] & 0xFF
+    m.sound_timer = m.v_reg[x] & 0xFF
 
 # -----------------------------------------------------------------------------
 # F: Índice/Memoria/Fuente
 # -----------------------------------------------------------------------------
-def op_FX1E(index, v_reg, x):
-    """
-    ADD I, Vx. Ajuste compatible: VF=1 si overflowea 0xFFF.
-    """
-    res = index + v_reg[x]
-    vf = 1 if res > 0x0FFF else 0
-    index = res & 0x0FFF
-    return index, vf
+def op_FX1E(m, x, y, kk):
+    """ADD I, Vx"""
+    m.index = (m.index + m.v_reg[x]) & 0x0FFF
+
+def op_FX1E_vf(m, x, y, kk):
+    """ADD I, Vx con QUIRK_ADDI_SETS_VF: VF=1 si overflowea 0xFFF."""
+    res = m.index + m.v_reg[x]
+    m.index = res & 0x0FFF
+    m.v_reg[0xF] = 1 if res > 0x0FFF else 0
 
 # -----------------------------------------------------------------------------
-def op_FX29(index, v_reg, x, FONT_DIR=0x50):
+def op_FX29(m, x, y, kk):
     """LD F, Vx: I = FONT_DIR + (Vx*5)"""
-    return (FONT_DIR + (v_reg[x] & 0xF) * 5) & 0x0FFF
+    m.index = (cfg.FONT_DIR + (m.v_reg[x] & 0xF) * 5) & 0x0FFF
+
+def op_FX30(m, x, y, kk):
+    """LD HF, Vx (SUPER-CHIP): I = BIG_FONT_DIR + (Vx*10), dígito grande"""
+    m.index = (cfg.BIG_FONT_DIR + (m.v_reg[x] & 0xF) * 10) & 0x0FFF
 
 # -----------------------------------------------------------------------------
-def op_FX33(memory, index, v_reg, x):
+def op_FX33(m, x, y, kk):
     """LD B, Vx: BCD de Vx en memory[I..I+2]"""
-    val = v_reg[x] & 0xFF
+    memory, index = m.memory, m.index
+    val = m.v_reg[x] & 0xFF
     memory[index]     =  val // 100
     memory[index + 1] = (val // 10) % 10
     memory[index + 2] =  val % 10
-    return memory
 
 # -----------------------------------------------------------------------------
-def op_FX55(memory, index, v_reg, x, increment_I=True):
-    """LD [I], V0..Vx"""
-    for i in range(x + 1):
-        memory[index + i] = v_reg[i] & 0xFF
-    if increment_I:
-        index = (index + x + 1) & 0x0FFF
-    return memory, index
+def op_FX55(m, x, y, kk):
+    """LD [I], V0..Vx (I no cambia)"""
+    memory, index = m.memory, m.index
+    if index + x + 1 <= len(memory):
+        memory[index:index + x + 1] = m.v_reg[:x + 1]
+    else:
+        # Se sale de memoria: escribe hasta el final y lanza IndexError
+        for i in range(x + 1):
+            memory[index + i] = m.v_reg[i]
+
+def op_FX55_inc(m, x, y, kk):
+    """LD [I], V0..Vx con FX_BULK_INC_I: I += x + 1"""
+    op_FX55(m, x, y, kk)
+    m.index = (m.index + x + 1) & 0x0FFF
 
 # -----------------------------------------------------------------------------
-def op_FX65(memory, index, v_reg, x, increment_I=True):
-    """LD V0..Vx, [I]"""
+def op_FX65(m, x, y, kk):
+    """LD V0..Vx, [I] (I no cambia)"""
+    v_reg, memory, index = m.v_reg, m.memory, m.index
     for i in range(x + 1):
-        v_reg[i] = memory[index + i] & 0xFF
-    if increment_I:
-        index = (index + x + 1) & 0x0FFF
-    return v_reg, index
+        v_reg[i] = memory[index + i]
+
+def op_FX65_inc(m, x, y, kk):
+    """LD V0..Vx, [I] con FX_BULK_INC_I: I += x + 1"""
+    op_FX65(m, x, y, kk)
+    m.index = (m.index + x + 1) & 0x0FFF
+
+# -----------------------------------------------------------------------------
+# SUPER-CHIP: flags RPL (16 bytes fuera de la memoria, m.flags)
+# -----------------------------------------------------------------------------
+def op_FX75(m, x, y, kk):
+    """LD R, Vx: flags[0..x] = V0..Vx"""
+    m.flags[:x + 1] = m.v_reg[:x + 1]
 
+def op_FX85(m, x, y, kk):
+    """LD Vx, R: V0..Vx = flags[0..x]"""
+    m.v_reg[:x + 1] = m.flags[:x + 1]
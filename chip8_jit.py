@@ -0,0 +1,941 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Caché de traducción por bloques básicos (JIT a Python)
+#
+# Un bloque es una corrida de opcodes en línea recta que empieza en una
+# dirección y termina en el primer salto, skip, llamada, retorno, DXYN, FX0A,
+# 00FD o escritura a memoria (FX33/FX55). Cada bloque se traduce UNA vez a una
+# función Python generada con compile()/exec y se guarda en una caché cuya
+# clave es la dirección de inicio. Las instrucciones simples se escriben
+# "en línea" (v[x] = ...); las complejas llaman al mismo handler de la tabla
+# de decodificación, así la semántica es siempre la de chip8_instrucciones.
+#
+# Regiones: los bloques alcanzables desde uno por saltos, skips y CALL van
+# juntos en una sola función, que salta entre ellos con el PC en una local y
+# arma como while de Python los ciclos cortos (bucles de espera, recorridos
+# de teclas). Chip8JIT.run_frames le pasa frames enteros: la región hace el
+# tick de timers en línea cada cycles_per_frame instrucciones y sólo vuelve
+# al salir de sus bloques, al agotar el presupuesto o donde puede empezar
+# una espera.
+#
+# Código automodificable: FX33/FX55 invalidan los bloques que cubren las
+# direcciones escritas, así la próxima vez se vuelven a traducir.
+#
+# Código frío: la primera vez que una máquina pide una entrada (región o
+# prefijo) la corre con el intérprete y sólo la traduce (o la toma de la
+# caché compartida) si la vuelve a pedir. Traducir cuesta mucho más que
+# interpretar unas pocas instrucciones, y el código que corre una sola vez
+# (inicialización, ROMs aleatorias con bloques largos que cada frame corto
+# retoma más adelante) nunca paga el compile(). Que una entrada esté fría
+# depende sólo de esa máquina, no de lo que otras dejaron en la caché: así
+# la misma corrida da los mismos skipped_cycles en un proceso nuevo o en
+# uno que ya corrió la ROM (el pool de chip8_lotes hace fork).
+# -----------------------------------------------------------------------------
+import re
+
+import config as cfg
+from chip8_instrucciones import op_DXYN, op_DXYN_wrap
+from chip8_maquina import Chip8
+
+MAX_BLOCK_LEN = 128     # instrucciones por bloque como máximo
+MAX_REGION_BLOCKS = 64  # bloques por región como máximo
+MAX_LOOP_BLOCKS = 8     # bloques por ciclo compilado como while (ver _bucle)
+MAX_VARIANTS = 256      # regiones por contenido guardadas por ROM y configuración
+
+
+# -----------------------------------------------------------------------------
+# Plantillas de código en línea: (x, y, arg) → líneas Python.
+# 'v' es m.v_reg y 'mem' es m.memory dentro de la función generada.
+# Reproducen el mismo orden de operaciones que chip8_instrucciones.py
+# (importa cuando x o y es VF).
+# -----------------------------------------------------------------------------
+def _inline(op, n, kk, x, y, arg, quirks):
+    """Devuelve la lista de líneas para un opcode no terminal, o None."""
+    if op == 0x6:
+        return [f"v[{x}] = {kk}"]
+    if op == 0x7:
+        return [f"v[{x}] = (v[{x}] + {kk}) & 0xFF"]
+    if op == 0xA:
+        return [f"m.index = {arg}"]
+    if op == 0xC:
+        return [f"v[{x}] = rnd(0, 255) & {kk}"]
+    if op == 0x8:
+        if n == 0x0: return [f"v[{x}] = v[{y}]"]
+        if n in (0x1, 0x2, 0x3):
+            lineas = [f"v[{x}] {'|&^'[n - 1]}= v[{y}]"]
+            if quirks["logic_resets_vf"]:
+                lineas.append("v[15] = 0")
+            return lineas
+        if n == 0x4: return [f"t = v[{x}] + v[{y}]",
+                             "v[15] = 1 if t > 0xFF else 0",
+                             f"v[{x}] = t & 0xFF"]
+        if n == 0x5: return [f"v[15] = 1 if v[{x}] >= v[{y}] else 0",
+                             f"v[{x}] = (v[{x}] - v[{y}]) & 0xFF"]
+        if n == 0x7: return [f"v[15] = 1 if v[{y}] >= v[{x}] else 0",
+                             f"v[{x}] = (v[{y}] - v[{x}]) & 0xFF"]
+        src = y if quirks["shift_uses_vy"] else x
+        if n == 0x6: return [f"v[15] = v[{src}] & 0x1",
+                             f"v[{x}] = (v[{src}] >> 1) & 0xFF"]
+        if n == 0xE: return [f"v[15] = (v[{src}] & 0x80) >> 7",
+                             f"v[{x}] = (v[{src}] << 1) & 0xFF"]
+        return None
+    if op == 0xF:
+        if kk == 0x07: return [f"v[{x}] = m.delay_timer & 0xFF"]
+        if kk == 0x15: return [f"m.delay_timer = v[{x}] & 0xFF"]
+        if kk == 0x18: return [f"m.sound_timer = v[{x}] & 0xFF"]
+        if kk == 0x29: return [f"m.index = ({cfg.FONT_DIR} + (v[{x}] & 0xF) * 5) & 0x0FFF"]
+        if kk == 0x30: return [f"m.index = ({cfg.BIG_FONT_DIR} + (v[{x}] & 0xF) * 10) & 0x0FFF"]
+        if kk == 0x1E:
+            lineas = [f"t = m.index + v[{x}]", "m.index = t & 0x0FFF"]
+            if quirks["addi_sets_vf"]:
+                lineas.append("v[15] = 1 if t > 0x0FFF else 0")
+            return lineas
+        if kk == 0x65:
+            lineas = ["t = m.index"]
+            lineas += [f"v[{i}] = mem[t + {i}]" for i in range(x + 1)]
+            if quirks["bulk_inc_i"]:
+                lineas.append(f"m.index = (t + {x + 1}) & 0x0FFF")
+            return lineas
+    return None
+
+
+def _terminal(op, n, kk, x, y, arg, addr, h, quirks):
+    """
+    Líneas en línea para terminadores frecuentes (saltos/skips), o None.
+    'h' es el nombre del handler de la tabla dentro de la función generada.
+    """
+    sig, salto = addr + 2, addr + 4
+    if op == 0x1:
+        return [f"m.pc = {arg}"]
+    if op == 0x2:
+        # Con la pila llena, el handler lanza StackError con el PC como el intérprete
+        return ["sp = m.sp",
+                f"if sp >= {cfg.STACK_DEPTH}:",
+                f"    m.pc = {sig}",
+                f"    {h}(m, {x}, {y}, {arg})",
+                f"m.stack[sp] = {sig}",
+                "m.sp = sp + 1",
+                f"m.pc = {arg}"]
+    if op == 0x3:
+        return [f"m.pc = {salto} if v[{x}] == {kk} else {sig}"]
+    if op == 0x4:
+        return [f"m.pc = {salto} if v[{x}] != {kk} else {sig}"]
+    if op == 0x5 and n == 0:
+        return [f"m.pc = {salto} if v[{x}] == v[{y}] else {sig}"]
+    if op == 0x9 and n == 0:
+        return [f"m.pc = {salto} if v[{x}] != v[{y}] else {sig}"]
+    if op == 0xB:
+        return [f"m.pc = ({arg} + v[{x if quirks['jump_uses_vx'] else 0}]) & 0x0FFF"]
+    if op == 0xE and kk == 0x9E:
+        return [f"m.pc = {salto} if m.keys[v[{x}] & 0xF] else {sig}"]
+    if op == 0xE and kk == 0xA1:
+        return [f"m.pc = {sig} if m.keys[v[{x}] & 0xF] else {salto}"]
+    if op == 0x0 and x == 0 and kk == 0xFD:
+        # EXIT: el intérprete repetiría 00FD hasta agotar el presupuesto.
+        return [f"m.pc = {addr}", "return presupuesto"]
+    if op == 0xF and kk == 0x0A:
+        # Sin tecla, el intérprete repetiría FX0A hasta agotar el presupuesto:
+        # se consume todo de una vez con el PC quieto en FX0A.
+        return ["if m.pressed_once is None:",
+                f"    m.pc = {addr}",
+                "    return presupuesto",
+                f"v[{x}] = m.pressed_once & 0xF",
+                "m.pressed_once = None",
+                f"m.pc = {sig}"]
+    return None
+
+
+_FILAS = ({}, {})   # [wrap][columna] → las 256 filas de pantalla de un byte de sprite
+
+def _filas_sprite(px, wrap):
+    """
+    Las 256 filas de pantalla (baja resolución) que deja un byte de sprite
+    dibujado en la columna px, recortado o envuelto como en _dibujar.
+    """
+    ancho = cfg.SCREEN_W
+    mascara = (1 << ancho) - 1
+    filas = [(b << (ancho - 8)) >> px | ((b << (2 * ancho - 8 - px)) & mascara if wrap else 0)
+             for b in range(256)]
+    _FILAS[wrap][px] = filas
+    return filas
+
+
+def _dibujo(x, y, n, addr, h, wrap):
+    """
+    DXYN de la tabla (op_DXYN/op_DXYN_wrap) en línea cuando el sprite no
+    pasa el borde de abajo de la pantalla de baja resolución: las n filas
+    desenrolladas, cada una buscada en _filas_sprite. Si no, el handler, como
+    cualquier terminador complejo.
+    """
+    alto = cfg.SCREEN_H
+    lineas = ["gfx = m.gfx",
+              "t = m.index",
+              f"py = v[{y}] % {alto}",
+              f"if len(gfx) == {alto} and py <= {alto - n} and t <= {cfg.MEM_SIZE - n}:",
+              f"    px = v[{x}] % {cfg.SCREEN_W}",
+              f"    filas = filas_{wrap:d}.get(px) or filas_sprite(px, {wrap})",
+              f"    m.dirty_rows |= {(1 << n) - 1} << py",
+              "    choque = 0"]
+    for fila in range(n):
+        lineas += [f"    bits = filas[mem[t + {fila}]]",
+                   f"    antes = gfx[py + {fila}]",
+                   "    choque |= antes & bits",
+                   f"    gfx[py + {fila}] = antes ^ bits"]
+    lineas += ["    v[15] = 1 if choque else 0",
+               "else:",
+               f"    m.pc = {addr + 2}",
+               f"    {h}(m, {x}, {y}, {n})",
+               f"m.pc = {addr + 2}"]
+    return lineas
+
+
+def _es_terminal(opcode):
+    """True si el opcode cierra el bloque (cambia el flujo, dibuja o escribe memoria)."""
+    op, n, kk = opcode >> 12, opcode & 0xF, opcode & 0xFF
+    if op in (0x1, 0x2, 0x3, 0x4, 0xB, 0xD, 0xE):
+        return True
+    if op in (0x5, 0x9):
+        return n == 0
+    if opcode in (0x00EE, 0x00FD):
+        return True
+    if op == 0xF:
+        return kk in (0x0A, 0x33, 0x55)
+    return False
+
+
+# -----------------------------------------------------------------------------
+_REGISTRO = re.compile(r"\bv\[(\d+)\]")
+_ESCRITURA = re.compile(r"^v\[(\d+)\] ([|&^]?)= ")
+
+def _lee_escribe(linea):
+    """Registros que lee y registro que escribe (o None) una línea en línea."""
+    e = _ESCRITURA.match(linea)
+    if e is None:
+        return {int(r) for r in _REGISTRO.findall(linea)}, None
+    lee = {int(r) for r in _REGISTRO.findall(linea, e.end())}
+    if e.group(2):                       # v[x] |= ... también lee v[x]
+        lee.add(int(e.group(1)))
+    return lee, int(e.group(1))
+
+
+def _registros_locales(cuerpo, bucle):
+    """
+    Pasa las líneas en línea del cuerpo a variables locales (v3 en vez de
+    v[3]): leer y escribir un array('B') cuesta bastante más que una local.
+    cuerpo: lista de (directo, líneas); 'directo' son llamadas a handlers y
+    FX65, que trabajan sobre m.v_reg: antes se guardan las locales escritas.
+    Sin bucle cada registro se carga justo antes de su primera lectura; en un
+    bucle se cargan todos antes de entrar (y se recargan tras cada llamada
+    directa) para que valgan en cada vuelta. Devuelve (cargar, líneas,
+    guardar, vivos): 'vivos' son los registros cuya local sigue valiendo al
+    final, que el terminador puede leer sin ir a m.v_reg.
+    """
+    local = lambda linea: _REGISTRO.sub(r"v\1", linea)
+    if bucle:
+        usados, escritos = set(), set()
+        for directo, lineas in cuerpo:
+            for linea in ([] if directo else lineas):
+                lee, escribe = _lee_escribe(linea)
+                usados |= lee
+                if escribe is not None:
+                    usados.add(escribe)
+                    escritos.add(escribe)
+        cargar = [f"v{r} = v[{r}]" for r in sorted(usados)]
+        guardar = [f"v[{r}] = v{r}" for r in sorted(escritos)]
+        salida = []
+        for directo, lineas in cuerpo:
+            salida += guardar + lineas + cargar if directo else map(local, lineas)
+        return cargar, salida, guardar, set()
+
+    vivos, sucios, salida = set(), set(), []
+    for directo, lineas in cuerpo:
+        if directo:
+            salida += [f"v[{r}] = v{r}" for r in sorted(sucios)] + lineas
+            vivos, sucios = set(), set()
+            continue
+        for linea in lineas:
+            lee, escribe = _lee_escribe(linea)
+            salida += [f"v{r} = v[{r}]" for r in sorted(lee - vivos)]
+            vivos |= lee
+            if escribe is not None:
+                vivos.add(escribe)
+                sucios.add(escribe)
+            salida.append(local(linea))
+    return [], salida, [f"v[{r}] = v{r}" for r in sorted(sucios)], vivos
+
+
+# -----------------------------------------------------------------------------
+def _decodificar(memory, start, tabla, quirks, max_len):
+    """
+    Recorre el bloque que empieza en 'start' (a lo sumo max_len instrucciones).
+    Devuelve (cuerpo, cierre, largo, fin, consts, sucesores, frontera, frios)
+    o None si en 'start' no hay un opcode completo: cuerpo como en
+    _registros_locales, cierre las líneas del terminador (None si se cortó por
+    largo o por el fin de la memoria), [start, fin) el rango leído, sucesores
+    los PC a los que puede seguir el flujo conocidos al traducir (para un CALL,
+    también el retorno; vacío si dependen de un registro o si el bloque
+    escribe memoria) y frontera cuántas instrucciones hay hasta la última que
+    lee o escribe DT/ST o espera (FX07/FX15/FX18, FX0A, 00FD), 0 si ninguna.
+    frios son los sucesores que no siguen al bloque en un ciclo (ver _ciclo):
+    el retorno de un CALL, al que se llega recién con el RET, y la rama de
+    EX9E/EXA1 con la tecla apretada, que casi nunca se toma.
+    """
+    cuerpo, consts = [], {}
+    addr, largo = start, 0
+    cierre, sucesores, frontera, frios = None, (), 0, ()
+
+    while largo < max_len and addr + 1 < cfg.MEM_SIZE:
+        opcode = (memory[addr] << 8) | memory[addr + 1]
+        op = opcode >> 12
+        x, y = (opcode >> 8) & 0xF, (opcode >> 4) & 0xF
+        n, kk = opcode & 0xF, opcode & 0xFF
+        handler, _, _, arg = tabla[opcode]
+        h = f"h_{addr:03X}"
+        largo += 1
+
+        if _es_terminal(opcode):
+            consts[h] = handler
+            if op == 0xD and n and handler in (op_DXYN, op_DXYN_wrap):
+                wrap = handler is op_DXYN_wrap
+                cierre = _dibujo(x, y, n, addr, h, wrap)
+                consts["filas_sprite"], consts[f"filas_{wrap:d}"] = _filas_sprite, _FILAS[wrap]
+            else:
+                cierre = _terminal(op, n, kk, x, y, arg, addr, h, quirks)
+            if op == 0x1:
+                sucesores = (arg,)
+            elif op == 0x2:
+                sucesores, frios = (arg, addr + 2), (addr + 2,)
+            elif op in (0x3, 0x4, 0x5, 0x9) or cierre is not None and op == 0xE:
+                sucesores = (addr + 2, addr + 4)
+                if op == 0xE:
+                    frios = (addr + 4,) if kk == 0x9E else (addr + 2,)
+            elif op == 0xD or op == 0xF and kk == 0x0A:
+                sucesores = (addr + 2,)
+            if op == 0xF and kk == 0x0A or opcode == 0x00FD:
+                frontera = largo
+            if cierre is None:
+                # Terminador complejo: PC apuntando a la siguiente instrucción
+                # (como en el intérprete) y llamada al handler de la tabla.
+                cierre = [f"m.pc = {addr + 2}", f"{h}(m, {x}, {y}, {arg})"]
+            addr += 2
+            break
+
+        lineas = _inline(op, n, kk, x, y, arg, quirks)
+        directo = lineas is None
+        if directo:
+            consts[h] = handler
+            lineas = [f"{h}(m, {x}, {y}, {arg})"]
+        if directo or op == 0xF and kk == 0x65:
+            # Un handler puede lanzar (FX65 también, leyendo fuera de memoria):
+            # PC exacto, como en el intérprete, y V en m.v_reg (deja los mismos
+            # registros a medio cargar).
+            lineas = [f"m.pc = {addr + 2}"] + lineas
+            directo = True
+        if op == 0xC:
+            consts["usa_rnd"] = True
+        if op == 0xF and kk in (0x07, 0x15, 0x18):
+            frontera = largo
+        cuerpo.append((directo, lineas))
+        addr += 2
+    else:
+        sucesores = (addr,) if largo else ()
+
+    if largo == 0:
+        return None
+    return cuerpo, cierre, largo, addr, consts, sucesores, frontera, frios
+
+
+def _lineas_bloque(cuerpo, cierre, fin):
+    """
+    Cuerpo con registros en locales, guardado y terminador de un bloque que
+    no es un bucle: deja m.pc en la instrucción siguiente.
+    """
+    _, lineas, guardar, vivos = _registros_locales(cuerpo, False)
+    if cierre is None:
+        # Se cortó por largo máximo o fin de memoria: sigue en fin.
+        cierre = [f"m.pc = {fin}"]
+    # Las lecturas del terminador usan las locales que siguen valiendo
+    leer = lambda r: f"v{r.group(1)}" if int(r.group(1)) in vivos else r.group(0)
+    return lineas + guardar + [l if _ESCRITURA.match(l.lstrip()) else _REGISTRO.sub(leer, l)
+                               for l in cierre]
+
+
+def _compilar(nombre, fuente, consts, origen):
+    """Agrega el prólogo que usa 'fuente', la compila y devuelve la función."""
+    texto = "\n".join(fuente)
+    prologo = [f"def {nombre}(m, presupuesto, cuadro=0, resto=0):"]
+    if "v[" in texto:
+        prologo.append("    v = m.v_reg")
+    if "mem[" in texto:
+        prologo.append("    mem = m.memory")
+    if consts.pop("usa_rnd", False):
+        prologo.append("    rnd = m.rng.randint")
+    if "sin_espera[" in texto:
+        prologo.append("    sin_espera = m._sin_espera")
+    if "anotar(" in texto:
+        prologo.append("    anotar = m.aristas.add")
+    if "is not cubierto" in texto:
+        prologo.append("    cubierto = m._cubierto")
+    codigo = compile("\n".join(prologo + fuente), origen, "exec")
+    exec(codigo, consts)
+    return consts[nombre]
+
+
+def _anotar(lineas, fin, pc="m.pc"):
+    """
+    Para CoverageJIT: anota la arista (fin << 12) | PC siguiente al terminar
+    el bloque ('pc' es donde está el PC siguiente), también en las salidas
+    que consumen todo el presupuesto (ahí el PC es el de m.pc).
+    """
+    salida = []
+    for linea in lineas:
+        if linea.strip() == "return presupuesto":
+            sangria = linea[:len(linea) - len(linea.lstrip())]
+            salida.append(f"{sangria}anotar(m.pc | {fin << 12})")
+        salida.append(linea)
+    if salida[-1].strip() != "return presupuesto":
+        salida.append(f"anotar({pc} | {fin << 12})")
+    return salida
+
+
+# -----------------------------------------------------------------------------
+def translate_block(memory, start, tabla, quirks, max_len=MAX_BLOCK_LEN, aristas=False,
+                    variantes=None):
+    """
+    Traduce el bloque que empieza en 'start'. Devuelve (función, largo, tramos)
+    donde función(m, presupuesto) ejecuta el bloque y devuelve cuántas
+    instrucciones corrió, y tramos = ((start, fin),) es lo que lee de memoria.
+    Con max_len menor que el bloque se traduce sólo su comienzo (un prefijo).
+    Con aristas=True anota la rama tomada en m.aristas (ver chip8_fuzz).
+    variantes: como en translate_region, por inicio, max_len y bytes leídos.
+    Devuelve None si en 'start' no hay un opcode completo.
+    """
+    decodificado = _decodificar(memory, start, tabla, quirks, max_len)
+    if decodificado is None:
+        return None
+    cuerpo, cierre, largo, fin, consts = decodificado[:5]
+    if variantes is not None:
+        firma = (start, max_len, bytes(memory[start:fin]))
+        traducido = variantes.get(firma)
+        if traducido is not None:
+            return traducido
+    bucle = cierre == [f"m.pc = {start}"]        # termina en un JP a su propio inicio
+
+    if bucle and not cuerpo:
+        # JP a sí mismo: el resto del presupuesto se consume sin hacer nada.
+        fuente = [f"m.pc = {start}", "return presupuesto"]
+    elif bucle:
+        # Bucle sin salidas: se repite mientras entre en el presupuesto.
+        cargar, lineas, guardar, _ = _registros_locales(cuerpo, True)
+        fuente = cargar + [f"veces = presupuesto // {largo}",
+                           "vuelta = 0",
+                           "for vuelta in range(veces):"]
+        fuente += ["    " + l for l in lineas]
+        fuente += guardar + [f"m.pc = {start}"]
+    else:
+        fuente = _lineas_bloque(cuerpo, cierre, fin)
+    if aristas and max_len == MAX_BLOCK_LEN:
+        fuente = _anotar(fuente, fin)
+    if not fuente[-1].startswith("return"):
+        fuente.append(f"return veces * {largo}" if bucle else f"return {largo}")
+    if cuerpo or not bucle:
+        # Si algo lanza, m.pc queda después de esa instrucción, como en el
+        # intérprete: se cuentan las del bloque hasta ella (incluida).
+        vueltas = f"vuelta * {largo} + " if bucle else ""
+        fuente = (["try:"] + ["    " + l for l in fuente]
+                  + ["except Exception:",
+                     f"    m.cycles += {vueltas}(m.pc - {start}) // 2",
+                     "    raise"])
+    if bucle:
+        # Corriendo frames seguidos (ver Chip8JIT.run_frames) no sabe hacer el
+        # tick en medio del bucle: no corre nada y el frame va por run().
+        fuente.insert(0, "if cuadro: return 0")
+
+    funcion = _compilar(f"bloque_{start:03X}", ["    " + l for l in fuente], consts,
+                        f"<chip8 bloque 0x{start:03X}>")
+    traducido = funcion, largo, ((start, fin),)
+    if variantes is not None and len(variantes) < MAX_VARIANTS:
+        variantes[firma] = traducido
+    return traducido
+
+
+# Fin de frame dentro de una región: Chip8.tick_frame en línea
+# (chip8_funciones.tick_timers), que Chip8JIT.run_frames sólo usa así si la
+# clase no cambia tick_frame. Si el bloque terminó justo en el borde y en ese
+# PC puede empezar una espera, la región vuelve para que run_frames la busque
+# (Chip8._skip_idle), como al comienzo de cada frame en el intérprete.
+_TICK = ["while resto <= 0:",
+         "    resto += cuadro",
+         "    m.frames += 1",
+         "    if m.delay_timer > 0:",
+         "        m.delay_timer -= 1",
+         "    if m.sound_timer > 0:",
+         "        m.sound_timer -= 1"]
+
+
+def _despacho(etiquetas):
+    """
+    Árbol de if sobre la local pc para saltar al bloque que toca: unas pocas
+    comparaciones aunque la región tenga muchos bloques. etiquetas: lista de
+    (pc, líneas del bloque) ordenada por pc; si el pc no es de la región, break.
+    """
+    if len(etiquetas) <= 3:
+        lineas = []
+        for i, (pc, bloque) in enumerate(etiquetas):
+            lineas.append(f"{'el' if i else ''}if pc == {pc}:")
+            lineas += ["    " + l for l in bloque]
+        return lineas + ["else:", "    break"]
+    medio = len(etiquetas) // 2
+    return ([f"if pc < {etiquetas[medio][0]}:"]
+            + ["    " + l for l in _despacho(etiquetas[:medio])]
+            + ["else:"]
+            + ["    " + l for l in _despacho(etiquetas[medio:])])
+
+
+def _ciclo(bloques, inicio):
+    """
+    El camino más corto de bloques de la región que sale de 'inicio' y vuelve
+    a él sin pasar por direcciones menores (así cada bucle se arma una sola
+    vez, en su cabeza), por esperas ni por sucesores frios: [inicio, ...] o
+    None.
+    """
+    if "return" in "".join(bloques[inicio][1] or ()):
+        return None
+    caminos = [[inicio]]
+    for _ in range(MAX_LOOP_BLOCKS):
+        siguientes = []
+        for camino in caminos:
+            ultimo = bloques[camino[-1]]
+            for s in ultimo[5]:
+                if s in ultimo[7]:
+                    continue
+                if s == inicio:
+                    return camino
+                if (s > inicio and s in bloques and s not in camino
+                        and "return" not in "".join(bloques[s][1] or ())):
+                    siguientes.append(camino + [s])
+        caminos = siguientes[:MAX_LOOP_BLOCKS * 4]
+    return None
+
+
+def _bucle(ciclo, bloques, codigo, fijo):
+    """
+    Un while de Python para el ciclo de bloques: una sola comparación de
+    presupuesto (y de frontera con el tick) por vuelta en vez de volver al
+    despacho en cada bloque. Sale con break si el flujo deja el ciclo; el PC
+    queda en la local como siempre.
+    """
+    total, frontera = 0, 0
+    for pc in ciclo:
+        if bloques[pc][6]:
+            frontera = max(frontera, total + bloques[pc][6])
+        total += bloques[pc][2]
+    condicion = f"hechos + {total} <= presupuesto"
+    if frontera:
+        condicion += f" and resto >= {frontera}"
+    lineas = [f"while {condicion}:"]
+    for i, pc in enumerate(ciclo):
+        lineas += ["    " + l for l in codigo[pc]]
+        sig = ciclo[(i + 1) % len(ciclo)]
+        if fijo.get(pc) != sig:
+            lineas += [f"    if pc != {sig}:", "        break"]
+    # Fin de frame: el tick acá mismo, salvo que haya que buscar una espera
+    # (eso lo hace el despacho, que lo vuelve a ver con resto <= 0).
+    lineas += ["    if resto <= 0:",
+               "        if not sin_espera[pc]:",
+               "            break"]
+    lineas += ["        " + l for l in _TICK]
+    return lineas
+
+
+def translate_region(memory, start, tabla, quirks, aristas=False, variantes=None,
+                     max_bloques=MAX_REGION_BLOCKS):
+    """
+    Traduce una región: el bloque en 'start' y los que le siguen por saltos,
+    skips, CALL y sus retornos conocidos al traducir (hasta max_bloques),
+    en una sola función que salta entre ellos con el PC en una local, sin
+    volver a Chip8JIT.run. Arranca en el bloque de m.pc, así cualquiera de
+    ellos sirve de entrada. Antes de cada bloque mira si todavía entra en el
+    presupuesto; si no, o si el flujo sale de la región, devuelve lo que
+    corrió con m.pc en el próximo bloque. Un JP a sí mismo queda afuera (lo
+    resuelven el bloque suelto o la espera de Chip8.run_frames).
+
+    función(m, presupuesto, cuadro, resto): con cuadro = cycles_per_frame
+    corre frames seguidos y hace el tick de fin de frame (en línea, ver
+    _TICK) cada 'cuadro' instrucciones; el primero después de 'resto' (las
+    que le faltan al frame en curso; 0 = empieza uno). Un bloque que lee o
+    escribe DT/ST o espera (FX07/FX15/FX18, FX0A, 00FD) sólo corre si esas
+    instrucciones caen antes del próximo tick; si no, la función vuelve
+    antes. El resto no ve los timers, así que da lo mismo que el tick ocurra
+    en medio del bloque o al final.
+
+    Devuelve {inicio de bloque: (función, largo del bloque, tramos)}, con
+    tramos los rangos de memoria que lee la región entera. Si en 'start'
+    empieza un bucle sobre sí mismo, es sólo el de translate_block.
+
+    variantes: dict opcional de traducciones ya hechas por contenido (inicio
+    y bytes de cada tramo), para no volver a compilar el mismo código
+    automodificado en cada máquina (ver PreparedRom.jit_cache).
+    """
+    primero = _decodificar(memory, start, tabla, quirks, MAX_BLOCK_LEN)
+    if primero is None:
+        return {}
+    if primero[1] == [f"m.pc = {start}"]:
+        return {start: translate_block(memory, start, tabla, quirks, aristas=aristas,
+                                       variantes=variantes)}
+
+    bloques, pendientes = {start: primero}, list(primero[5])
+    while pendientes and len(bloques) < max_bloques:
+        pc = pendientes.pop(0)
+        if pc in bloques:
+            continue
+        decodificado = _decodificar(memory, pc, tabla, quirks, MAX_BLOCK_LEN)
+        if decodificado is None or not decodificado[0] and decodificado[1] == [f"m.pc = {pc}"]:
+            continue
+        bloques[pc] = decodificado
+        pendientes += decodificado[5]
+
+    if variantes is not None:
+        firma = (start,) + tuple((pc, bytes(memory[pc:b[3]])) for pc, b in sorted(bloques.items()))
+        traducida = variantes.get(firma)
+        if traducida is not None:
+            return traducida
+
+    codigo, fijo, consts = {}, {}, {}
+    for pc, (cuerpo, cierre, largo, fin, c, _, _, _) in sorted(bloques.items()):
+        consts.update(c)
+        lineas = _lineas_bloque(cuerpo, cierre, fin)
+        # El PC siguiente queda en la local; m.pc sólo antes de los handlers
+        # (que lo leen) y al salir.
+        if lineas[-1].startswith("m.pc = "):
+            lineas[-1] = lineas[-1][2:]
+            if lineas[-1][5:].isdigit():
+                fijo[pc] = int(lineas[-1][5:])      # salto incondicional
+        elif not lineas[-1].startswith("return"):
+            lineas.append("pc = m.pc")
+        if aristas:
+            lineas = _anotar(lineas, fin, "pc")
+        lineas = [l.replace("return presupuesto",
+                            f"return hechos + {largo - 1} if cuadro else presupuesto")
+                  for l in lineas]
+        codigo[pc] = lineas + [f"hechos += {largo}",
+                               f"resto -= {largo}"]
+        if memory[fin - 2] >> 4 == 0xF and memory[fin - 1] in (0x33, 0x55):
+            # FX33/FX55: si la escritura invalidó alguna traducción (quizás
+            # esta misma región) se vuelve, para no seguir con código viejo,
+            # con el tick si el bloque terminó un frame.
+            codigo[pc] += ["if m._cubierto is not cubierto:"]
+            codigo[pc] += ["    " + l for l in _TICK] + ["    break"]
+
+    etiquetas = []
+    for pc, (_, _, largo, _, _, _, frontera, _) in sorted(bloques.items()):
+        bloque = [f"if hechos + {largo} > presupuesto:",
+                  "    break"]
+        if frontera:
+            bloque += [f"if {frontera} > resto:",
+                       "    break"]
+        bloque += codigo[pc]
+        ciclo = _ciclo(bloques, pc)
+        if ciclo:
+            bloque = _bucle(ciclo, bloques, codigo, fijo) + ["else:"] + ["    " + l for l in bloque]
+        etiquetas.append((pc, bloque))
+
+    fuente = ["hechos = 0",
+              # instrucciones hasta el próximo tick
+              "resto = resto or cuadro or presupuesto + 1",
+              "pc = m.pc",
+              "try:",
+              "    while True:",
+              "        if resto <= 0:"]
+    fuente += ["            " + l for l in _TICK]
+    fuente += ["            if resto == cuadro and not sin_espera[pc]:",
+               "                break"]
+    fuente += ["        " + l for l in _despacho(etiquetas)]
+    fuente += ["except Exception:",
+               "    # m.pc quedó después de la que lanzó, como en el intérprete:",
+               "    # cuentan las del bloque hasta ella (incluida) y los ticks de",
+               "    # los frames que el bloque ya completó.",
+               "    hecho = (m.pc - pc) // 2",
+               "    m.cycles += hechos + hecho",
+               "    hecho -= 1",
+               "    while cuadro and hecho >= resto:",
+               "        hecho -= resto",
+               "        resto = cuadro",
+               "        m.tick_frame()",
+               "    raise",
+               "except BaseException:",
+               "    # Ctrl-C y compañía: se corta antes del bloque en pc.",
+               "    m.pc = pc",
+               "    m.cycles += hechos",
+               "    raise",
+               "m.pc = pc",
+               "return hechos"]
+
+    funcion = _compilar(f"region_{start:03X}", ["    " + l for l in fuente], consts,
+                        f"<chip8 región 0x{start:03X}>")
+    tramos = tuple((pc, b[3]) for pc, b in sorted(bloques.items()))
+    traducida = {pc: (funcion, b[2], tramos) for pc, b in bloques.items()}
+    if variantes is not None and len(variantes) < MAX_VARIANTS:
+        variantes[firma] = traducida
+    return traducida
+
+
+# -----------------------------------------------------------------------------
+def _h_escritura_factory(handler, largo):
+    """
+    Envuelve FX33/FX55 para invalidar los bloques que cubren [I, I+largo).
+    largo: 3 para FX33; x+1 para FX55.
+    """
+    def _h_escritura(m, x, y, arg):
+        inicio = m.index
+        handler(m, x, y, arg)
+        m.invalidate(inicio, inicio + (largo if largo else x + 1))
+    return _h_escritura
+
+
+_TABLAS_JIT = {}   # id(tabla base) → (tabla base, tabla JIT); compartidas entre máquinas
+
+def _tabla_jit(tabla):
+    """
+    Copia de la tabla de decodificación con FX33/FX55 que invalidan la caché.
+    Los handlers reciben la máquina como argumento, así que una misma copia
+    sirve para todas las instancias (importa con cientos de sesiones).
+    """
+    cache = _TABLAS_JIT.get(id(tabla))
+    if cache is not None and cache[0] is tabla:
+        return cache[1]
+    copia = list(tabla)
+    for x in range(16):
+        for kk, largo in ((0x33, 3), (0x55, 0)):
+            opcode = 0xF000 | (x << 8) | kk
+            handler, hx, hy, arg = copia[opcode]
+            copia[opcode] = (_h_escritura_factory(handler, largo), hx, hy, arg)
+    _TABLAS_JIT[id(tabla)] = (tabla, copia)
+    return copia
+
+
+# -----------------------------------------------------------------------------
+class Chip8JIT(Chip8):
+    """
+    Chip8 que ejecuta regiones traducidas en vez de instrucción por
+    instrucción (ver translate_region). Mismo estado, misma API y mismo
+    resultado que el intérprete: si el presupuesto restante no alcanza para
+    el bloque en el PC, corre un prefijo traducido de ese largo (los frames no
+    cambian). Los prefijos se cachean junto a las regiones con la clave
+    inicio | largo << 12 (con 4 KiB de memoria, nunca choca con un inicio).
+    """
+
+    _anotar_aristas = False     # CoverageJIT: las traducciones anotan en self.aristas
+    _interpretar_en_frio = True # la primera vez que se pide una entrada, interpretarla
+
+    def set_quirks(self, quirks=None):
+        """Como Chip8.set_quirks; los bloques traducidos con otros quirks se descartan."""
+        super().set_quirks(quirks)
+        self._tabla = _tabla_jit(self._tabla)
+        if hasattr(self, "_bloques"):             # no en __init__, antes de reset()
+            self.flush_cache()
+            if self.rom is not None:
+                self._usar_compartidos()
+
+    # -------------------------------------------------------------------------
+    def reset(self):
+        super().reset()
+        self.flush_cache()
+
+    def load_rom(self, rom_bytes):
+        """Como Chip8.load_rom, arrancando con los bloques ya traducidos de esa ROM."""
+        super().load_rom(rom_bytes)
+        self._usar_compartidos()
+
+    def _usar_compartidos(self):
+        """
+        Engancha la caché compartida de la ROM para estos quirks y, si la
+        memoria sigue siendo la imagen intacta, arranca con sus bloques.
+        """
+        clave = tuple(sorted(self.quirks.items())) + (("strict", self.strict),
+                                                      ("aristas", self._anotar_aristas))
+        self._compartidos = self.rom.jit_cache(clave)
+        if self.memory == self.rom.image:
+            bloques, cubierto, _ = self._compartidos
+            self._bloques = dict(bloques)
+            self._cubierto = bytearray(cubierto)
+
+    def flush_cache(self):
+        """Descarta todos los bloques traducidos."""
+        self._bloques = {}                          # inicio → (func, largo, tramos)
+        self._cubierto = bytearray(cfg.MEM_SIZE)    # 1 si alguna traducción lee esa dirección
+        self._compartidos = None                    # (bloques, cubierto, variantes) de la ROM
+        self._pedidas = set()                       # entradas que esta máquina ya pidió
+
+    # -------------------------------------------------------------------------
+    def invalidate(self, inicio, fin):
+        """Descarta las traducciones que leen alguna dirección de [inicio, fin)."""
+        super().invalidate(inicio, fin)
+        if not any(self._cubierto[inicio:fin]):
+            return
+        # Las entradas de una misma región comparten la tupla de tramos: cada
+        # una se mira una sola vez, no una por bloque de la región.
+        bloques, tocados = self._bloques, {}
+        for clave, (_, _, tramos) in list(bloques.items()):
+            tocado = tocados.get(id(tramos))
+            if tocado is None:
+                tocado = tocados[id(tramos)] = any(a < fin and inicio < b for a, b in tramos)
+            if tocado:
+                del bloques[clave]
+        cubierto = bytearray(cfg.MEM_SIZE)
+        for tramos in {id(t): t for _, _, t in bloques.values()}.values():
+            for a, b in tramos:
+                cubierto[a:b] = b"\x01" * (b - a)
+        self._cubierto = cubierto
+
+    # -------------------------------------------------------------------------
+    def _bloque(self, pc, largo=MAX_BLOCK_LEN):
+        """
+        Traduce y cachea la región que empieza en pc, con una entrada por cada
+        bloque suyo que todavía no tenga una (o el prefijo de 'largo'
+        instrucciones del bloque en pc). Devuelve la entrada de pc o None.
+        """
+        memoria = self.memory
+        variantes = self._compartidos[2] if self._compartidos is not None else None
+        if largo == MAX_BLOCK_LEN:
+            clave = pc
+            # En medio de un bloque ya traducido (un frame que terminó ahí):
+            # sólo lo que queda de ese bloque, que sigue en las entradas de
+            # siempre, en vez de otra región con casi el mismo código.
+            adentro = pc < cfg.MEM_SIZE and self._cubierto[pc]
+            nuevos = translate_region(memoria, pc, self._tabla, self.quirks,
+                                      self._anotar_aristas, variantes,
+                                      1 if adentro else MAX_REGION_BLOCKS)
+        else:
+            clave = pc | largo << 12
+            prefijo = translate_block(memoria, pc, self._tabla, self.quirks, largo,
+                                      variantes=variantes)
+            nuevos = {clave: prefijo} if prefijo is not None else {}
+        if not nuevos:
+            return None
+        tramos = nuevos[clave][2]
+        for c, bloque in nuevos.items():
+            self._bloques.setdefault(c, bloque)
+        for a, b in tramos:
+            self._cubierto[a:b] = b"\x01" * (b - a)
+        # Traducido desde la imagen intacta: sirve para la próxima máquina
+        # que cargue la misma ROM.
+        imagen = self.rom.image if self._compartidos is not None else None
+        if imagen is not None and all(memoria[a:b] == imagen[a:b] for a, b in tramos):
+            compartidos, cubierto, _ = self._compartidos
+            for c, bloque in nuevos.items():
+                compartidos.setdefault(c, bloque)
+            for a, b in tramos:
+                cubierto[a:b] = b"\x01" * (b - a)
+        return self._bloques[clave]
+
+    def _traducir(self, pc, largo=MAX_BLOCK_LEN):
+        """
+        Entrada de pc (o su prefijo de 'largo') la primera vez que esta
+        máquina la pide: con _interpretar_en_frio devuelve False (que la
+        corra el intérprete); si no, o desde la segunda vez, la ya traducida
+        o una nueva (None como _bloque).
+        """
+        clave = pc if largo == MAX_BLOCK_LEN else pc | largo << 12
+        if clave not in self._pedidas:
+            self._pedidas.add(clave)
+            if self._interpretar_en_frio:
+                return False
+        return self._bloques.get(clave) or self._bloque(pc, largo)
+
+    # -------------------------------------------------------------------------
+    def precompile(self, analisis=None):
+        """
+        Traduce por adelantado los bloques del código alcanzable según el
+        análisis estático (chip8_analisis.analyze_rom; por defecto, el de la
+        ROM cargada, que PreparedRom guarda), así la primera ejecución no paga la traducción.
+        Devuelve cuántos bloques nuevos tradujo. Los bloques recorridos
+        quedan pedidos (ver _traducir): corren traducidos desde la primera vez.
+        """
+        from chip8_analisis import block_ends_flow
+        if analisis is None:
+            if self.rom is None:
+                return 0
+            analisis = self.rom.analysis(self.quirks)
+        pendientes, nuevos = sorted(analisis.blocks, reverse=True), 0
+        while pendientes:
+            pc = pendientes.pop()
+            if pc in self._pedidas:
+                continue
+            self._pedidas.add(pc)
+            bloque = self._bloques.get(pc)
+            if bloque is None:
+                bloque = self._bloque(pc)
+                if bloque is None:
+                    continue
+                nuevos += 1
+            # El JIT también corta en DXYN, FX0A, FX33/FX55 o por largo: si el
+            # flujo sigue de largo, el próximo bloque empieza en 'fin'.
+            fin = bloque[2][0][1]
+            ultimo = (self.memory[fin - 2] << 8) | self.memory[fin - 1]
+            if fin in analisis.instructions and not block_ends_flow(ultimo):
+                pendientes.append(fin)
+        return nuevos
+
+    # -------------------------------------------------------------------------
+    def run(self, n_instructions):
+        """
+        Ejecuta n instrucciones por bloques (los timers no se tocan). Una
+        región fría avanza de a una instrucción interpretada; un prefijo
+        frío, con el intérprete entero.
+        """
+        restante, pedidas = n_instructions, self._pedidas
+        while restante > 0:
+            pc = self.pc
+            bloque = pc in pedidas and self._bloques.get(pc) or self._traducir(pc)
+            if bloque is False:
+                Chip8.run(self, 1)
+                restante -= 1
+                continue
+            if bloque is None:
+                Chip8.run(self, restante)       # PC al final de la memoria
+                return
+            if bloque[1] > restante:
+                clave = pc | restante << 12
+                bloque = (clave in pedidas and self._bloques.get(clave)
+                          or self._traducir(pc, restante))
+                if not bloque:
+                    Chip8.run(self, restante)
+                    return
+            hechos = bloque[0](self, restante)
+            self.cycles += hechos
+            restante -= hechos
+
+    def run_frames(self, n_frames):
+        """
+        Como Chip8.run_frames, pero la región en el PC corre todos los frames
+        que puede de una vez, con el tick adentro (ver translate_region); si
+        vuelve en medio de un frame, la del PC siguiente sigue desde ahí. Lo
+        que ninguna región puede correr (un bucle sobre sí mismo, el final de
+        la memoria) va por run() hasta el fin del frame, y lo que empieza en
+        una región fría, por el intérprete. Las esperas se buscan al comienzo
+        de cada frame, igual que en el intérprete.
+        """
+        if type(self).tick_frame is not Chip8.tick_frame:
+            Chip8.run_frames(self, n_frames)
+            return
+        cpf, sin_espera, pedidas = self.cycles_per_frame, self._sin_espera, self._pedidas
+        presupuesto, fase = n_frames * cpf, 0      # fase: instrucciones ya corridas del frame
+        while presupuesto > 0:
+            if not fase and not sin_espera[self.pc]:
+                presupuesto -= self._skip_idle(presupuesto // cpf) * cpf
+                if presupuesto <= 0:
+                    break
+            pc = self.pc
+            region = pc in pedidas and self._bloques.get(pc) or self._traducir(pc)
+            hechos = region[0](self, presupuesto, cpf, cpf - fase) if region else 0
+            if hechos:
+                self.cycles += hechos
+            else:
+                hechos = cpf - fase
+                if region is False:
+                    Chip8.run(self, hechos)     # fría: el resto del frame, interpretado
+                else:
+                    self.run(hechos)
+                self.tick_frame()
+            presupuesto -= hechos
+            fase = (fase + hechos) % cpf
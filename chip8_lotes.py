@@ -0,0 +1,177 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Corrida de ROMs por lotes en un pool de procesos
+#
+#   python main.py batch roms/ --cycles 100000 --json informe.json --csv informe.csv
+#   python main.py batch manifiesto.json --png-dir capturas/ --jobs 8
+#
+# Cada ROM corre sin ventana en un proceso del pool y devuelve un informe:
+# hash del framebuffer final, PNG final (opcional), instrucciones ejecutadas
+# (y cuántas fueron frames ociosos salteados, que instr_per_sec no cuenta),
+# frames, tiempo de pared de la emulación, tiempo de la traducción por
+# adelantado del JIT (compile_time, aparte: es el costo de arranque por
+# proceso que el lote reparte) y error (si la ROM terminó con una excepción).
+#
+# Manifiesto: JSON con una lista de tareas; cada tarea es una ruta o un dict
+#   {"rom": "roms/pong.ch8", "cycles": 50000, "frames": null,
+#    "engine": "jit", "seed": 1, "quirks": "super-chip"}
+# "quirks" es un perfil de config.QUIRK_PROFILES o un dict de quirks: un mismo
+# lote puede mezclar perfiles (cada uno usa su tabla ya especializada).
+# Los campos omitidos toman los valores de la línea de comandos.
+# -----------------------------------------------------------------------------
+import argparse, csv, json, os, time
+from concurrent.futures import ProcessPoolExecutor
+
+import config as cfg
+from chip8_decodificador import decode_table
+from chip8_funciones import hash_graphics, save_png
+from chip8_maquina import create_machine
+from chip8_roms import prepare_rom_file
+
+ROM_EXTENSIONS = (".ch8", ".c8", ".rom")
+REPORT_FIELDS = ("rom", "engine", "quirks", "seed", "cycles", "skipped_cycles", "frames",
+                 "wall_time", "compile_time", "instr_per_sec", "gfx_hash", "png", "error")
+
+
+# -----------------------------------------------------------------------------
+def run_task(tarea):
+    """
+    Corre una ROM (en un proceso del pool) y devuelve su informe como dict.
+    tarea: dict con rom, cycles o frames, engine, quirks, seed, precompile y
+    png_dir/png_scale.
+    """
+    informe = {k: None for k in REPORT_FIELDS}
+    informe.update(rom=tarea["rom"], engine=tarea["engine"], seed=tarea["seed"],
+                   quirks=tarea.get("quirks"))
+    maquina, dt = None, 0.0
+    try:
+        maquina = create_machine(prepare_rom_file(tarea["rom"]), tarea["engine"],
+                                 rng_seed=tarea["seed"], quirks=tarea.get("quirks"))
+        if tarea.get("precompile", True) and hasattr(maquina, "precompile"):
+            t0 = time.perf_counter()
+            maquina.precompile()
+            informe["compile_time"] = round(time.perf_counter() - t0, 6)
+        t0 = time.perf_counter()
+        try:
+            if tarea.get("frames") is not None:
+                maquina.run_frames(tarea["frames"])
+            else:
+                maquina.run_cycles(tarea["cycles"])
+        finally:
+            dt = time.perf_counter() - t0
+    except Exception as e:      # la ROM rompió: se informa y el lote sigue
+        informe["error"] = f"{type(e).__name__}: {e}"
+
+    if maquina is not None:
+        corridas = maquina.cycles - maquina.skipped_cycles
+        informe.update(cycles=maquina.cycles, skipped_cycles=maquina.skipped_cycles,
+                       frames=maquina.frames, wall_time=round(dt, 6),
+                       instr_per_sec=round(corridas / dt) if dt else None,
+                       gfx_hash=hash_graphics(maquina.gfx))
+        if tarea.get("png_dir"):
+            nombre = os.path.splitext(os.path.basename(tarea["rom"]))[0]
+            ruta = os.path.join(tarea["png_dir"], f"{tarea['id']:04d}-{nombre}.png")
+            save_png(maquina.gfx, ruta, tarea.get("png_scale", 4))
+            informe["png"] = ruta
+    return informe
+
+
+# -----------------------------------------------------------------------------
+def collect_tasks(origen, defaults):
+    """
+    Arma la lista de tareas a partir de un directorio (todas sus ROMs) o de un
+    manifiesto JSON. 'defaults' completa los campos que falten.
+    """
+    if os.path.isdir(origen):
+        entradas = sorted(os.path.join(origen, f) for f in os.listdir(origen)
+                          if f.lower().endswith(ROM_EXTENSIONS))
+        base = origen
+    else:
+        with open(origen, encoding="utf-8") as f:
+            entradas = json.load(f)
+        base = os.path.dirname(origen)
+
+    tareas = []
+    for i, entrada in enumerate(entradas):
+        tarea = dict(defaults)
+        tarea.update({"rom": entrada} if isinstance(entrada, str) else entrada)
+        if not os.path.isabs(tarea["rom"]) and not os.path.exists(tarea["rom"]):
+            tarea["rom"] = os.path.join(base, tarea["rom"])   # relativa al manifiesto
+        tarea["id"] = i
+        tareas.append(tarea)
+    return tareas
+
+
+# -----------------------------------------------------------------------------
+def run_batch(tareas, jobs=None):
+    """Reparte las tareas en un pool de procesos; devuelve los informes en orden."""
+    if jobs == 1:
+        return [run_task(t) for t in tareas]
+    # Tablas armadas antes del fork (una por perfil): los procesos del pool las heredan
+    for quirks in {json.dumps(t.get("quirks"), sort_keys=True) for t in tareas}:
+        try:
+            decode_table(json.loads(quirks))
+        except ValueError:
+            pass        # perfil inválido: lo informa la tarea
+
+    procesos = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(run_task, tareas,
+                             chunksize=max(1, len(tareas) // (4 * procesos))))
+
+
+# -----------------------------------------------------------------------------
+def write_reports(informes, ruta_json=None, ruta_csv=None):
+    """Guarda los informes en JSON y/o CSV."""
+    if ruta_json:
+        with open(ruta_json, "w", encoding="utf-8") as f:
+            json.dump(informes, f, indent=2)
+    if ruta_csv:
+        with open(ruta_csv, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            escritor.writeheader()
+            escritor.writerows(informes)
+
+
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py batch",
+                                     description="Corre ROMs por lotes sin ventana")
+    parser.add_argument("origen", help="directorio con ROMs o manifiesto JSON")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--cycles", type=int, default=100_000,
+                       help="instrucciones por ROM (por defecto 100000)")
+    grupo.add_argument("--frames", type=int, help="frames por ROM (en vez de --cycles)")
+    parser.add_argument("--engine", choices=("interprete", "jit"), default=cfg.ENGINE)
+    parser.add_argument("--seed", type=int, default=cfg.RNG_SEED, help="semilla para CXNN")
+    parser.add_argument("--quirks", choices=tuple(cfg.QUIRK_PROFILES), metavar="PERFIL",
+                        help="perfil de quirks para las tareas que no traen uno")
+    parser.add_argument("--no-precompile", dest="precompile", action="store_false",
+                        help="con jit, no traducir por adelantado el código alcanzable")
+    parser.add_argument("--jobs", type=int,
+                        help="procesos del pool (por defecto: todos los núcleos)")
+    parser.add_argument("--json", help="informe JSON")
+    parser.add_argument("--csv", help="informe CSV")
+    parser.add_argument("--png-dir", help="directorio para el PNG final de cada ROM")
+    parser.add_argument("--png-scale", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.png_dir:
+        os.makedirs(args.png_dir, exist_ok=True)
+    defaults = {"cycles": args.cycles, "frames": args.frames, "engine": args.engine,
+                "seed": args.seed, "quirks": args.quirks, "precompile": args.precompile,
+                "png_dir": args.png_dir, "png_scale": args.png_scale}
+    tareas = collect_tasks(args.origen, defaults)
+
+    t0 = time.perf_counter()
+    informes = run_batch(tareas, args.jobs)
+    dt = time.perf_counter() - t0
+    write_reports(informes, args.json, args.csv)
+
+    for inf in informes:
+        estado = inf["error"] or inf["gfx_hash"][:16]
+        print(f"{os.path.basename(inf['rom']):24} {inf['cycles'] or 0:>10} instr "
+              f"{inf['wall_time'] or 0:8.3f} s  {inf['compile_time'] or 0:6.3f} s trad.  "
+              f"{estado}")
+    errores = sum(1 for inf in informes if inf["error"])
+    print(f"{len(informes)} ROMs en {dt:.2f} s, {errores} con error")
+    return 1 if errores else 0
@@ -0,0 +1,259 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Máquina (estado + ciclo fetch/decode/dispatch, sin Pygame)
+#
+# Todo el estado que antes vivía como globales en main.py está encapsulado en
+# la clase Chip8. La ventana (main.py) es sólo un frontend: inyecta el teclado
+# con set_keys() y lee 'gfx' para dibujar. Sin frontend, la máquina corre tan
+# rápido como permita el host (modo --headless).
+# -----------------------------------------------------------------------------
+import random
+from array import array
+import config as cfg
+from chip8_funciones import tick_timers
+from chip8_decodificador import decode_table, resolve_quirks
+from chip8_roms import BASE_IMAGE, prepare_rom
+
+
+# -----------------------------------------------------------------------------
+class Chip8:
+    """
+    Máquina CHIP-8: memoria, registros V0..VF, pila, PC, I, timers y gfx.
+    Estado compacto: memory es un bytearray, v_reg un array('B') y la pila un
+    array('H') fijo de STACK_DEPTH entradas con su puntero sp.
+
+    API:
+      step()          : ejecuta una instrucción.
+      run(n)          : ejecuta n instrucciones (sin tocar timers).
+      run_frames(n)   : ejecuta n frames (cycles_per_frame instrucciones +
+                        un decremento de DT/ST por frame). Los frames en los
+                        que la ROM sólo espera se saltean sin ejecutar nada.
+      set_keys(...)   : estado del teclado para el próximo frame.
+      set_quirks(q)   : perfil de quirks ("cosmac-vip", "super-chip", ...,
+                        un dict o None = config.py); también quirks= al crearla.
+    Con strict=True un opcode desconocido o 0NNN lanza UnknownOpcodeError en
+    vez de ignorarse (fuzzing, ver chip8_fuzz).
+    """
+
+    def __init__(self, rom=None, rng_seed=cfg.RNG_SEED,
+                 cycles_per_frame=cfg.CYCLES_PER_FRAME, quirks=None, strict=False):
+        self.cycles_per_frame = cycles_per_frame
+        self.strict = strict
+        self.rng = random.Random(rng_seed)
+        self.set_quirks(quirks)
+        self.reset()
+        if rom is not None:
+            self.load_rom(rom)
+
+    # -------------------------------------------------------------------------
+    def set_quirks(self, quirks=None):
+        """
+        Elige el set de quirks (ver chip8_decodificador.resolve_quirks) y la
+        tabla de decodificación ya especializada para él.
+        """
+        self.quirks = resolve_quirks(quirks)
+        self._tabla = decode_table(self.quirks, self.strict)
+
+    # -------------------------------------------------------------------------
+    def reset(self):
+        """Estado inicial: memoria en cero con las fuentes en FONT_DIR y BIG_FONT_DIR."""
+        self.memory = bytearray(BASE_IMAGE)
+        self.rom = None              # PreparedRom cargada (ver chip8_roms)
+        self.v_reg  = array("B", bytes(16))
+        self.stack  = array("H", bytes(2 * cfg.STACK_DEPTH))
+        self.sp     = 0              # entradas ocupadas de la pila
+        self.pc     = cfg.PROGRAM_START
+        self.index  = 0
+        self.delay_timer = 0
+        self.sound_timer = 0
+        self.gfx = [0] * cfg.SCREEN_H   # una fila = entero de SCREEN_W bits (x=0 en el bit alto);
+                                        # HIRES_H filas de HIRES_W bits tras 00FF (SUPER-CHIP)
+        self.flags = array("B", bytes(16))   # flags RPL de SUPER-CHIP (FX75/FX85)
+
+        self.keys = [False] * 16     # estado continuo (EX9E/EXA1)
+        self.pressed_once = None     # tecla recién presionada (FX0A)
+        self.dirty_rows = 0          # bit y = la fila y cambió desde el último dibujo
+        self._sin_espera = bytearray(cfg.MEM_SIZE + 2)   # 1 = en ese PC no empieza una espera
+        self.cycles = 0              # instrucciones ejecutadas (tiempo del programa)
+        self.skipped_cycles = 0      # de 'cycles', las de frames ociosos salteados sin correr
+        self.frames = 0
+
+    # -------------------------------------------------------------------------
+    def load_rom(self, rom_bytes):
+        """
+        Carga la ROM (bytes, lista de enteros o PreparedRom): la memoria pasa
+        a ser la imagen preparada (fuente + ROM en PROGRAM_START) con una sola
+        copia de slice. Las ROMs ya vistas salen de la caché por contenido.
+        """
+        self.rom = prepare_rom(rom_bytes)
+        self.memory[:] = self.rom.image
+        self._sin_espera = bytearray(len(self._sin_espera))
+
+    # -------------------------------------------------------------------------
+    def invalidate(self, inicio, fin):
+        """
+        Aviso de que cambió memory[inicio:fin] por fuera de la CPU (p. ej. al
+        restaurar un estado). El intérprete sólo olvida los PCs que _skip_idle
+        ya había descartado cerca del rango; Chip8JIT además sus bloques.
+        """
+        a, b = max(0, inicio - 5), min(len(self._sin_espera), fin + 4)
+        self._sin_espera[a:b] = bytes(max(0, b - a))
+
+    # -------------------------------------------------------------------------
+    def set_keys(self, chip8_keys, pressed_once=None):
+        """Estado del teclado CHIP-8 (16 bools) y tecla presionada (o None)."""
+        self.keys = chip8_keys
+        self.pressed_once = pressed_once
+
+    # -------------------------------------------------------------------------
+    def step(self):
+        """Ejecuta una instrucción: fetch + una búsqueda en la tabla de decodificación."""
+        pc, mem = self.pc, self.memory
+        handler, x, y, arg = self._tabla[(mem[pc] << 8) | mem[pc + 1]]
+        self.pc = pc + 2
+        self.cycles += 1
+        handler(self, x, y, arg)
+
+    # -------------------------------------------------------------------------
+    def run(self, n_instructions):
+        """Ejecuta n instrucciones seguidas (los timers no se tocan)."""
+        tabla, mem = self._tabla, self.memory
+        i = 0
+        try:
+            for i in range(1, n_instructions + 1):
+                pc = self.pc
+                handler, x, y, arg = tabla[(mem[pc] << 8) | mem[pc + 1]]
+                self.pc = pc + 2
+                handler(self, x, y, arg)
+        finally:
+            self.cycles += i
+
+    # -------------------------------------------------------------------------
+    def tick_frame(self):
+        """Fin de frame: DT/ST bajan exactamente una vez."""
+        self.delay_timer, self.sound_timer = tick_timers(self.delay_timer, self.sound_timer)
+        self.frames += 1
+
+    # -------------------------------------------------------------------------
+    def run_frames(self, n_frames):
+        """Ejecuta n frames: cycles_per_frame instrucciones + tick de timers."""
+        sin_espera = self._sin_espera
+        while n_frames > 0:
+            if not sin_espera[self.pc]:
+                n_frames -= self._skip_idle(n_frames)
+                if n_frames <= 0:
+                    break
+            self.run(self.cycles_per_frame)
+            self.tick_frame()
+            n_frames -= 1
+
+    # -------------------------------------------------------------------------
+    # Espera activa: patrones en los que la ROM gira sin hacer nada hasta que
+    # llegue una tecla o venza DT. Al inicio de un frame se reconocen y se
+    # adelantan frames enteros con el mismo resultado que ejecutarlos
+    # (ciclos, frames, timers, PC y registros), sin correr instrucciones. Esos
+    # ciclos se suman también a skipped_cycles: las métricas de velocidad
+    # (instr/s) cuentan sólo cycles - skipped_cycles.
+    #
+    # Buscar los patrones cuesta más que un frame de pocas instrucciones, así
+    # que los PCs donde la memoria no tiene ninguno quedan marcados en
+    # _sin_espera y ahí no se vuelve a buscar. Si la memoria cambia, una marca
+    # vieja sólo hace perder un salteo (nunca saltea de más); invalidate() y
+    # load_rom() las borran.
+    # -------------------------------------------------------------------------
+    def _opcode(self, addr):
+        mem = self.memory
+        return (mem[addr] << 8) | mem[addr + 1] if 0 <= addr < cfg.MEM_SIZE - 1 else None
+
+    def waiting_for_key(self):
+        """
+        True si la máquina no va a cambiar hasta la próxima tecla: FX0A sin
+        tecla pendiente, JP a sí mismo o 00FD (ROM terminada). El frontend puede
+        bloquearse esperando eventos.
+        """
+        opcode = self._opcode(self.pc)
+        return (opcode == 0x1000 | self.pc or opcode == 0x00FD
+                or (opcode is not None and opcode & 0xF0FF == 0xF00A))
+
+    def _skip_idle(self, n_frames):
+        """Adelanta hasta n frames ociosos; devuelve cuántos adelantó (0 si no hay espera)."""
+        pc = self.pc
+        opcode = self._opcode(pc)
+        if opcode is None:
+            self._sin_espera[pc] = 1
+            return 0
+        if opcode & 0xF0FF == 0xF00A and self.pressed_once is not None:
+            return 0            # FX0A con tecla: corre (y sin marcar: la espera vuelve)
+        if opcode == 0x1000 | pc or opcode == 0x00FD or opcode & 0xF0FF == 0xF00A:
+            # JP a sí mismo, EXIT o FX0A sin tecla: nada cambia salvo los timers, y
+            # pressed_once sólo lo cambia set_keys() entre llamadas.
+            self._advance_frames(n_frames)
+            return n_frames
+        return self._skip_delay_loop(n_frames)
+
+    def _skip_delay_loop(self, n_frames):
+        """
+        Bucle de espera de DT:  s: FX07 / s+2: 3XKK / s+4: JP s.  Mientras ni
+        DT ni Vx valgan KK el skip no se toma y el frame entero queda en el
+        bucle; sólo hay que seguir la fase (PC) y el último valor leído en Vx.
+        """
+        for fase in range(3):
+            s = self.pc - 2 * fase
+            op07, op3x = self._opcode(s), self._opcode(s + 2)
+            if (op07 is not None and op07 & 0xF0FF == 0xF007 and op3x is not None
+                    and op3x & 0xF000 == 0x3000 and (op3x >> 8) & 0xF == (op07 >> 8) & 0xF
+                    and self._opcode(s + 4) == 0x1000 | s):
+                break
+        else:
+            self._sin_espera[self.pc] = 1
+            return 0
+
+        x, kk, cpf = (op07 >> 8) & 0xF, op3x & 0xFF, self.cycles_per_frame
+        v, dt, st = self.v_reg[x], self.delay_timer, self.sound_timer
+        lee_fx07 = [cpf >= (3 - f) % 3 + 1 for f in range(3)]   # ¿corre FX07 en el frame?
+        hechos = 0
+        while hechos < n_frames and dt != kk and (fase != 1 or v != kk):
+            if lee_fx07[fase]:
+                v = dt
+            fase = (fase + cpf) % 3
+            dt, st = max(0, dt - 1), max(0, st - 1)
+            hechos += 1
+        if hechos:
+            self.v_reg[x] = v
+            self.pc = s + 2 * fase
+            self.delay_timer, self.sound_timer = dt, st
+            self.cycles += hechos * cpf
+            self.skipped_cycles += hechos * cpf
+            self.frames += hechos
+        return hechos
+
+    def _advance_frames(self, n_frames):
+        """n frames en los que sólo corren los timers (el PC no se mueve)."""
+        self.cycles += n_frames * self.cycles_per_frame
+        self.skipped_cycles += n_frames * self.cycles_per_frame
+        self.frames += n_frames
+        self.delay_timer = max(0, self.delay_timer - n_frames)
+        self.sound_timer = max(0, self.sound_timer - n_frames)
+
+    # -------------------------------------------------------------------------
+    def run_cycles(self, n_cycles):
+        """
+        Ejecuta n instrucciones respetando el reparto por frames (los timers
+        avanzan cada cycles_per_frame instrucciones). Usado por --max-cycles.
+        """
+        frames, resto = divmod(n_cycles, self.cycles_per_frame)
+        self.run_frames(frames)
+        self.run(resto)
+
+
+# -----------------------------------------------------------------------------
+def create_machine(rom=None, engine=cfg.ENGINE, **kwargs):
+    """
+    Crea la máquina del motor pedido: "interprete" (Chip8) o "jit" (Chip8JIT).
+    Los kwargs se pasan al constructor (rng_seed, cycles_per_frame, quirks, strict).
+    """
+    if engine == "interprete":
+        return Chip8(rom, **kwargs)
+    if engine == "jit":
+        from chip8_jit import Chip8JIT
+        return Chip8JIT(rom, **kwargs)
+    raise ValueError(f"Motor desconocido: {engine!r}")
@@ -0,0 +1,190 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Perfilado por opcode (instrumentación opcional del dispatch)
+#
+#   perfil = attach_profiler(maquina)   # reemplaza maquina.run por un bucle medido
+#   maquina.run_frames(600)
+#   perfil.detach()                     # vuelve al run() normal (cero costo)
+#   perfil.write_json("perfil.json"); perfil.write_folded("perfil.folded")
+#
+# El bucle medido es un atributo de la instancia que tapa al run() de la clase:
+# sin perfil no hay ni un 'if' extra por instrucción. Mientras está activo se
+# interpreta instrucción por instrucción. Chip8JIT.run_frames corre regiones
+# traducidas sin pasar por run(), así que también se tapa run_frames con el
+# de Chip8 (que reparte cada frame con run(); run_cycles va por run_frames).
+# La tabla de Chip8JIT ya invalida la caché en FX33/FX55: al soltar el perfil
+# los bloques siguen siendo válidos.
+#
+# Se acumula, con time.perf_counter_ns() alrededor de cada handler:
+#   - cuenta y tiempo por familia de opcode (00E0, DXYN, 8XY4, FX55, ...)
+#   - cuenta y tiempo por dirección de PC (y un mapa de calor de la memoria)
+#   - grafo de llamadas 2NNN/00EE (llamador → subrutina, cantidad)
+#   - pilas plegadas "0x200;0x2A4;DXYN <ns>" para flamegraph.pl / speedscope
+# -----------------------------------------------------------------------------
+import json
+from collections import defaultdict
+from time import perf_counter_ns
+from types import MethodType
+
+import config as cfg
+from chip8_maquina import Chip8
+
+HEAT_MAP_WIDTH = 64     # direcciones por fila del mapa de calor
+
+
+# -----------------------------------------------------------------------------
+def opcode_family(opcode):
+    """Nombre de la familia del opcode ("DXYN", "8XY4", "FX55", ...; "????" si no existe)."""
+    op, n, kk = opcode >> 12, opcode & 0xF, opcode & 0xFF
+    if opcode == 0x00E0:
+        return "00E0"
+    if opcode == 0x00EE:
+        return "00EE"
+    if opcode in (0x00FB, 0x00FC, 0x00FD, 0x00FE, 0x00FF):   # SUPER-CHIP
+        return f"{opcode:04X}"
+    if opcode & 0xFFF0 == 0x00C0:
+        return "00CN"
+    if op == 0x0:
+        return "0NNN"
+    if op in (0x1, 0x2, 0xA, 0xB):
+        return f"{op:X}NNN"
+    if op in (0x3, 0x4, 0x6, 0x7, 0xC):
+        return f"{op:X}XNN"
+    if op in (0x5, 0x9) and n == 0:
+        return f"{op:X}XY0"
+    if op == 0x8 and n in (0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0xE):
+        return f"8XY{n:X}"
+    if op == 0xD:
+        return "DXYN"
+    if op == 0xE and kk in (0x9E, 0xA1):
+        return f"EX{kk:02X}"
+    if op == 0xF and kk in (0x07, 0x0A, 0x15, 0x18, 0x1E, 0x29, 0x30, 0x33, 0x55, 0x65,
+                            0x75, 0x85):
+        return f"FX{kk:02X}"
+    return "????"
+
+
+_FAMILIAS = None
+
+def _familias():
+    """Familia de cada uno de los 65.536 opcodes; se arma una vez."""
+    global _FAMILIAS
+    if _FAMILIAS is None:
+        _FAMILIAS = [opcode_family(op) for op in range(0x10000)]
+    return _FAMILIAS
+
+
+# -----------------------------------------------------------------------------
+class Profiler:
+    """Estadísticas de una máquina perfilada; ver attach_profiler()."""
+
+    def __init__(self, maquina):
+        self.maquina = maquina
+        self.family_count = defaultdict(int)
+        self.family_time = defaultdict(int)      # ns
+        self.pc_count = defaultdict(int)
+        self.pc_time = defaultdict(int)          # ns
+        self.calls = defaultdict(int)            # (llamador, subrutina) → veces
+        self.folded = defaultdict(int)           # "pila;FAMILIA" → ns
+        self._pila = [maquina.pc]                # subrutinas en curso (direcciones)
+        self._ruta = f"0x{maquina.pc:03X}"
+
+    # -------------------------------------------------------------------------
+    def _run(self, n_instructions):
+        """Bucle de Chip8.run con medición; se instala como maquina.run."""
+        m, familias = self.maquina, _familias()
+        tabla, mem = m._tabla, m.memory
+        fam_n, fam_t = self.family_count, self.family_time
+        pc_n, pc_t, plegadas = self.pc_count, self.pc_time, self.folded
+        pila, reloj = self._pila, perf_counter_ns
+        i = 0
+        try:
+            for i in range(1, n_instructions + 1):
+                pc = m.pc
+                opcode = (mem[pc] << 8) | mem[pc + 1]
+                handler, x, y, arg = tabla[opcode]
+                m.pc = pc + 2
+                t0 = reloj()
+                handler(m, x, y, arg)
+                dt = reloj() - t0
+
+                familia = familias[opcode]
+                fam_n[familia] += 1
+                fam_t[familia] += dt
+                pc_n[pc] += 1
+                pc_t[pc] += dt
+                plegadas[self._ruta + ";" + familia] += dt
+                if familia == "2NNN":
+                    self.calls[(pila[-1], m.pc)] += 1
+                    pila.append(m.pc)
+                    self._ruta += f";0x{m.pc:03X}"
+                elif familia == "00EE" and len(pila) > 1:
+                    pila.pop()
+                    self._ruta = self._ruta.rsplit(";", 1)[0]
+        finally:
+            m.cycles += i
+
+    def detach(self):
+        """Vuelve a la máquina al run() y run_frames() de su clase (sin instrumentación)."""
+        self.maquina.__dict__.pop("run", None)
+        self.maquina.__dict__.pop("run_frames", None)
+
+    # -------------------------------------------------------------------------
+    def heat_map(self):
+        """Cuentas por dirección de memoria en filas de HEAT_MAP_WIDTH direcciones."""
+        cuentas = [0] * cfg.MEM_SIZE
+        for pc, veces in self.pc_count.items():
+            cuentas[pc] = veces
+        return [cuentas[i:i + HEAT_MAP_WIDTH] for i in range(0, cfg.MEM_SIZE, HEAT_MAP_WIDTH)]
+
+    def report(self):
+        """Todo el perfil como un dict listo para JSON (familias y PCs, de más a menos tiempo)."""
+        familias = sorted(self.family_count, key=self.family_time.get, reverse=True)
+        pcs = sorted(self.pc_count, key=self.pc_time.get, reverse=True)
+        return {
+            "instructions": sum(self.family_count.values()),
+            "families": {f: {"count": self.family_count[f], "time_ns": self.family_time[f]}
+                         for f in familias},
+            "pcs": {f"0x{pc:03X}": {"count": self.pc_count[pc], "time_ns": self.pc_time[pc]}
+                    for pc in pcs},
+            "calls": [{"caller": f"0x{a:03X}", "callee": f"0x{b:03X}", "count": veces}
+                      for (a, b), veces in sorted(self.calls.items())],
+            "heat_map": {"width": HEAT_MAP_WIDTH, "rows": self.heat_map()},
+        }
+
+    def write_json(self, ruta_archivo):
+        with open(ruta_archivo, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=1)
+
+    def write_folded(self, ruta_archivo):
+        """Pilas plegadas (una por línea, valor en ns) para flamegraph.pl/speedscope."""
+        with open(ruta_archivo, "w", encoding="utf-8") as f:
+            for ruta, ns in sorted(self.folded.items()):
+                f.write(f"{ruta} {ns}\n")
+
+    def summary(self, top=10):
+        """Texto con las familias y direcciones que más tiempo se llevaron."""
+        total = sum(self.family_time.values()) or 1
+        lineas = [f"{'familia':8} {'veces':>10} {'ms':>9} {'%':>6}"]
+        for f in sorted(self.family_time, key=self.family_time.get, reverse=True)[:top]:
+            t = self.family_time[f]
+            lineas.append(f"{f:8} {self.family_count[f]:>10} {t / 1e6:>9.2f} "
+                          f"{100 * t / total:>5.1f}%")
+        lineas.append(f"{'PC':8} {'veces':>10} {'ms':>9} {'%':>6}")
+        for pc in sorted(self.pc_time, key=self.pc_time.get, reverse=True)[:top]:
+            t = self.pc_time[pc]
+            lineas.append(f"0x{pc:03X}    {self.pc_count[pc]:>10} {t / 1e6:>9.2f} "
+                          f"{100 * t / total:>5.1f}%")
+        return "\n".join(lineas)
+
+
+# -----------------------------------------------------------------------------
+def attach_profiler(maquina):
+    """
+    Instala el bucle medido en maquina (tapa a maquina.run, y a run_frames
+    con el de Chip8 para que todo pase por él) y devuelve el Profiler con las
+    estadísticas. Profiler.detach() lo quita.
+    """
+    perfil = Profiler(maquina)
+    maquina.run = perfil._run
+    maquina.run_frames = MethodType(Chip8.run_frames, maquina)
+    return perfil
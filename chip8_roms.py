@@ -0,0 +1,129 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Caché de ROMs por contenido
+#
+# Preparar una ROM es: leer el archivo, armar la imagen de memoria (fuentes
+# en FONT_DIR y BIG_FONT_DIR + ROM en PROGRAM_START) y, con el JIT, traducir
+# sus bloques. Todo eso depende sólo del contenido, así que se guarda bajo
+# el SHA-256 de la ROM: volver a lanzar una ROM conocida es copiar una imagen
+# de 4 KiB con una asignación de slice y arrancar con los bloques ya
+# traducidos.
+#
+#   preparada = prepare_rom_file("roms/pong.ch8")   # mmap + hash, sin copias extra
+#   maquina = create_machine(preparada)             # o create_machine(bytes): misma caché
+#
+# prepare_rom_file() recuerda además (ruta, tamaño, mtime) → hash, así un
+# lote que corre miles de veces las mismas ROMs ni siquiera relee el archivo.
+# La caché es por proceso y acotada (MAX_ROMS, LRU); en el pool de lotes cada
+# proceso reusa la suya entre tareas.
+# -----------------------------------------------------------------------------
+import hashlib, mmap, os
+from collections import OrderedDict
+
+import config as cfg
+
+MAX_ROMS = 512
+
+
+# -----------------------------------------------------------------------------
+def _imagen_base():
+    imagen = bytearray(cfg.MEM_SIZE)
+    imagen[cfg.FONT_DIR:cfg.FONT_DIR + len(cfg.FONT_SET)] = bytes(cfg.FONT_SET)
+    imagen[cfg.BIG_FONT_DIR:cfg.BIG_FONT_DIR + len(cfg.BIG_FONT_SET)] = bytes(cfg.BIG_FONT_SET)
+    return bytes(imagen)
+
+BASE_IMAGE = _imagen_base()     # memoria inicial: ceros + fuentes (chica y grande)
+
+
+class PreparedRom:
+    """
+    Una ROM preparada: rom (bytes), digest (SHA-256), imagen (memoria inicial
+    completa) y, por configuración de quirks, los artefactos del JIT y el
+    análisis estático.
+    """
+
+    def __init__(self, rom, digest):
+        fin = cfg.PROGRAM_START + len(rom)
+        if fin > cfg.MEM_SIZE:
+            raise ValueError("La ROM no entra en memoria")
+        self.rom = rom
+        self.digest = digest
+        self.image = BASE_IMAGE[:cfg.PROGRAM_START] + rom + BASE_IMAGE[fin:]
+        self._jit = {}
+        self._analisis = {}
+
+    def jit_cache(self, clave):
+        """
+        Traducciones del JIT para la configuración 'clave': (bloques
+        {inicio: (func, largo, tramos)} desde la imagen intacta, cubierto
+        bytearray, variantes {contenido: región} también del código que la
+        ROM modifica; ver chip8_jit.translate_region).
+        """
+        cache = self._jit.get(clave)
+        if cache is None:
+            cache = self._jit[clave] = ({}, bytearray(cfg.MEM_SIZE), {})
+        return cache
+
+    def analysis(self, quirks=None):
+        """chip8_analisis.analyze_rom de esta ROM, calculado una sola vez por quirks."""
+        clave = tuple(sorted((quirks or {}).items()))
+        analisis = self._analisis.get(clave)
+        if analisis is None:
+            from chip8_analisis import analyze_rom
+            analisis = self._analisis[clave] = analyze_rom(self, quirks)
+        return analisis
+
+
+_ROMS = OrderedDict()           # digest → PreparedRom
+_ARCHIVOS = {}                  # (ruta, tamaño, mtime_ns) → digest
+
+
+def _cachear(rom, digest):
+    """PreparedRom de la caché (rom se copia a bytes sólo si es nueva)."""
+    preparada = _ROMS.get(digest)
+    if preparada is not None:
+        _ROMS.move_to_end(digest)
+        return preparada
+    preparada = _ROMS[digest] = PreparedRom(bytes(rom), digest)
+    if len(_ROMS) > MAX_ROMS:
+        _ROMS.popitem(last=False)
+    return preparada
+
+
+# -----------------------------------------------------------------------------
+def prepare_rom(rom):
+    """PreparedRom de una ROM en memoria (bytes, bytearray o lista de enteros)."""
+    if isinstance(rom, PreparedRom):
+        return rom
+    if not isinstance(rom, (bytes, bytearray, memoryview)):
+        rom = bytes(rom)
+    return _cachear(rom, hashlib.sha256(rom).digest())
+
+
+def prepare_rom_file(ruta_archivo):
+    """
+    PreparedRom de un archivo. Se mapea con mmap para hashearlo sin copiarlo;
+    sólo una ROM nueva se copia a bytes. Si el archivo no cambió desde la
+    última vez (tamaño y mtime), ni siquiera se abre.
+    """
+    st = os.stat(ruta_archivo)
+    clave = (os.path.abspath(ruta_archivo), st.st_size, st.st_mtime_ns)
+    digest = _ARCHIVOS.get(clave)
+    if digest is not None and digest in _ROMS:
+        _ROMS.move_to_end(digest)
+        return _ROMS[digest]
+
+    with open(ruta_archivo, "rb") as f:
+        if st.st_size == 0:
+            preparada = prepare_rom(b"")
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                digest = hashlib.sha256(mapa).digest()
+                preparada = _cachear(mapa, digest)
+    _ARCHIVOS[clave] = preparada.digest
+    return preparada
+
+
+def clear_cache():
+    """Vacía la caché de ROMs preparadas."""
+    _ROMS.clear()
+    _ARCHIVOS.clear()
@@ -0,0 +1,243 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Servidor de sesiones (asyncio, TCP)
+#
+#   python main.py serve roms/pong.ch8 --port 8765 --budget-ms 2
+#
+# Cada conexión TCP es una sesión: una máquina propia que avanza un frame por
+# tick en un planificador común a TIMER_HZ (60 Hz). No hay Pygame: el teclado
+# llega por la conexión (en lugar de process_key_events) y la pantalla sale como
+# deltas de filas (sólo las filas sucias del frame).
+#
+# Protocolo (binario, little-endian):
+#   servidor → cliente, al conectar : _HOLA  (b"C8SV", versión, ancho, alto)
+#   servidor → cliente, por frame   : _DELTA (1, número de frame, máscara de
+#                                     filas de 64 bits) + una fila de ancho/8
+#                                     bytes (big-endian, x=0 en el bit alto)
+#                                     por cada bit de la máscara, de arriba a
+#                                     abajo. El primer delta trae todas las filas.
+#   servidor → cliente, al cambiar  : _RESOLUCION (2, ancho, alto) cuando la ROM
+#   de resolución                     pasa a 128x64 o vuelve a 64x32 (SUPER-CHIP
+#                                     00FF/00FE); lo sigue un delta completo.
+#   cliente → servidor              : _TECLA (evento, tecla) con evento
+#                                     KEY_DOWN o KEY_UP y tecla 0x0..0xF.
+#
+# Contrapresión: si el buffer de salida de una sesión supera MAX_BUFFER no se
+# le escribe más; sus filas sucias se acumulan y salen juntas en un solo
+# delta cuando el cliente vacía el buffer (un cliente lento ve menos frames,
+# no frames atrasados, y no hace crecer la memoria del servidor).
+#
+# Presupuesto de CPU: cada sesión tiene budget_ms por tick. Lo que se pase se
+# anota como deuda y la sesión saltea ticks hasta pagarla, así una ROM pesada
+# se ralentiza ella sola sin atrasar al resto.
+# -----------------------------------------------------------------------------
+import argparse, asyncio, struct, time
+
+import config as cfg
+from chip8_funciones import load_game
+from chip8_instrucciones import screen_width
+from chip8_maquina import create_machine
+
+VERSION = 2
+KEY_DOWN, KEY_UP = 1, 2
+MAX_BUFFER = 64 * 1024          # bytes pendientes de salida por sesión
+
+_HOLA = b"C8SV" + bytes([VERSION, cfg.SCREEN_W, cfg.SCREEN_H])
+_DELTA = struct.Struct("<BIQ")
+_RESOLUCION = struct.Struct("<BBB")
+_TECLA = struct.Struct("<BB")
+
+
+# -----------------------------------------------------------------------------
+def encode_resolution(gfx):
+    """Mensaje _RESOLUCION con el modo actual de gfx."""
+    return _RESOLUCION.pack(2, screen_width(gfx), len(gfx))
+
+
+def encode_delta(numero, gfx, filas):
+    """Mensaje _DELTA con las filas de gfx marcadas en la máscara 'filas'."""
+    partes = [_DELTA.pack(1, numero, filas)]
+    bytes_fila = screen_width(gfx) // 8
+    y = 0
+    while filas:
+        if filas & 1:
+            partes.append(gfx[y].to_bytes(bytes_fila, "big"))
+        filas >>= 1
+        y += 1
+    return b"".join(partes)
+
+
+def apply_resolution(gfx, datos):
+    """Del lado del cliente: redimensiona gfx (en blanco) según un _RESOLUCION."""
+    _, _, alto = _RESOLUCION.unpack_from(datos)
+    gfx[:] = [0] * alto
+
+
+def apply_delta(gfx, datos):
+    """
+    Del lado del cliente: aplica un mensaje _DELTA sobre gfx (lista de filas
+    en la resolución vigente) y devuelve (número de frame, máscara de filas).
+    """
+    _, numero, filas = _DELTA.unpack_from(datos)
+    bytes_fila = screen_width(gfx) // 8
+    pos, mascara, y = _DELTA.size, filas, 0
+    while mascara:
+        if mascara & 1:
+            gfx[y] = int.from_bytes(datos[pos:pos + bytes_fila], "big")
+            pos += bytes_fila
+        mascara >>= 1
+        y += 1
+    return numero, filas
+
+
+# -----------------------------------------------------------------------------
+class Session:
+    """Una conexión: su máquina, su teclado y lo pendiente de enviar."""
+
+    def __init__(self, maquina, writer):
+        self.maquina = maquina
+        self.writer = writer
+        self.keys = [False] * 16
+        self.pressed_once = None
+        self.alto = len(maquina.gfx)    # resolución que conoce el cliente
+        self.pendiente = (1 << self.alto) - 1   # filas sucias aún no enviadas
+        self.cambio_resolucion = False
+        self.deuda = 0.0                # segundos de CPU por encima del presupuesto
+        self.ticks_salteados = 0
+        self.deltas_enviados = 0
+
+    def key_event(self, evento, tecla):
+        if evento == KEY_DOWN:
+            self.keys[tecla] = True
+            self.pressed_once = tecla
+        elif evento == KEY_UP:
+            self.keys[tecla] = False
+
+
+# -----------------------------------------------------------------------------
+class SessionServer:
+    """
+    Servidor asyncio: acepta conexiones, crea una sesión por conexión y las
+    avanza a todas desde un único planificador a TIMER_HZ.
+    """
+
+    def __init__(self, rom, engine="interprete", budget_ms=2.0, max_sessions=1000,
+                 rng_seed=cfg.RNG_SEED, quirks=None):
+        self.rom = rom
+        self.engine = engine
+        self.presupuesto = budget_ms / 1000
+        self.max_sessions = max_sessions
+        self.rng_seed = rng_seed
+        self.quirks = quirks
+        self.sesiones = set()
+        self.ticks = 0
+        self.ticks_perdidos = 0
+
+    # -------------------------------------------------------------------------
+    async def handle_client(self, reader, writer):
+        if len(self.sesiones) >= self.max_sessions:
+            writer.close()
+            return
+        sesion = Session(create_machine(self.rom, self.engine, rng_seed=self.rng_seed,
+                                        quirks=self.quirks), writer)
+        writer.write(_HOLA)
+        self.sesiones.add(sesion)
+        try:
+            while True:
+                evento, tecla = _TECLA.unpack(await reader.readexactly(_TECLA.size))
+                if tecla > 0xF or evento not in (KEY_DOWN, KEY_UP):
+                    break                      # mensaje inválido: se corta
+                sesion.key_event(evento, tecla)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.sesiones.discard(sesion)
+            writer.close()
+
+    # -------------------------------------------------------------------------
+    def tick(self):
+        """Un frame para cada sesión (salvo las endeudadas) y envío de deltas."""
+        self.ticks += 1
+        presupuesto, reloj = self.presupuesto, time.perf_counter
+        for s in list(self.sesiones):
+            m = s.maquina
+            if s.deuda > 0:
+                s.deuda = max(0.0, s.deuda - presupuesto)
+                s.ticks_salteados += 1
+            else:
+                m.set_keys(list(s.keys), s.pressed_once)
+                s.pressed_once = None
+                t0 = reloj()
+                try:
+                    m.run_frames(1)
+                except Exception:              # la ROM rompió: se cierra sólo esa sesión
+                    self.sesiones.discard(s)
+                    s.writer.close()
+                    continue
+                s.deuda = max(0.0, reloj() - t0 - presupuesto)
+                s.pendiente |= m.dirty_rows
+                m.dirty_rows = 0
+                if len(m.gfx) != s.alto:       # 00FE/00FF: se reenvía todo
+                    s.alto = len(m.gfx)
+                    s.pendiente = (1 << s.alto) - 1
+                    s.cambio_resolucion = True
+
+            transporte = s.writer.transport
+            if s.pendiente and not transporte.is_closing() \
+                    and transporte.get_write_buffer_size() <= MAX_BUFFER:
+                if s.cambio_resolucion:
+                    s.writer.write(encode_resolution(m.gfx))
+                    s.cambio_resolucion = False
+                s.writer.write(encode_delta(m.frames, m.gfx, s.pendiente))
+                s.pendiente = 0
+                s.deltas_enviados += 1
+
+    async def scheduler(self):
+        """Llama a tick() a TIMER_HZ con plazos absolutos; si se atrasa, no recupera."""
+        loop = asyncio.get_running_loop()
+        periodo = 1 / cfg.TIMER_HZ
+        proximo = loop.time()
+        while True:
+            self.tick()
+            proximo += periodo
+            espera = proximo - loop.time()
+            if espera < 0:
+                self.ticks_perdidos += int(-espera / periodo) + 1
+                proximo = loop.time()
+                espera = 0
+            await asyncio.sleep(espera)
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        servidor = await asyncio.start_server(self.handle_client, host, port)
+        planificador = asyncio.create_task(self.scheduler())
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            planificador.cancel()
+
+
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py serve",
+                                     description="Servidor TCP de sesiones CHIP-8")
+    parser.add_argument("rom", nargs="?", default=cfg.ROM_PATH)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--engine", choices=("interprete", "jit"), default="interprete",
+                        help="con pocas instrucciones por frame el intérprete rinde "
+                             "más por sesión que el JIT (por defecto interprete)")
+    parser.add_argument("--budget-ms", type=float, default=2.0,
+                        help="CPU por sesión y por tick (por defecto 2 ms)")
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--quirks", choices=tuple(cfg.QUIRK_PROFILES), metavar="PERFIL",
+                        help="perfil de quirks: " + ", ".join(cfg.QUIRK_PROFILES))
+    args = parser.parse_args(argv)
+
+    servidor = SessionServer(load_game(args.rom), args.engine, args.budget_ms,
+                             args.max_sessions, quirks=args.quirks)
+    print(f"sirviendo {args.rom} en {args.host}:{args.port}")
+    try:
+        asyncio.run(servidor.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
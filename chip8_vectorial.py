@@ -0,0 +1,384 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Motor vectorizado con NumPy (miles de instancias en paralelo)
+#
+# Todas las instancias avanzan en lockstep: memoria, V, PC, I, pila, timers y
+# framebuffers son arrays de NumPy con una dimensión de lote al principio.
+# En cada paso se hace un fetch vectorizado, se clasifica cada opcode con una
+# tabla de 65.536 clases y se ejecuta cada grupo de instancias con la misma
+# clase de una sola vez. Cada grupo replica la semántica de su op_* en
+# chip8_instrucciones.py (incluido el orden de escritura de VF) y los quirks
+# del perfil elegido (quirks=, como en Chip8; se aplica a todo el lote).
+#
+# Diferencias con Chip8:
+#   - Un desborde de la pila (STACK_DEPTH niveles, como en Chip8), un RET con
+#     la pila vacía o un acceso fuera de memoria no lanza una excepción: la
+#     instancia queda detenida con un código en 'error' y las demás siguen.
+#   - CXNN usa un generador de NumPy (misma distribución, otra secuencia).
+#   - Sólo CHIP-8: los opcodes SUPER-CHIP (00CN, 00FB-00FF, DXY0, FX30,
+#     FX75/FX85) son NOP y la pantalla es siempre de SCREEN_W x SCREEN_H.
+#
+# Requiere numpy (pip install numpy); el resto del emulador no lo necesita.
+# -----------------------------------------------------------------------------
+import numpy as np
+import config as cfg
+from chip8_decodificador import resolve_quirks
+
+STACK_DEPTH = cfg.STACK_DEPTH
+
+# Códigos de error por instancia (0 = corriendo)
+ERR_STACK_OVERFLOW  = 1
+ERR_STACK_UNDERFLOW = 2
+ERR_MEMORY          = 3
+
+# -----------------------------------------------------------------------------
+# Clases de opcode
+# -----------------------------------------------------------------------------
+(NOP, CLS, RET, JP, CALL, SE_VX_NN, SNE_VX_NN, SE_VX_VY, LD_VX_NN, ADD_VX_NN,
+ LD_VX_VY, OR, AND, XOR, ADD_VX_VY, SUB, SHR, SUBN, SHL, SNE_VX_VY, LD_I,
+ JP_V0, RND, DRW, SKP, SKNP, LD_VX_DT, LD_VX_K, LD_DT, LD_ST, ADD_I, LD_F,
+ BCD, STORE, LOAD) = range(35)
+HALTED = 255
+
+
+def _build_classes():
+    """Tabla opcode → clase, armada con operaciones vectorizadas."""
+    op = np.arange(0x10000, dtype=np.uint32)
+    hi, n, kk = op >> 12, op & 0xF, op & 0xFF
+    clases = np.full(0x10000, NOP, dtype=np.uint8)
+    clases[op == 0x00E0] = CLS
+    clases[op == 0x00EE] = RET
+    for nibble, clase in ((0x1, JP), (0x2, CALL), (0x3, SE_VX_NN), (0x4, SNE_VX_NN),
+                          (0x6, LD_VX_NN), (0x7, ADD_VX_NN), (0xA, LD_I),
+                          (0xB, JP_V0), (0xC, RND), (0xD, DRW)):
+        clases[hi == nibble] = clase
+    clases[(hi == 0x5) & (n == 0)] = SE_VX_VY
+    clases[(hi == 0x9) & (n == 0)] = SNE_VX_VY
+    for sub, clase in ((0x0, LD_VX_VY), (0x1, OR), (0x2, AND), (0x3, XOR),
+                       (0x4, ADD_VX_VY), (0x5, SUB), (0x6, SHR), (0x7, SUBN),
+                       (0xE, SHL)):
+        clases[(hi == 0x8) & (n == sub)] = clase
+    clases[(hi == 0xE) & (kk == 0x9E)] = SKP
+    clases[(hi == 0xE) & (kk == 0xA1)] = SKNP
+    for sub, clase in ((0x07, LD_VX_DT), (0x0A, LD_VX_K), (0x15, LD_DT),
+                       (0x18, LD_ST), (0x1E, ADD_I), (0x29, LD_F),
+                       (0x33, BCD), (0x55, STORE), (0x65, LOAD)):
+        clases[(hi == 0xF) & (kk == sub)] = clase
+    return clases
+
+_CLASES = _build_classes()
+
+
+# -----------------------------------------------------------------------------
+class Chip8Vectorial:
+    """
+    Lote de máquinas CHIP-8 en lockstep.
+
+    roms: una ROM (bytes o lista de enteros) para todas las instancias, o
+          una lista de ROMs (una por instancia). n: cantidad de instancias
+          si roms es una sola. quirks: perfil o dict, como en Chip8.
+
+    API (como Chip8, pero sobre todo el lote):
+      step(), run(n), run_frames(n), set_keys(keys, pressed_once)
+      gfx_of(i) → framebuffer de la instancia i en el formato de Chip8.gfx
+    """
+
+    def __init__(self, roms, n=None, rng_seed=cfg.RNG_SEED,
+                 cycles_per_frame=cfg.CYCLES_PER_FRAME, quirks=None):
+        if isinstance(roms, (bytes, bytearray, memoryview)) or isinstance(roms[0], int):
+            roms = [bytes(roms)] * (n or 1)     # una sola ROM (como la devuelve load_game)
+        self.n = B = len(roms)
+        self.cycles_per_frame = cycles_per_frame
+        self.quirks = q = resolve_quirks(quirks)
+        self.shift_uses_vy = q["shift_uses_vy"]
+        self.addi_sets_vf = q["addi_sets_vf"]
+        self.bulk_inc_i = q["bulk_inc_i"]
+        self.dxyn_wrap = q["dxyn_wrap"]
+        self.jump_uses_vx = q["jump_uses_vx"]
+        self.logic_resets_vf = q["logic_resets_vf"]
+        self.rng = np.random.default_rng(rng_seed)
+
+        self.memory = np.zeros((B, cfg.MEM_SIZE), dtype=np.uint8)
+        self.memory[:, cfg.FONT_DIR:cfg.FONT_DIR + len(cfg.FONT_SET)] = cfg.FONT_SET
+        self.memory[:, cfg.BIG_FONT_DIR:cfg.BIG_FONT_DIR + len(cfg.BIG_FONT_SET)] = cfg.BIG_FONT_SET
+        start = cfg.PROGRAM_START
+        for i, rom in enumerate(roms):
+            if len(rom) > cfg.MEM_SIZE - start:
+                raise ValueError("La ROM no entra en memoria")
+            self.memory[i, start:start + len(rom)] = np.frombuffer(bytes(rom), dtype=np.uint8)
+
+        self.v_reg = np.zeros((B, 16), dtype=np.uint8)
+        self.pc    = np.full(B, start, dtype=np.int32)
+        self.index = np.zeros(B, dtype=np.int32)
+        self.stack = np.zeros((B, STACK_DEPTH), dtype=np.int32)
+        self.sp    = np.zeros(B, dtype=np.int32)
+        self.delay_timer = np.zeros(B, dtype=np.int32)
+        self.sound_timer = np.zeros(B, dtype=np.int32)
+        self.gfx   = np.zeros((B, cfg.SCREEN_H), dtype=np.uint64)
+        self.keys  = np.zeros((B, 16), dtype=bool)
+        self.pressed_once = np.full(B, -1, dtype=np.int32)   # -1 = ninguna
+        self.error = np.zeros(B, dtype=np.uint8)
+        self.cycles = 0
+        self.frames = 0
+
+        self._todas = np.arange(B)
+        self._handlers = {
+            CLS: self._cls, RET: self._ret, JP: self._jp, CALL: self._call,
+            SE_VX_NN: self._se_vx_nn, SNE_VX_NN: self._sne_vx_nn,
+            SE_VX_VY: self._se_vx_vy, SNE_VX_VY: self._sne_vx_vy,
+            LD_VX_NN: self._ld_vx_nn, ADD_VX_NN: self._add_vx_nn,
+            LD_VX_VY: self._ld_vx_vy, OR: self._or, AND: self._and, XOR: self._xor,
+            ADD_VX_VY: self._add_vx_vy, SUB: self._sub, SHR: self._shr,
+            SUBN: self._subn, SHL: self._shl, LD_I: self._ld_i,
+            JP_V0: self._jp_v0, RND: self._rnd, DRW: self._drw,
+            SKP: self._skp, SKNP: self._sknp, LD_VX_DT: self._ld_vx_dt,
+            LD_VX_K: self._ld_vx_k, LD_DT: self._ld_dt, LD_ST: self._ld_st,
+            ADD_I: self._add_i, LD_F: self._ld_f, BCD: self._bcd,
+            STORE: self._store, LOAD: self._load,
+        }
+
+    # -------------------------------------------------------------------------
+    def set_keys(self, keys, pressed_once=None):
+        """keys: (n, 16) bools; pressed_once: (n,) con -1 = ninguna tecla."""
+        self.keys[:] = keys
+        self.pressed_once[:] = -1 if pressed_once is None else pressed_once
+
+    def gfx_of(self, i):
+        """Framebuffer de la instancia i como lista de filas (igual que Chip8.gfx)."""
+        return [int(fila) for fila in self.gfx[i]]
+
+    # -------------------------------------------------------------------------
+    def step(self):
+        """Un paso de todo el lote: fetch, clasificación y un grupo por clase."""
+        pc = self.pc
+        fuera = pc > cfg.MEM_SIZE - 2
+        if fuera.any():
+            self.error[fuera & (self.error == 0)] = ERR_MEMORY
+        vivas = self.error == 0
+
+        filas = self._todas
+        pcs = np.minimum(pc, cfg.MEM_SIZE - 2)
+        opcode = (self.memory[filas, pcs].astype(np.int32) << 8) | self.memory[filas, pcs + 1]
+        clases = _CLASES[opcode]
+        clases[~vivas] = HALTED
+        self.pc += 2 * vivas
+
+        for clase in np.flatnonzero(np.bincount(clases, minlength=256)[:HALTED]):
+            if clase == NOP:
+                continue
+            s = np.flatnonzero(clases == clase)
+            op = opcode[s]
+            self._handlers[clase](s, (op >> 8) & 0xF, (op >> 4) & 0xF, op)
+        self.cycles += 1
+
+    def run(self, n_instructions):
+        """n pasos de todo el lote (los timers no se tocan)."""
+        for _ in range(n_instructions):
+            self.step()
+
+    def tick_frame(self):
+        """Fin de frame: DT/ST bajan una vez en todas las instancias."""
+        np.maximum(self.delay_timer - 1, 0, out=self.delay_timer)
+        np.maximum(self.sound_timer - 1, 0, out=self.sound_timer)
+        self.frames += 1
+
+    def run_frames(self, n_frames):
+        for _ in range(n_frames):
+            self.run(self.cycles_per_frame)
+            self.tick_frame()
+
+    # -------------------------------------------------------------------------
+    # Grupos. Firma: (s, x, y, opcode) con s = índices de las instancias.
+    # -------------------------------------------------------------------------
+    def _skip_if(self, s, cond):
+        self.pc[s] += 2 * cond
+
+    def _cls(self, s, x, y, op):
+        self.gfx[s] = 0
+
+    def _ret(self, s, x, y, op):
+        vacia = self.sp[s] == 0
+        self.error[s[vacia]] = ERR_STACK_UNDERFLOW
+        s = s[~vacia]
+        self.sp[s] -= 1
+        self.pc[s] = self.stack[s, self.sp[s]]
+
+    def _jp(self, s, x, y, op):
+        self.pc[s] = op & 0xFFF
+
+    def _call(self, s, x, y, op):
+        llena = self.sp[s] >= STACK_DEPTH
+        self.error[s[llena]] = ERR_STACK_OVERFLOW
+        s, op = s[~llena], op[~llena]
+        self.stack[s, self.sp[s]] = self.pc[s]
+        self.sp[s] += 1
+        self.pc[s] = op & 0xFFF
+
+    def _se_vx_nn(self, s, x, y, op):
+        self._skip_if(s, self.v_reg[s, x] == (op & 0xFF))
+
+    def _sne_vx_nn(self, s, x, y, op):
+        self._skip_if(s, self.v_reg[s, x] != (op & 0xFF))
+
+    def _se_vx_vy(self, s, x, y, op):
+        self._skip_if(s, self.v_reg[s, x] == self.v_reg[s, y])
+
+    def _sne_vx_vy(self, s, x, y, op):
+        self._skip_if(s, self.v_reg[s, x] != self.v_reg[s, y])
+
+    def _ld_vx_nn(self, s, x, y, op):
+        self.v_reg[s, x] = op & 0xFF
+
+    def _add_vx_nn(self, s, x, y, op):
+        self.v_reg[s, x] = (self.v_reg[s, x] + (op & 0xFF)) & 0xFF
+
+    def _ld_vx_vy(self, s, x, y, op):
+        self.v_reg[s, x] = self.v_reg[s, y]
+
+    def _or(self, s, x, y, op):
+        self.v_reg[s, x] |= self.v_reg[s, y]
+        if self.logic_resets_vf:
+            self.v_reg[s, 0xF] = 0
+
+    def _and(self, s, x, y, op):
+        self.v_reg[s, x] &= self.v_reg[s, y]
+        if self.logic_resets_vf:
+            self.v_reg[s, 0xF] = 0
+
+    def _xor(self, s, x, y, op):
+        self.v_reg[s, x] ^= self.v_reg[s, y]
+        if self.logic_resets_vf:
+            self.v_reg[s, 0xF] = 0
+
+    # En 8XY4..8XYE VF se escribe antes que Vx (como en chip8_instrucciones),
+    # así con X = F gana el resultado y con Y = F se lee el VF nuevo.
+    def _add_vx_vy(self, s, x, y, op):
+        total = self.v_reg[s, x].astype(np.int32) + self.v_reg[s, y]
+        self.v_reg[s, 0xF] = total > 0xFF
+        self.v_reg[s, x] = total & 0xFF
+
+    def _sub(self, s, x, y, op):
+        v = self.v_reg
+        v[s, 0xF] = v[s, x] >= v[s, y]
+        v[s, x] = (v[s, x].astype(np.int32) - v[s, y]) & 0xFF
+
+    def _subn(self, s, x, y, op):
+        v = self.v_reg
+        v[s, 0xF] = v[s, y] >= v[s, x]
+        v[s, x] = (v[s, y].astype(np.int32) - v[s, x]) & 0xFF
+
+    def _shr(self, s, x, y, op):
+        v, src = self.v_reg, (y if self.shift_uses_vy else x)
+        v[s, 0xF] = v[s, src] & 0x1
+        v[s, x] = v[s, src] >> 1
+
+    def _shl(self, s, x, y, op):
+        v, src = self.v_reg, (y if self.shift_uses_vy else x)
+        v[s, 0xF] = v[s, src] >> 7
+        v[s, x] = (v[s, src].astype(np.int32) << 1) & 0xFF
+
+    def _ld_i(self, s, x, y, op):
+        self.index[s] = op & 0xFFF
+
+    def _jp_v0(self, s, x, y, op):
+        v = self.v_reg[s, x] if self.jump_uses_vx else self.v_reg[s, 0]
+        self.pc[s] = ((op & 0xFFF) + v) & 0x0FFF
+
+    def _rnd(self, s, x, y, op):
+        self.v_reg[s, x] = self.rng.integers(0, 256, len(s)) & (op & 0xFF)
+
+    def _drw(self, s, x, y, op):
+        """DXYN de todo el grupo: una pasada por fila de sprite (hasta max N)."""
+        ancho, alto = cfg.SCREEN_W, cfg.SCREEN_H
+        n = op & 0xF
+        vx = (self.v_reg[s, x] % ancho).astype(np.uint64)
+        vy = self.v_reg[s, y].astype(np.int32) % alto
+        colision = np.zeros(len(s), dtype=bool)
+        corre = np.uint64(ancho - 8)
+        envuelve = vx > corre
+        shift_w = np.where(envuelve, np.uint64(2 * ancho - 8) - vx, np.uint64(0))
+
+        for row in range(int(n.max(initial=0))):
+            activa = row < n
+            py = vy + row
+            if self.dxyn_wrap:
+                py %= alto
+            else:
+                activa &= py < alto
+            if not activa.any():
+                break
+            i = s[activa]
+            sprite = self.memory[i, (self.index[i] + row) & 0x0FFF].astype(np.uint64)
+            bits = (sprite << corre) >> vx[activa]
+            if self.dxyn_wrap:
+                bits |= np.where(envuelve[activa], sprite << shift_w[activa], np.uint64(0))
+            fila = py[activa]
+            colision[activa] |= (self.gfx[i, fila] & bits) != 0
+            self.gfx[i, fila] ^= bits
+
+        self.v_reg[s, 0xF] = colision
+
+    def _skp(self, s, x, y, op):
+        self._skip_if(s, self.keys[s, self.v_reg[s, x] & 0xF])
+
+    def _sknp(self, s, x, y, op):
+        self._skip_if(s, ~self.keys[s, self.v_reg[s, x] & 0xF])
+
+    def _ld_vx_dt(self, s, x, y, op):
+        self.v_reg[s, x] = self.delay_timer[s] & 0xFF
+
+    def _ld_vx_k(self, s, x, y, op):
+        tecla = self.pressed_once[s]
+        espera = tecla < 0
+        self.pc[s[espera]] -= 2
+        ok = s[~espera]
+        self.v_reg[ok, x[~espera]] = tecla[~espera] & 0xF
+        self.pressed_once[ok] = -1        # la tecla se consume una sola vez
+
+    def _ld_dt(self, s, x, y, op):
+        self.delay_timer[s] = self.v_reg[s, x]
+
+    def _ld_st(self, s, x, y, op):
+        self.sound_timer[s] = self.v_reg[s, x]
+
+    def _add_i(self, s, x, y, op):
+        res = self.index[s] + self.v_reg[s, x]
+        self.index[s] = res & 0x0FFF
+        if self.addi_sets_vf:
+            self.v_reg[s, 0xF] = res > 0x0FFF
+
+    def _ld_f(self, s, x, y, op):
+        self.index[s] = (cfg.FONT_DIR + (self.v_reg[s, x] & 0xF).astype(np.int32) * 5) & 0x0FFF
+
+    def _fuera_de_memoria(self, s, ultimo):
+        """Marca ERR_MEMORY donde 'ultimo' se pasa de memoria; devuelve la máscara ok."""
+        ok = ultimo < cfg.MEM_SIZE
+        self.error[s[~ok]] = ERR_MEMORY
+        return ok
+
+    def _bcd(self, s, x, y, op):
+        ok = self._fuera_de_memoria(s, self.index[s] + 2)
+        s, x = s[ok], x[ok]
+        val, i = self.v_reg[s, x], self.index[s]
+        self.memory[s, i] = val // 100
+        self.memory[s, i + 1] = (val // 10) % 10
+        self.memory[s, i + 2] = val % 10
+
+    def _store(self, s, x, y, op):
+        ok = self._fuera_de_memoria(s, self.index[s] + x)
+        s, x = s[ok], x[ok]
+        i = self.index[s]
+        for r in range(int(x.max(initial=-1)) + 1):
+            m = r <= x
+            self.memory[s[m], i[m] + r] = self.v_reg[s[m], r]
+        if self.bulk_inc_i:
+            self.index[s] = (i + x + 1) & 0x0FFF
+
+    def _load(self, s, x, y, op):
+        ok = self._fuera_de_memoria(s, self.index[s] + x)
+        s, x = s[ok], x[ok]
+        i = self.index[s]
+        for r in range(int(x.max(initial=-1)) + 1):
+            m = r <= x
+            self.v_reg[s[m], r] = self.memory[s[m], i[m] + r]
+        if self.bulk_inc_i:
+            self.index[s] = (i + x + 1) & 0x0FFF
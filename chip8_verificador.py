@@ -0,0 +1,368 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Verificación diferencial en lockstep entre motores
+#
+#   python main.py verify roms/ --engine jit --fuzz 200
+#   python main.py verify roms/pong.ch8 --every 1 --trace pong.c8in
+#
+# Una máquina de referencia (Chip8: la tabla de chip8_instrucciones, sin
+# saltear esperas) y una candidata (create_machine con el motor a probar)
+# corren la misma ROM con la misma semilla y el mismo teclado frame a frame.
+# Cada 'every' instrucciones se comparan PC, I, V0..VF, la pila (sp y las
+# entradas ocupadas), DT/ST, ciclos, un hash del framebuffer, uno de la
+# memoria y los flags RPL de SUPER-CHIP. Sin 'every' se compara al final de
+# cada frame y la candidata usa run_frames(1), así también se verifica el
+# salteo de esperas activas.
+#
+# Ante la primera diferencia se vuelve al último punto en que coincidían
+# (save states de chip8_estado) y se bisecta la cantidad de instrucciones
+# hasta la primera que diverge: se informa su PC, su opcode y los campos
+# distintos. El JIT sólo entra a un bloque si le alcanzan las instrucciones
+# del tramo (si no, sigue con el intérprete): con 'every' chico se prueba
+# poco JIT, y la divergencia se ve al final del bloque que la produce.
+#
+# Si las dos máquinas lanzan la misma excepción (StackError, IndexError) en
+# el mismo punto, la corrida termina sin divergencia; si la lanza una sola,
+# es una divergencia más.
+# -----------------------------------------------------------------------------
+import argparse, itertools, os, random, time, zlib
+
+import config as cfg
+from chip8_analisis import disassemble
+from chip8_estado import load_state, save_state
+from chip8_maquina import Chip8, create_machine
+
+CAMPOS = ("pc", "I", "V", "sp", "pila", "DT", "ST", "ciclos", "gfx", "memoria",
+          "flags")
+
+
+# -----------------------------------------------------------------------------
+def machine_state(m):
+    """Tupla comparable con el estado visible de m (ver CAMPOS)."""
+    return (m.pc, m.index, bytes(m.v_reg), m.sp, tuple(m.stack[:m.sp]),
+            m.delay_timer, m.sound_timer, m.cycles, hash(tuple(m.gfx)),
+            zlib.crc32(m.memory), bytes(m.flags))
+
+
+def _diferencias(ref, cand):
+    """{campo: (referencia, candidata)} de los campos que no coinciden."""
+    return {c: (a, b) for c, a, b in zip(CAMPOS, ref, cand) if a != b}
+
+
+def _correr(m, avance):
+    """Ejecuta avance(m); devuelve el nombre de la excepción o None."""
+    try:
+        avance(m)
+    except Exception as e:
+        return type(e).__name__
+    return None
+
+
+# -----------------------------------------------------------------------------
+# Teclado y ROMs de prueba
+# -----------------------------------------------------------------------------
+def random_trace(n_frames, seed=0):
+    """
+    Generador de teclado pseudoaleatorio: (chip8_keys, pressed_once) por
+    frame. Las teclas se mantienen varios frames, como las de una persona.
+    """
+    rng = random.Random(seed)
+    teclas = [False] * 16
+    for _ in range(n_frames):
+        tecla = None
+        if rng.random() < 0.1:
+            k = rng.randrange(16)
+            teclas[k] = not teclas[k]
+            tecla = k if teclas[k] else None
+        yield list(teclas), tecla
+
+
+def recording_trace(grabacion):
+    """Teclado por frame de una grabación de chip8_grabacion.load_recording."""
+    for repeticiones, teclas, tecla in grabacion["corridas"]:
+        for _ in range(repeticiones):
+            yield list(teclas), tecla
+
+
+_NIBBLES = (0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x6, 0x7, 0x7, 0x8, 0x8, 0x8,
+            0x9, 0xA, 0xB, 0xC, 0xD, 0xD, 0xE, 0xF, 0xF, 0xF)
+_FX = (0x07, 0x0A, 0x15, 0x18, 0x1E, 0x29, 0x30, 0x33, 0x55, 0x65, 0x75, 0x85)
+_SUPER_CHIP = (0x00C4, 0x00FB, 0x00FC, 0x00FE, 0x00FF)     # sin 00FD (detiene)
+_8XY = (0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0xE)
+
+
+def fuzz_rom(rng, n_instrucciones=None):
+    """
+    ROM aleatoria (bytes) sesgada hacia opcodes válidos: saltos y llamadas
+    dentro de la propia ROM, FX/8XY con sub-opcodes existentes y algunos
+    00E0/00EE y de pantalla de SUPER-CHIP, para que la ejecución recorra
+    algo más que el primer bloque.
+    """
+    n = n_instrucciones or rng.randint(8, 256)
+    rom = bytearray()
+    for i in range(n):
+        hi = rng.choice(_NIBBLES)
+        op = (hi << 12) | rng.randrange(0x1000)
+        if hi in (0x1, 0x2):
+            op = (hi << 12) | (cfg.PROGRAM_START + 2 * rng.randrange(n))
+        elif hi == 0x8:
+            op = (op & 0xFFF0) | rng.choice(_8XY)
+        elif hi == 0xE:
+            op = (op & 0xFF00) | rng.choice((0x9E, 0xA1))
+        elif hi == 0xF:
+            op = (op & 0xFF00) | rng.choice(_FX)
+        elif hi == 0x0:
+            op = rng.choice((0x00E0, 0x00EE, op, rng.choice(_SUPER_CHIP)))
+        rom += op.to_bytes(2, "big")
+    return bytes(rom)
+
+
+# -----------------------------------------------------------------------------
+def _tramo(n, fin_de_frame):
+    """Avance de n instrucciones; si cierra el frame, con su tick de timers."""
+    def avance(m):
+        m.run(n)
+        if fin_de_frame:
+            m.tick_frame()
+    return avance
+
+
+def _frame(m):
+    m.run_frames(1)
+
+
+def _primera_divergencia(ref, cand, estado_ref, estado_cand, n, avance_ref, avance_cand):
+    """
+    Desde los save states del último punto coincidente, busca por bisección
+    la menor cantidad k <= n de instrucciones tras la cual las máquinas
+    difieren. Si ninguna k difiere, la divergencia está en el fin de frame
+    (tick de timers o salteo de esperas de la candidata).
+    """
+    def corrida(k):
+        load_state(ref, estado_ref)
+        load_state(cand, estado_cand)
+        error_ref = _correr(ref, lambda m: m.run(k))
+        error_cand = _correr(cand, lambda m: m.run(k))
+        return (machine_state(ref), error_ref), (machine_state(cand), error_cand)
+
+    bajo, alto = 1, n
+    a, b = corrida(n)
+    if a == b:
+        bajo = alto = None
+    while bajo is not None and bajo < alto:
+        medio = (bajo + alto) // 2
+        a, b = corrida(medio)
+        if a != b:
+            alto = medio
+        else:
+            bajo = medio + 1
+
+    # Recorrido de la referencia hasta la instrucción culpable (con el JIT
+    # la instrucción que diverge puede estar antes, en el mismo bloque)
+    load_state(ref, estado_ref)
+    recorrido = []
+    for _ in range(alto or 0):
+        pc = ref.pc
+        if pc + 1 >= len(ref.memory):
+            break
+        recorrido.append((pc, (ref.memory[pc] << 8) | ref.memory[pc + 1]))
+        if _correr(ref, lambda m: m.run(1)):
+            break
+    pc = recorrido[-1][0] if alto and recorrido else ref.pc
+    opcode = (ref.memory[pc] << 8) | ref.memory[pc + 1] if pc + 1 < len(ref.memory) else None
+    if alto is not None:
+        a, b = corrida(alto)
+    else:
+        load_state(cand, estado_cand)
+        error_ref, error_cand = _correr(ref, avance_ref), _correr(cand, avance_cand)
+        a = (machine_state(ref), error_ref)
+        b = (machine_state(cand), error_cand)
+    return {
+        "instruccion": alto,            # None = en el fin de frame
+        "pc": pc,
+        "opcode": opcode,
+        "mnemonico": disassemble(opcode) if opcode is not None else None,
+        "error": (a[1], b[1]),
+        "campos": _diferencias(a[0], b[0]),
+        "recorrido": recorrido,         # [(pc, opcode)] de la referencia en el tramo
+    }
+
+
+def _tramos(teclado, cycles_per_frame, every):
+    """
+    Secuencia de tramos a comparar: (frame, teclado del frame o None si no
+    cambia, n instrucciones, avance de la referencia, avance de la candidata).
+    """
+    paso = cycles_per_frame if not every or every >= cycles_per_frame else every
+    for frame, teclas in enumerate(teclado):
+        for hechos in range(0, cycles_per_frame, paso):
+            n = min(paso, cycles_per_frame - hechos)
+            ultimo = hechos + n == cycles_per_frame
+            yield (frame, teclas if hechos == 0 else None, n, _tramo(n, ultimo),
+                   _tramo(n, ultimo) if every else _frame)
+
+
+def lockstep(rom, engine="jit", quirks=None, n_frames=600, every=None, trace=None,
+             rng_seed=0, cycles_per_frame=cfg.CYCLES_PER_FRAME):
+    """
+    Corre rom en la referencia y en el motor 'engine' en lockstep durante
+    n_frames frames con el teclado de 'trace' (por defecto random_trace).
+    Devuelve un dict con frames, instrucciones, comparaciones, error
+    (excepción con la que terminaron ambas, o None) y divergencia (None o el
+    dict de _primera_divergencia más el frame en que ocurrió).
+
+    No se guardan estados en cada comparación: ante una divergencia se
+    recrean las máquinas y se repiten los tramos hasta el último punto
+    coincidente (la corrida es determinista), y ahí se toman los save states.
+    """
+    def maquinas():
+        return (Chip8(rom, rng_seed=rng_seed, cycles_per_frame=cycles_per_frame,
+                      quirks=quirks),
+                create_machine(rom, engine, rng_seed=rng_seed,
+                               cycles_per_frame=cycles_per_frame, quirks=quirks))
+
+    teclado = list(itertools.islice(random_trace(n_frames, rng_seed) if trace is None
+                                    else trace, n_frames))
+    ref, cand = maquinas()
+    informe = {"frames": 0, "instrucciones": 0, "comparaciones": 0, "error": None,
+               "divergencia": None}
+    for i, (frame, teclas, n, avance_ref, avance_cand) in \
+            enumerate(_tramos(teclado, cycles_per_frame, every)):
+        if teclas is not None:
+            ref.set_keys(list(teclas[0]), teclas[1])
+            cand.set_keys(list(teclas[0]), teclas[1])
+        informe["frames"] = frame
+        informe["comparaciones"] += 1
+        error_ref, error_cand = _correr(ref, avance_ref), _correr(cand, avance_cand)
+        if error_ref != error_cand or machine_state(ref) != machine_state(cand):
+            ref, cand = maquinas()
+            for _, teclas, _, avance_ref, avance_cand in \
+                    itertools.islice(_tramos(teclado, cycles_per_frame, every), i + 1):
+                if teclas is not None:
+                    ref.set_keys(list(teclas[0]), teclas[1])
+                    cand.set_keys(list(teclas[0]), teclas[1])
+                estado_ref, estado_cand = save_state(ref), save_state(cand)
+                _correr(ref, avance_ref)
+                _correr(cand, avance_cand)
+            informe["divergencia"] = _primera_divergencia(
+                ref, cand, estado_ref, estado_cand, n, avance_ref, avance_cand)
+            informe["divergencia"]["frame"] = frame
+            break
+        if error_ref:
+            informe["error"] = error_ref
+            break
+    else:
+        informe["frames"] = len(teclado)
+    informe["instrucciones"] = ref.cycles
+    return informe
+
+
+# -----------------------------------------------------------------------------
+def format_divergence(d):
+    """Texto legible de una divergencia de lockstep()."""
+    if d["instruccion"] is None:
+        donde = f"frame {d['frame']}, fin de frame (timers / salteo de esperas)"
+    else:
+        donde = f"frame {d['frame']}, instrucción {d['instruccion']} del tramo"
+    lineas = [f"  {donde}"]
+    if len(d["recorrido"]) > 1:
+        lineas.append("  tras (referencia):")
+    for pc, opcode in d["recorrido"][-8:-1]:
+        lineas.append(f"    0x{pc:03X}: {opcode:04X}  {disassemble(opcode)}")
+    lineas += [f"  diverge en 0x{d['pc']:03X}: " + (f"{d['opcode']:04X}  {d['mnemonico']}"
+                                            if d["opcode"] is not None else "fuera de memoria")]
+    if d["error"][0] != d["error"][1]:
+        lineas.append(f"  excepción: referencia {d['error'][0]}, candidata {d['error'][1]}")
+    for campo, (a, b) in d["campos"].items():
+        if campo == "V":
+            a, b = a.hex(" "), b.hex(" ")
+        elif campo in ("pc", "I"):
+            a, b = f"0x{a:03X}", f"0x{b:03X}"
+        lineas.append(f"  {campo}: referencia {a}  candidata {b}")
+    return "\n".join(lineas)
+
+
+def _roms(rutas):
+    """(nombre, ruta) de las ROMs de las rutas (archivos o directorios)."""
+    from chip8_lotes import ROM_EXTENSIONS
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            for nombre in sorted(os.listdir(ruta)):
+                if nombre.lower().endswith(ROM_EXTENSIONS):
+                    yield os.path.join(ruta, nombre)
+        else:
+            yield ruta
+
+
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py verify",
+                                     description="Verificación diferencial en lockstep "
+                                                 "entre la referencia y un motor")
+    parser.add_argument("rutas", nargs="*", default=["roms"],
+                        help="ROMs o directorios (por defecto roms/)")
+    parser.add_argument("--engine", choices=("interprete", "jit"), default="jit",
+                        help="motor candidato (interprete verifica el salteo de esperas)")
+    parser.add_argument("--frames", type=int, default=600, help="frames por ROM (por defecto 600)")
+    parser.add_argument("--every", type=int, metavar="N",
+                        help="comparar cada N instrucciones (por defecto, al final de cada frame)")
+    parser.add_argument("--fuzz", type=int, default=0, metavar="K",
+                        help="además, K ROMs aleatorias")
+    parser.add_argument("--seed", type=int, default=0, help="semilla de CXNN, teclado y fuzzing")
+    parser.add_argument("--quirks", choices=tuple(cfg.QUIRK_PROFILES), metavar="PERFIL",
+                        help="perfil de quirks: " + ", ".join(cfg.QUIRK_PROFILES))
+    parser.add_argument("--trace", metavar="ARCHIVO",
+                        help="teclado y semilla de una grabación .c8in (una sola ROM)")
+    parser.add_argument("--save-dir", metavar="DIR",
+                        help="guarda ahí las ROMs aleatorias que divergen")
+    args = parser.parse_args(argv)
+
+    casos = []                      # (nombre, rom)
+    for ruta in args.rutas:
+        if not os.path.exists(ruta):
+            parser.error(f"no existe {ruta}")
+    for ruta in _roms(args.rutas):
+        with open(ruta, "rb") as f:
+            casos.append((ruta, f.read()))
+    for i in range(args.fuzz):
+        casos.append((f"fuzz:{args.seed}:{i}", fuzz_rom(random.Random(f"{args.seed}:{i}"))))
+
+    grabacion, quirks = None, args.quirks
+    if args.trace:
+        from chip8_grabacion import load_recording, recording_quirks
+        if len(casos) != 1:
+            parser.error("--trace requiere exactamente una ROM")
+        try:
+            grabacion = load_recording(args.trace)
+            quirks = recording_quirks(grabacion, args.quirks)
+        except ValueError as e:
+            parser.error(str(e))
+
+    t0, divergentes, instrucciones = time.perf_counter(), 0, 0
+    for nombre, rom in casos:
+        if grabacion is not None:
+            informe = lockstep(rom, args.engine, quirks, grabacion["frames"], args.every,
+                               recording_trace(grabacion), grabacion["seed"],
+                               grabacion["cycles_per_frame"])
+        else:
+            informe = lockstep(rom, args.engine, args.quirks, args.frames, args.every,
+                               rng_seed=args.seed)
+        instrucciones += informe["instrucciones"]
+        d = informe["divergencia"]
+        if d is None:
+            fin = f", terminó con {informe['error']}" if informe["error"] else ""
+            if not nombre.startswith("fuzz:"):
+                print(f"OK       {nombre}  {informe['frames']} frames, "
+                      f"{informe['comparaciones']} comparaciones{fin}")
+            continue
+        divergentes += 1
+        print(f"DIVERGE  {nombre}")
+        print(format_divergence(d))
+        if args.save_dir and nombre.startswith("fuzz:"):
+            os.makedirs(args.save_dir, exist_ok=True)
+            with open(os.path.join(args.save_dir, nombre.replace(":", "-") + ".ch8"), "wb") as f:
+                f.write(rom)
+
+    dt = time.perf_counter() - t0
+    print(f"{len(casos)} ROMs ({args.fuzz} aleatorias) en {dt:.2f} s, "
+          f"~{instrucciones:,} instrucciones por motor, {divergentes} con divergencias")
+    return 1 if divergentes else 0
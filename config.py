@@ -10,6 +10,10 @@ SCREEN_H   = 32
 SCALE      = 10
 WINDOW_TITLE = "Emulador CHIP-8"
 
+# SUPER-CHIP: alta resolución (00FF) con la misma ventana (píxeles de SCALE/2)
+HIRES_W    = 128
+HIRES_H    = 64
+
 # Colores / grilla (opcional)
 BG_COLOR   = (0, 0, 0)
 FG_COLOR   = (255, 255, 255)
@@ -20,29 +24,64 @@ GRID_COLOR = (0, 0, 0)
 MEM_SIZE       = 0x1000
 PROGRAM_START  = 0x200
 FONT_DIR       = 0x50
+BIG_FONT_DIR   = 0xA0     # fuente grande SUPER-CHIP (FX30), justo después de FONT_SET
+STACK_DEPTH    = 16       # niveles de la pila (CALL de más → StackError)
 
 # Timings
-CPU_HZ    = 500          # “ciclos” lógicos por segundo (tope con clock.tick)
-TIMER_HZ  = 60           # DT/ST a 60 Hz
+CPU_HZ    = 500          # instrucciones por segundo (se reparten por frame)
+TIMER_HZ  = 60           # frames por segundo: DT/ST bajan 1 por frame
+CYCLES_PER_FRAME = max(1, round(CPU_HZ / TIMER_HZ))  # presupuesto por frame
+
+# Audio (beep mientras ST > 0; ver chip8_audio)
+AUDIO_ENABLED = True
+BEEP_HZ       = 440          # frecuencia del tono (onda cuadrada)
+AUDIO_VOLUME  = 0.25         # 0..1
+AUDIO_RATE    = 44100        # muestras por segundo del mixer
+AUDIO_BUFFER  = 512          # muestras del buffer del mixer (~12 ms: menos de un frame)
+
+# Motor de ejecución: "interprete" (tabla de decodificación) o "jit"
+# (regiones traducidas a Python, mismo resultado). El JIT rinde ~2-4x en
+# corridas largas sin ventana (--headless, lotes), no el 5x buscado, y paga
+# la traducción al arrancar; en la ventana (un frame por vez a 60 Hz) no se
+# nota. Por defecto, el intérprete; el JIT se pide con --engine jit.
+ENGINE = "interprete"
 
 # Quirks (compatibilidad de ROMs viejas/mas recientes)
 QUIRK_SHIFT_USES_VY = False   # 8XY6/8XYE usan Vy y copian en Vx (legacy)
 QUIRK_ADDI_SETS_VF  = True    # FX1E setea VF si I overflowea
 FX_BULK_INC_I       = True    # FX55/FX65 incrementan I
 DXYN_WRAP           = True    # Dibujo con wrap-around
+QUIRK_JUMP_USES_VX  = False   # BXNN salta a XNN + VX (en vez de NNN + V0)
+QUIRK_LOGIC_RESETS_VF = False # 8XY1/8XY2/8XY3 ponen VF en 0
+
+# Perfiles de quirks por plataforma; se eligen por máquina (Chip8(quirks=
+# "super-chip"), --quirks, "quirks" en un manifiesto de lote). En CHIP-48
+# FX55/FX65 suman X a I (no X+1): se aproxima con el incremento completo.
+QUIRK_PROFILES = {
+    "cosmac-vip": {"shift_uses_vy": True,  "addi_sets_vf": False, "bulk_inc_i": True,
+                   "dxyn_wrap": False, "jump_uses_vx": False, "logic_resets_vf": True},
+    "chip-48":    {"shift_uses_vy": False, "addi_sets_vf": False, "bulk_inc_i": True,
+                   "dxyn_wrap": False, "jump_uses_vx": True,  "logic_resets_vf": False},
+    "super-chip": {"shift_uses_vy": False, "addi_sets_vf": False, "bulk_inc_i": False,
+                   "dxyn_wrap": False, "jump_uses_vx": True,  "logic_resets_vf": False},
+    "modern":     {"shift_uses_vy": True,  "addi_sets_vf": False, "bulk_inc_i": True,
+                   "dxyn_wrap": True,  "jump_uses_vx": False, "logic_resets_vf": False},
+}
+QUIRK_PROFILE = None          # perfil por defecto; None = los valores sueltos de arriba
 
 # RNG (para CXNN). ¿reproducibilidad? = semilla (int); si no, None
 RNG_SEED = None
 
-# Teclado CHIP-8 ↔ pygame
-import pygame
+# Teclado CHIP-8 ↔ teclas del host, por nombre (el sufijo de pygame.K_*). Se
+# resuelven recién al abrir la ventana (chip8_funciones.resolve_key_mappings):
+# el núcleo y las herramientas sin ventana no importan Pygame.
 KEY_MAPPINGS = {
-    0x0: pygame.K_x,
-    0x1: pygame.K_1, 0x2: pygame.K_2, 0x3: pygame.K_3,
-    0x4: pygame.K_q, 0x5: pygame.K_w, 0x6: pygame.K_e,
-    0x7: pygame.K_a, 0x8: pygame.K_s, 0x9: pygame.K_d,
-    0xA: pygame.K_z, 0xB: pygame.K_c,
-    0xC: pygame.K_4, 0xD: pygame.K_r, 0xE: pygame.K_f, 0xF: pygame.K_v,
+    0x0: "x",
+    0x1: "1", 0x2: "2", 0x3: "3",
+    0x4: "q", 0x5: "w", 0x6: "e",
+    0x7: "a", 0x8: "s", 0x9: "d",
+    0xA: "z", 0xB: "c",
+    0xC: "4", 0xD: "r", 0xE: "f", 0xF: "v",
 }
 
 # Fuente (4x5 por dígito) – 16 * 5 bytes
@@ -65,3 +104,23 @@ FONT_SET = [
   0xF0, 0x80, 0xF0, 0x80, 0x80  # F
 ]
 
+# Fuente grande SUPER-CHIP (8x10 por dígito) – 16 * 10 bytes
+BIG_FONT_SET = [
+  0xFF, 0xFF, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF, # 0
+  0x18, 0x78, 0x78, 0x18, 0x18, 0x18, 0x18, 0x18, 0xFF, 0xFF, # 1
+  0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, # 2
+  0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, # 3
+  0xC3, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF, 0x03, 0x03, 0x03, 0x03, # 4
+  0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, # 5
+  0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, # 6
+  0xFF, 0xFF, 0x03, 0x03, 0x06, 0x0C, 0x18, 0x18, 0x18, 0x18, # 7
+  0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, # 8
+  0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, # 9
+  0x7E, 0xFF, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF, 0xC3, 0xC3, 0xC3, # A
+  0xFC, 0xFC, 0xC3, 0xC3, 0xFC, 0xFC, 0xC3, 0xC3, 0xFC, 0xFC, # B
+  0x3C, 0xFF, 0xC3, 0xC0, 0xC0, 0xC0, 0xC0, 0xC3, 0xFF, 0x3C, # C
+  0xFC, 0xFE, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xFE, 0xFC, # D
+  0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, # E
+  0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC0, 0xC0, 0xC0, 0xC0, # F
+]
+
@@ -6,144 +6,258 @@
 #                      https://multigesture.net/articles/how-to-write-an-emulator-chip-8-interpreter/
 #   Opcodes..........: https://chip8.gulrak.net/
 #   Roms de prueba...: https://github.com/Timendus/chip8-test-suite?tab=readme-ov-file
+#
+# Uso:
+#   python main.py [rom] [--mute]                     (ventana Pygame, con beep;
+#                                                      emulación en otro hilo)
+#   python main.py [rom] --headless --max-cycles N    (sin ventana, sin tope)
+#   python main.py [rom] --headless ... --stream f.c8fb  (graba el framebuffer)
+#   python main.py [rom] --record archivo.c8in        (graba el teclado)
+#   python main.py [rom] --replay archivo.c8in        (reproduce sin ventana)
+#   python main.py [rom] ... --profile perfil         (perfil.json + perfil.folded)
+#   python main.py batch <dir|manifiesto.json> ...    (lote en un pool de procesos)
+#   python main.py serve [rom] --port 8765            (servidor TCP de sesiones)
+#   python main.py disasm rom [--dot cfg.dot]         (desensamblado y CFG)
+#   python main.py verify [roms/] --engine jit --fuzz 200  (lockstep contra la referencia)
+#   python main.py fuzz rom --seconds 60 --jobs 4     (fuzzing de la entrada por cobertura)
+#   python main.py [rom] --replay caso.c8in --strict  (reproduce una falla del fuzzer)
 # -----------------------------------------------------------------------------
 
 # -----------------------------------------------------------------------------
-# Importa la libreria e inicializa todos los módulos de Pygame 
-# (gráficos, sonido, etc.)
+# Importa las librerias
 # -----------------------------------------------------------------------------
-import pygame, random
+# Pygame (y lo que sólo usa la ventana) se importa dentro de run_window: una
+# corrida headless, un replay o un lote arrancan sin cargar SDL.
+import argparse, sys, time
 import config as cfg
-from chip8_funciones import (
-    load_game, setup_graphics, draw_graphics, fetch_opcode,
-    decode_opcode, process_input, tick_timers
-)
-from chip8_instrucciones import (
-    op_00E0, op_00EE, op_1NNN, op_2NNN, op_3XNN, op_4XNN, op_5XY0,
-    op_6XNN, op_7XNN, op_8XY0, op_8XY1, op_8XY2, op_8XY3, op_8XY4,
-    op_8XY5, op_8XY6, op_8XY7, op_8XYE, op_9XY0, op_ANNN, op_BNNN,
-    op_CXNN, op_DXYN, op_EX9E, op_EXA1, op_FX0A, op_FX07, op_FX15,
-    op_FX18, op_FX1E, op_FX29, op_FX33, op_FX55, op_FX65
-)
+from chip8_funciones import load_game, dump_graphics
+from chip8_maquina import create_machine
 
 
 # -----------------------------------------------------------------------------
-# Inicialización de la ventana en Pygame
-# -----------------------------------------------------------------------------
-pygame.init()
-pygame.display.set_caption(cfg.WINDOW_TITLE)  # título desde config
-setup_graphics(cfg.SCALE)                      # escala desde config
+def run_window(maquina, max_cycles=None, grabador=None, mute=False):
+    """
+    Frontend Pygame en dos hilos (ver chip8_hilos). La emulación corre en un
+    hilo propio a 60 Hz (TIMER_HZ): en cada frame lee el teclado compartido,
+    ejecuta un lote de CYCLES_PER_FRAME instrucciones (CPU_HZ / 60), baja los
+    timers, enciende o apaga el beep según ST (chip8_audio, salvo con 'mute')
+    y publica el frame si cambió. Con 'grabador' (InputRecorder) se guarda el
+    teclado de cada frame, y si la ROM espera una tecla (FX0A o JP a sí misma)
+    ese hilo se bloquea hasta el próximo evento.
 
-# -----------------------------------------------------------------------------
-# Estado inicial del emulador
-# -----------------------------------------------------------------------------
-memory = [0] * cfg.MEM_SIZE
-v_reg  = [0] * 16
-stack  = []
-pc     = cfg.PROGRAM_START
-index  = 0
-delay_timer = 0
-sound_timer = 0
-gfx = [[0 for _ in range(cfg.SCREEN_W)] for _ in range(cfg.SCREEN_H)]
+    Este hilo (el principal, dueño de la ventana) sólo atiende eventos, los
+    vuelca al teclado compartido y presenta el último frame publicado: un
+    present lento o el vsync no frenan a la máquina, sólo se saltean frames.
+    Mientras la emulación espera una tecla no hay frames nuevos: en vez de
+    despertarse a 60 Hz, se bloquea en pygame.event.wait() (hasta
+    WAIT_POLL_SECONDS, por si la emulación terminó sola con max_cycles).
+    """
+    import pygame
+    from chip8_audio import create_beeper
+    from chip8_funciones import (
+        draw_graphics, process_key_events, resolve_key_mappings, setup_graphics
+    )
+    from chip8_hilos import WAIT_POLL_SECONDS, EmulationThread, FrameMailbox, SharedKeys
+    teclas = resolve_key_mappings(cfg.KEY_MAPPINGS)
+    pygame.mixer.pre_init(cfg.AUDIO_RATE, -16, 1, cfg.AUDIO_BUFFER)
+    # Sólo el subsistema de video (trae los eventos); el mixer lo abre
+    # create_beeper si hay audio. Fuentes, joystick, etc. no se inicializan.
+    pygame.display.init()
+    pygame.display.set_caption(cfg.WINDOW_TITLE)  # título desde config
+    setup_graphics(cfg.SCALE)                      # escala desde config
+    beeper = create_beeper(mute)
+
+    teclado, buzon = SharedKeys(), FrameMailbox()
+    hilo = EmulationThread(maquina, teclado, buzon, beeper, grabador, max_cycles)
+    hilo.start()
+
+    clock = pygame.time.Clock()
+    while hilo.is_alive():
+        # Se mira antes de tomar el frame: la emulación publica el último
+        # antes de empezar a esperar, así que ya está en el buzón. Sólo este
+        # hilo la despierta (key_event, release_all, stop).
+        dormir = hilo.esperando.is_set() and not teclado.despertar.is_set()
+        frame = buzon.take()
+        if frame is not None and frame[1] != 0:
+            draw_graphics(*frame)
+        if dormir:
+            eventos = ([pygame.event.wait(int(WAIT_POLL_SECONDS * 1000))]
+                       + pygame.event.get())
+        else:
+            clock.tick(cfg.TIMER_HZ)
+            eventos = pygame.event.get()
+        if not process_key_events(eventos, teclado, teclas):
+            break
+
+    hilo.stop()
+    hilo.join()
+    beeper.close()
+    pygame.quit()
+    if hilo.error is not None:
+        raise hilo.error
 
-# -----------------------------------------------------------------------------
-# Fuente integrada en memoria (necesario para FX29)
-# -----------------------------------------------------------------------------
-for i, b in enumerate(cfg.FONT_SET):
-    memory[cfg.FONT_DIR + i] = b
 
 # -----------------------------------------------------------------------------
-# Cargar ROM por defecto desde config
-# -----------------------------------------------------------------------------
-rom_bytes = load_game(cfg.ROM_PATH)
-for i, b in enumerate(rom_bytes):
-    memory[cfg.PROGRAM_START + i] = b
+def run_headless(maquina, max_cycles, ruta_flujo=None):
+    """
+    Corre max_cycles instrucciones sin ventana ni tope de CPU_HZ (los timers
+    siguen avanzando cada CYCLES_PER_FRAME instrucciones) y muestra un resumen.
+    Con ruta_flujo, cada frame se graba como delta (ver chip8_flujo).
+    """
+    t0 = time.perf_counter()
+    if ruta_flujo:
+        from chip8_flujo import capture_frames, encode_frames, write_stream
+        frames, resto = divmod(max_cycles, maquina.cycles_per_frame)
+        write_stream(ruta_flujo, encode_frames(capture_frames(maquina, frames)))
+        maquina.run(resto)
+    else:
+        maquina.run_cycles(max_cycles)
+    dt = time.perf_counter() - t0
+
+    print(dump_graphics(maquina.gfx))
+    print_summary(maquina, dt)
+
+
+def print_summary(maquina, dt):
+    """Ciclos, frames y velocidad; instr/s cuenta sólo las instrucciones que corrieron."""
+    corridas = maquina.cycles - maquina.skipped_cycles
+    print(f"ciclos: {maquina.cycles} ({maquina.skipped_cycles} en esperas salteadas)  "
+          f"frames: {maquina.frames}  tiempo: {dt:.3f} s  "
+          f"({corridas / dt if dt else 0:,.0f} instr/s)")
+
 
 # -----------------------------------------------------------------------------
-# RNG para CXNN (semilla opcional)
+def save_profile(perfil, base):
+    """Guarda el perfil como base.json y base.folded y muestra un resumen."""
+    perfil.detach()
+    perfil.write_json(base + ".json")
+    perfil.write_folded(base + ".folded")
+    print(perfil.summary())
+    print(f"perfil: {base}.json, {base}.folded")
+
+
 # -----------------------------------------------------------------------------
-rng = random.Random(cfg.RNG_SEED) if cfg.RNG_SEED is not None else random
+def run_replay(rom, ruta_grabacion, engine, perfil_base=None, quirks=None, strict=False):
+    """
+    Reproduce una grabación sin ventana y tan rápido como se pueda, con los
+    quirks que guardó (quirks explícitos distintos cortan con un error);
+    compara el hash del estado final con el grabado. Devuelve 0 si coincide,
+    1 si no.
+    """
+    from chip8_grabacion import load_recording, recording_quirks, replay, rom_hash
+    try:
+        grabacion = load_recording(ruta_grabacion)
+        quirks = recording_quirks(grabacion, quirks)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if grabacion["rom_hash"] != rom_hash(rom):
+        raise SystemExit("La grabación es de otra ROM")
+
+    maquina = create_machine(rom, engine, rng_seed=grabacion["seed"],
+                             cycles_per_frame=grabacion["cycles_per_frame"], quirks=quirks,
+                             strict=strict)
+    perfil = None
+    if perfil_base:
+        from chip8_perfil import attach_profiler
+        perfil = attach_profiler(maquina)
+    t0 = time.perf_counter()
+    final = replay(maquina, grabacion)
+    dt = time.perf_counter() - t0
+    if perfil is not None:
+        save_profile(perfil, perfil_base)
+
+    print(dump_graphics(maquina.gfx))
+    print_summary(maquina, dt)
+    print(f"hash final: {final}")
+    if final != grabacion["final_hash"]:
+        print(f"DISTINTO al grabado: {grabacion['final_hash']}")
+        return 1
+    return 0
 
 
 # -----------------------------------------------------------------------------
-# Buicle principal
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["batch"]:
+        from chip8_lotes import main as batch_main
+        sys.exit(batch_main(argv[1:]))
+    if argv[:1] == ["disasm"]:
+        from chip8_analisis import main as disasm_main
+        sys.exit(disasm_main(argv[1:]))
+    if argv[:1] == ["verify"]:
+        from chip8_verificador import main as verify_main
+        sys.exit(verify_main(argv[1:]))
+    if argv[:1] == ["serve"]:
+        from chip8_servidor import main as serve_main
+        sys.exit(serve_main(argv[1:]))
+    if argv[:1] == ["fuzz"]:
+        from chip8_fuzz import main as fuzz_main
+        sys.exit(fuzz_main(argv[1:]))
+
+    parser = argparse.ArgumentParser(description="Emulador CHIP-8")
+    parser.add_argument("rom", nargs="?", default=cfg.ROM_PATH,
+                        help="ROM a cargar (por defecto config.ROM_PATH)")
+    parser.add_argument("--headless", action="store_true",
+                        help="sin ventana, tan rápido como permita el host")
+    parser.add_argument("--max-cycles", type=int, metavar="N",
+                        help="cantidad de instrucciones a ejecutar")
+    parser.add_argument("--engine", choices=("interprete", "jit"), default=cfg.ENGINE,
+                        help=f"motor de ejecución (por defecto {cfg.ENGINE})")
+    parser.add_argument("--quirks", choices=tuple(cfg.QUIRK_PROFILES), metavar="PERFIL",
+                        help="perfil de quirks: " + ", ".join(cfg.QUIRK_PROFILES)
+                             + " (por defecto los de config.py)")
+    parser.add_argument("--strict", action="store_true",
+                        help="opcodes desconocidos y 0NNN lanzan UnknownOpcodeError (como en fuzz)")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--record", metavar="ARCHIVO",
+                       help="graba el teclado de cada frame y la semilla de CXNN")
+    grupo.add_argument("--replay", metavar="ARCHIVO",
+                       help="reproduce una grabación sin ventana y verifica el hash final")
+    parser.add_argument("--stream", metavar="ARCHIVO",
+                        help="con --headless: graba el framebuffer de cada frame como deltas")
+    parser.add_argument("--mute", action="store_true", help="sin audio (el beep de ST)")
+    parser.add_argument("--profile", metavar="BASE",
+                        help="perfila por opcode/PC y guarda BASE.json y BASE.folded")
+    args = parser.parse_args(argv)
+
+    if args.headless and args.max_cycles is None:
+        parser.error("--headless requiere --max-cycles N")
+    if args.record and args.headless:
+        parser.error("--record graba la ventana; no se combina con --headless")
+    if args.stream and not args.headless:
+        parser.error("--stream requiere --headless")
+
+    rom = load_game(args.rom)
+    if args.replay:
+        sys.exit(run_replay(rom, args.replay, args.engine, args.profile, args.quirks,
+                            args.strict))
+
+    grabador, seed = None, cfg.RNG_SEED
+    if args.record:
+        from chip8_grabacion import InputRecorder, new_seed
+        seed = new_seed() if seed is None else seed
+        grabador = InputRecorder(rom, seed, cfg.CYCLES_PER_FRAME, args.quirks)
+    maquina = create_machine(rom, args.engine, rng_seed=seed, quirks=args.quirks,
+                             strict=args.strict)
+    perfil = None
+    if args.profile:
+        from chip8_perfil import attach_profiler
+        perfil = attach_profiler(maquina)
+
+    if args.headless:
+        run_headless(maquina, args.max_cycles, args.stream)
+    else:
+        run_window(maquina, args.max_cycles, grabador, args.mute)
+        if grabador is not None:
+            grabador.save(args.record, maquina)
+    if perfil is not None:
+        save_profile(perfil, args.profile)
+
+
 # -----------------------------------------------------------------------------
-clock = pygame.time.Clock()
-accum_ms = 0.0
-running = True
-
-while running:
-    dt_ms = clock.tick(cfg.CPU_HZ)   # velocidad “CPU” 
-    events = pygame.event.get()
-    for e in events:
-        if e.type == pygame.QUIT:
-            running = False
-
-    chip8_keys, pressed_once = process_input(events, cfg.KEY_MAPPINGS)
-
-    # -------------------------
-    # FETCH/DECODE 
-    # -------------------------
-    opcode = fetch_opcode(memory, pc)
-    pc += 2
-    f = decode_opcode(opcode)
-    op, x, y, n, kk, nnn = f["op"], f["x"], f["y"], f["n"], f["kk"], f["nnn"]
-
-    # -------------------------
-    # DISPATCH
-    # -------------------------
-    if opcode == 0x00E0:
-        gfx = op_00E0(gfx)
-        draw_graphics(gfx, cfg.SCALE)
-
-    elif opcode == 0x00EE: pc, stack = op_00EE(stack)
-    elif op == 0x1: pc = op_1NNN(pc, nnn)
-    elif op == 0x2: pc, stack = op_2NNN(pc, nnn, stack)
-    elif op == 0x3: pc = op_3XNN(pc, v_reg, x, kk)
-    elif op == 0x4: pc = op_4XNN(pc, v_reg, x, kk)
-    elif op == 0x5 and n == 0x0: pc = op_5XY0(pc, v_reg, x, y)
-    elif op == 0x6: v_reg = op_6XNN(v_reg, x, kk)
-    elif op == 0x7: v_reg = op_7XNN(v_reg, x, kk)
-    elif op == 0x8:
-        if   n == 0x0: v_reg = op_8XY0(v_reg, x, y)
-        elif n == 0x1: v_reg = op_8XY1(v_reg, x, y)
-        elif n == 0x2: v_reg = op_8XY2(v_reg, x, y)
-        elif n == 0x3: v_reg = op_8XY3(v_reg, x, y)
-        elif n == 0x4: v_reg = op_8XY4(v_reg, x, y)
-        elif n == 0x5: v_reg = op_8XY5(v_reg, x, y)
-        elif n == 0x6: v_reg = op_8XY6(v_reg, x, y, cfg.QUIRK_SHIFT_USES_VY)
-        elif n == 0x7: v_reg = op_8XY7(v_reg, x, y)
-        elif n == 0xE: v_reg = op_8XYE(v_reg, x, y, cfg.QUIRK_SHIFT_USES_VY)
-    elif op == 0x9 and n == 0x0: pc = op_9XY0(pc, v_reg, x, y)
-    elif op == 0xA: index = op_ANNN(index, nnn)
-    elif op == 0xB: pc = op_BNNN(pc, v_reg, nnn)
-    elif op == 0xC: v_reg = op_CXNN(v_reg, x, kk, rng=rng)
-    elif op == 0xD: 
-        gfx, v_reg = op_DXYN(gfx, v_reg, x, y, n, memory, index)
-        draw_graphics(gfx, cfg.SCALE)
-    elif op == 0xE:
-        if   kk == 0x9E: pc = op_EX9E(pc, v_reg, x, chip8_keys)
-        elif kk == 0xA1: pc = op_EXA1(pc, v_reg, x, chip8_keys)
-    elif op == 0xF:
-        if   kk == 0x07: v_reg = op_FX07(v_reg, x, delay_timer)
-        elif kk == 0x0A:
-            v_reg, waiting = op_FX0A(v_reg, x, pressed_once)
-            if waiting: pc -= 2
-        elif kk == 0x15: delay_timer = op_FX15(delay_timer, v_reg, x)
-        elif kk == 0x18: sound_timer = op_FX18(sound_timer, v_reg, x)
-        elif kk == 0x1E:
-            index, vf = op_FX1E(index, v_reg, x)
-            if cfg.QUIRK_ADDI_SETS_VF:
-                v_reg[0xF] = vf
-        elif kk == 0x29: index = op_FX29(index, v_reg, x, cfg.FONT_DIR)
-        elif kk == 0x33: memory = op_FX33(memory, index, v_reg, x)
-        elif kk == 0x55: memory, index = op_FX55(memory, index, v_reg, x, increment_I=cfg.FX_BULK_INC_I)
-        elif kk == 0x65: v_reg, index = op_FX65(memory, index, v_reg, x, increment_I=cfg.FX_BULK_INC_I)
-
-    # Timers a 60 Hz
-    delay_timer, sound_timer, accum_ms = tick_timers(delay_timer, sound_timer, accum_ms, dt_ms)
+if __name__ == "__main__":
+    main()
 
 # -----------------------------------------------------------------------------
 # FIN.
 # -----------------------------------------------------------------------------
-pygame.quit()
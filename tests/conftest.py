@@ -0,0 +1,11 @@
+# -----------------------------------------------------------------------------
+# CHIP-8 – Pruebas (python -m pytest tests)
+#
+# Los módulos chip8_* viven sueltos en la raíz del repo (no es un paquete):
+# se agrega la raíz al path para importarlos desde tests/.
+# -----------------------------------------------------------------------------
+import os, sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROMS = os.path.join(RAIZ, "roms")
+sys.path.insert(0, RAIZ)
@@ -0,0 +1,64 @@
+# -----------------------------------------------------------------------------
+# Análisis estático: bloques, datos y escrituras de una ROM armada a mano, y
+# todo PC que el intérprete ejecuta en las ROMs incluidas está en el análisis.
+# -----------------------------------------------------------------------------
+import glob, os, random
+
+import pytest
+
+from conftest import ROMS
+from chip8_analisis import analyze_rom, disassemble
+from chip8_maquina import Chip8
+from chip8_perfil import attach_profiler
+
+
+def test_bloques_llamadas_y_datos():
+    rom = bytes.fromhex("A20C 220A 3000 1206 1208 00EE F090")
+    an = analyze_rom(rom)
+    assert an.blocks == {
+        0x200: (0x204, [0x20A, 0x204]),
+        0x204: (0x206, [0x206, 0x208]),
+        0x206: (0x208, [0x206]),
+        0x208: (0x20A, [0x208]),
+        0x20A: (0x20C, []),
+    }
+    assert an.calls == {0x20A} and an.sprites == {0x20C}
+    assert an.data == [(0x20C, 0x20E)]
+    assert "sub_20A:" in an.listing()
+
+
+def test_escrituras_sobre_el_codigo():
+    # FX55 con I conocido pisa el JP de 0x204; FX33 después de FX1E no se resuelve.
+    an = analyze_rom(bytes.fromhex("A204 F055 F01E F033 1208"))
+    assert an.self_mod == [(0x202, 0x204, 0x205)]
+    assert an.unresolved == [0x206]
+    linea = next(l for l in an.listing().splitlines() if l.startswith("0x202"))
+    assert linea.endswith("; automodificación")
+
+
+@pytest.mark.parametrize("opcode, texto", [
+    (0x00E0, "CLS"), (0x2ABC, "CALL 0xABC"), (0x8126, "SHR V1, V2"),
+    (0xD125, "DRW V1, V2, 5"), (0xF355, "LD [I], V3"), (0x00FF, "HIGH"),
+])
+def test_desensamblado(opcode, texto):
+    assert disassemble(opcode) == texto
+
+
+@pytest.mark.parametrize("ruta", sorted(glob.glob(os.path.join(ROMS, "*.ch8"))),
+                         ids=os.path.basename)
+def test_lo_ejecutado_es_alcanzable(ruta):
+    with open(ruta, "rb") as f:
+        rom = f.read()
+    an = analyze_rom(rom)
+    m = Chip8(rom, rng_seed=2)
+    perfil = attach_profiler(m)
+    rng = random.Random(2)
+    for _ in range(100):
+        m.set_keys([rng.random() < 0.2 for _ in range(16)],
+                   rng.randrange(16) if rng.random() < 0.3 else None)
+        m.run_frames(3)
+    assert perfil.pc_count
+    # Sólo el código que escribe la propia ROM (8-scrolling arma un JP con
+    # FX55) queda fuera del análisis, y esa escritura está marcada.
+    fuera = set(perfil.pc_count) - set(an.instructions)
+    assert not fuera or any(a in perfil.pc_count for a, _, _ in an.self_mod)
@@ -0,0 +1,62 @@
+# -----------------------------------------------------------------------------
+# Audio: la onda cuadrada y cuándo el beeper enciende y corta el tono.
+# -----------------------------------------------------------------------------
+import pytest
+
+from chip8_audio import Beeper, NullSink, create_beeper, square_wave
+from chip8_maquina import Chip8
+
+
+class _Registro(NullSink):
+    """Sink que anota en qué frame se encendió y se cortó el tono."""
+
+    def __init__(self):
+        super().__init__()
+        self.frame, self.eventos = 0, []
+
+    def start(self):
+        super().start()
+        self.eventos.append(("start", self.frame))
+
+    def stop(self):
+        self.eventos.append(("stop", self.frame))
+
+
+@pytest.mark.parametrize("frecuencia, muestras_por_s", [(440, 44100), (1000, 22050), (7, 8000)])
+def test_onda_cuadrada(frecuencia, muestras_por_s):
+    onda = square_wave(frecuencia, muestras_por_s, volumen=0.5)
+    assert set(onda) == {16384, -16384}
+    # Un número entero de períodos: empieza alta, termina baja y repite sin salto.
+    assert onda[0] > 0 > onda[-1]
+    flancos = sum(1 for a, b in zip(onda, onda[1:] + onda[:1]) if a > 0 >= b)
+    assert abs(flancos * muestras_por_s / len(onda) - frecuencia) < 10
+
+
+def test_onda_estereo_intercalada():
+    mono, estereo = square_wave(440, 44100), square_wave(440, 44100, canales=2)
+    assert list(estereo[::2]) == list(mono) == list(estereo[1::2])
+
+
+@pytest.mark.parametrize("st, frames_con_tono", [(1, 0), (2, 1), (6, 5)])
+def test_el_tono_dura_st_menos_uno_frames(st, frames_con_tono):
+    # V0 = st; FX18 en el primer frame; después, un bucle sin fin.
+    m = Chip8(bytes([0x60, st, 0xF0, 0x18, 0x12, 0x04]), rng_seed=1, cycles_per_frame=4)
+    sink = _Registro()
+    beeper = Beeper(sink)
+    for frame in range(1, 10):
+        m.run_frames(1)
+        sink.frame = frame
+        beeper.update(m.sound_timer)
+    if frames_con_tono:
+        assert sink.eventos == [("start", 1), ("stop", 1 + frames_con_tono)]
+    else:
+        assert sink.eventos == []
+
+
+def test_mudo_y_close():
+    beeper = create_beeper(mute=True)
+    assert isinstance(beeper.sink, NullSink)
+    beeper.update(3)
+    beeper.update(2)
+    beeper.close()
+    assert beeper.sink.encendidos == 1 and not beeper.sonando
@@ -0,0 +1,31 @@
+# -----------------------------------------------------------------------------
+# benchmarks/bench.py: la unión de corridas para la base y la ROM sin
+# dibujos con la que se mide DXYN.
+# -----------------------------------------------------------------------------
+import os, sys
+
+from conftest import RAIZ
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+from bench import aggregate, bench_dxyn, bench_speed, _sin_dibujos
+
+
+def test_aggregate_peor_y_mejor():
+    corridas = [{"pong.ch8": {"instr_per_sec": 100, "dxyn_us": 4.0, "peak_kib": None}},
+                {"pong.ch8": {"instr_per_sec": 90, "dxyn_us": 5.0, "peak_kib": None}}]
+    assert aggregate(corridas, peor=True) == {
+        "pong.ch8": {"instr_per_sec": 90, "dxyn_us": 5.0, "peak_kib": None}}
+    assert aggregate(corridas, peor=False) == {
+        "pong.ch8": {"instr_per_sec": 100, "dxyn_us": 4.0, "peak_kib": None}}
+
+
+def test_sin_dibujos_cambia_solo_el_codigo():
+    # D015 en 0x202 es código; el D123 de 0x206 son datos (después del JP).
+    rom = bytes.fromhex("A206 D015 1204 D123")
+    assert _sin_dibujos(rom) == bytes.fromhex("A206 6F00 1204 D123")
+
+
+def test_esperas_medidas_y_rom_sin_dibujos():
+    rom = bytes.fromhex("6001 1202")        # termina en un JP a sí mismo
+    assert bench_speed(rom, "interprete", 2_000, 1) > 0
+    assert bench_dxyn(rom, "interprete", 2_000) is None
@@ -0,0 +1,109 @@
+# -----------------------------------------------------------------------------
+# Save states: load_state(save_state(m)) reproduce la máquina entera.
+# -----------------------------------------------------------------------------
+import os
+
+import pytest
+
+from conftest import ROMS
+from chip8_estado import RewindRing, hash_state, load_state, save_state
+from chip8_maquina import create_machine
+
+
+def _pong(engine="interprete", **kwargs):
+    with open(os.path.join(ROMS, "pong.ch8"), "rb") as f:
+        return create_machine(f.read(), engine, rng_seed=7, **kwargs)
+
+
+@pytest.mark.parametrize("engine", ["interprete", "jit"])
+def test_ida_y_vuelta(engine):
+    m = _pong(engine)
+    m.set_keys([k == 1 for k in range(16)], None)
+    m.run_frames(120)
+    estado = save_state(m)
+
+    copia = _pong(engine)
+    load_state(copia, estado)
+    assert save_state(copia) == estado
+
+    # Las dos siguen igual: RNG, teclado y traducciones incluidos.
+    for maquina in (m, copia):
+        maquina.run_frames(90)
+    assert hash_state(copia) == hash_state(m)
+
+
+def test_ida_y_vuelta_en_alta_resolucion():
+    programa = bytes.fromhex("00FF A20A 6005 D000 1208" + "A5" * 32)
+    m = create_machine(programa, "interprete", rng_seed=1)
+    m.run_frames(1)
+    m.flags[3] = 9
+    copia = create_machine(programa, "interprete", rng_seed=1)
+    load_state(copia, save_state(m))
+    assert copia.gfx == m.gfx and len(copia.gfx) == 64
+    assert copia.flags == m.flags
+
+
+def test_otros_quirks_se_rechazan():
+    estado = save_state(_pong(quirks="modern"))
+    with pytest.raises(ValueError):
+        load_state(_pong(quirks="chip-48"), estado)
+
+
+def test_rebobinar():
+    m, anillo = _pong(), RewindRing(capacidad=4)
+    for _ in range(6):
+        m.run_frames(5)
+        anillo.push(m)
+    assert len(anillo) == 4
+    antes = save_state(m)
+    m.run_frames(30)
+    assert anillo.rewind(m)
+    assert save_state(m) == antes
+    assert not anillo.rewind(m, pasos=4)
+
+
+def test_ciclos_salteados_viajan_en_el_estado():
+    m = _pong()
+    m.run_frames(200)
+    assert m.skipped_cycles
+    copia = _pong()
+    load_state(copia, save_state(m))
+    assert (copia.cycles, copia.skipped_cycles) == (m.cycles, m.skipped_cycles)
+
+
+def test_hash_igual_con_los_dos_motores():
+    # En pong una región traducida corre algún frame ocioso que el intérprete
+    # saltea: los ciclos salteados difieren pero el hash del estado no.
+    maquinas = [_pong(engine, cycles_per_frame=50) for engine in ("interprete", "jit")]
+    maquinas[1]._interpretar_en_frio = False    # traducido desde la primera vez
+    for m in maquinas:
+        m.set_keys([k == 4 for k in range(16)], None)
+        m.run_frames(400)
+    interprete, jit = maquinas
+    assert interprete.skipped_cycles != jit.skipped_cycles
+    assert hash_state(interprete) == hash_state(jit)
+
+
+def test_restaurar_descarta_solo_las_paginas_que_cambiaron():
+    m = _pong("jit")
+    m._interpretar_en_frio = False
+    m.run_frames(60)
+    estado = save_state(m)
+    traducidos = set(m._bloques)
+    m.run_frames(60)
+    load_state(m, estado)
+    assert traducidos <= set(m._bloques)        # misma memoria: nada se tradujo de nuevo
+
+    # Un estado con otro código en 0x200: esa página se descarta, no la ejecución.
+    otro = bytearray(estado)
+    inicio = estado.index(bytes(m.memory[0x200:0x210]))
+    otro[inicio:inicio + 2] = bytes.fromhex("1200")
+    load_state(m, bytes(otro))
+    assert 0x200 not in m._bloques and m.memory[0x200:0x202] == bytes.fromhex("1200")
+
+
+def test_otra_version_se_rechaza():
+    estado = bytearray(save_state(_pong()))
+    estado[4] -= 1
+    with pytest.raises(ValueError, match="versión"):
+        load_state(_pong(), bytes(estado))
@@ -0,0 +1,52 @@
+# -----------------------------------------------------------------------------
+# Flujo de framebuffer: decode_records(encode_frames(...)) devuelve los frames.
+# -----------------------------------------------------------------------------
+import os, random
+
+import pytest
+
+from conftest import ROMS
+from chip8_flujo import (
+    FrameStreamReader, capture_frames, decode_records, encode_frames, pack_bits,
+    unpack_bits, write_stream,
+)
+from chip8_maquina import create_machine
+
+
+def _frames_de(rom, n_frames):
+    with open(os.path.join(ROMS, rom), "rb") as f:
+        m = create_machine(f.read(), "jit", rng_seed=3)
+    m.set_keys([k in (1, 4) for k in range(16)], None)
+    return list(capture_frames(m, n_frames))
+
+
+@pytest.mark.parametrize("datos", [b"", b"\x00", b"\x00" * 300, bytes(range(256)) * 2,
+                                   b"ab" * 70 + b"\x07" * 129 + b"xyz"])
+def test_packbits_ida_y_vuelta(datos):
+    assert unpack_bits(pack_bits(datos)) == datos
+
+
+@pytest.mark.parametrize("rom", ["pong.ch8", "8-scrolling.ch8"])
+def test_ida_y_vuelta(rom):
+    frames = _frames_de(rom, 400)
+    registros = b"".join(encode_frames(frames, keyframe_every=120))
+    assert list(decode_records(registros)) == [list(f) for f in frames]
+
+
+def test_cambios_de_resolucion_y_repeticiones():
+    rng = random.Random(5)
+    bajos = [rng.getrandbits(64) for _ in range(32)]
+    altos = [rng.getrandbits(128) for _ in range(64)]
+    frames = [bajos] * 3 + [altos] * 2 + [altos[:5] + [0] + altos[6:]] + [bajos]
+    registros = b"".join(encode_frames(frames))
+    assert list(decode_records(registros)) == frames
+
+
+def test_lector_busca_el_keyframe_anterior(tmp_path):
+    frames = _frames_de("pong.ch8", 300)
+    ruta = tmp_path / "corrida.c8fb"
+    write_stream(ruta, encode_frames(frames, keyframe_every=64))
+    lector = FrameStreamReader(ruta)
+    assert len(lector) == len(frames)
+    for numero in (0, 63, 64, 200, 299):
+        assert list(lector.frame(numero)) == list(frames[numero])
@@ -0,0 +1,75 @@
+# -----------------------------------------------------------------------------
+# Fuzzing: run_case informa la excepción con la que termina la ROM, arrancar
+# desde una instantánea da lo mismo que reproducir el caso entero y el
+# proceso guarda las fallas como .c8in que las reproducen.
+# -----------------------------------------------------------------------------
+import os, random
+
+from conftest import ROMS
+from chip8_estado import hash_state
+from chip8_fuzz import (
+    crash_pc, find_snapshot, fuzz_worker, load_case, mutate, run_case,
+)
+from chip8_instrucciones import StackError
+from chip8_roms import prepare_rom, prepare_rom_file
+from chip8_verificador import machine_state
+
+ROTA = bytes.fromhex("00EE 6001")       # RET con la pila vacía
+
+
+def _tarea(tmp_path, rom, **kwargs):
+    os.makedirs(tmp_path / "corpus", exist_ok=True)
+    os.makedirs(tmp_path / "crashes", exist_ok=True)
+    tarea = {"rom": str(rom), "dir": str(tmp_path), "seconds": None, "runs": 40,
+             "frames": 60, "cycles_per_frame": 8, "quirks": None, "seed": 3, "worker": 0}
+    tarea.update(kwargs)
+    return tarea
+
+
+def test_run_case_informa_la_falla():
+    caso = {"seed": 1, "cycles_per_frame": 8, "corridas": [(10, 0, None)]}
+    m, error = run_case(prepare_rom(ROTA), caso)
+    assert isinstance(error, StackError)
+    assert crash_pc(m) == 0x200 and m.cycles == 1
+
+
+def test_instantanea_igual_que_el_caso_entero():
+    rom = prepare_rom_file(os.path.join(ROMS, "pong.ch8"))
+    rng = random.Random(7)
+    padre = {"seed": 1, "cycles_per_frame": 8,
+             "corridas": [(40, 0, None), (2, 1 << 4, 4), (80, 1 << 1, None), (60, 0, None)]}
+    instantaneas, maquina = {}, None
+    maquina, _ = run_case(rom, padre, maquina=maquina, instantaneas=instantaneas)
+    aristas_padre = set(maquina.aristas)
+    restaurados = 0
+    for _ in range(30):
+        caso = mutate(padre, rng, [padre], 240)
+        desde = find_snapshot(caso, instantaneas)
+        entero, error = run_case(rom, caso)
+        esperado = (machine_state(entero), hash_state(entero), type(error), set(entero.aristas))
+        maquina, error = run_case(rom, caso, maquina=maquina, desde=desde)
+        assert (machine_state(maquina), hash_state(maquina), type(error)) == esperado[:3]
+        assert maquina.aristas <= esperado[3] <= maquina.aristas | aristas_padre
+        restaurados += desde is not None
+    assert restaurados
+
+
+def test_worker_guarda_la_falla_reproducible(tmp_path):
+    ruta = tmp_path / "rota.ch8"
+    ruta.write_bytes(ROTA)
+    informe = fuzz_worker(_tarea(tmp_path, ruta))
+    assert [(f["tipo"], f["pc"]) for f in informe["fallas"]] == [("StackError", 0x200)]
+    archivo = informe["fallas"][0]["archivo"]
+    assert archivo == str(tmp_path / "crashes" / "StackError-200.c8in")
+    assert "--replay" in (tmp_path / "crashes" / "StackError-200.txt").read_text()
+    _, error = run_case(prepare_rom(ROTA), load_case(archivo))
+    assert isinstance(error, StackError)
+
+
+def test_worker_descarta_repetidos_y_termina(tmp_path):
+    # Con 2 frames por caso muchas mutaciones repiten un caso ya corrido; los
+    # repetidos cuentan para --runs.
+    informe = fuzz_worker(_tarea(tmp_path, os.path.join(ROMS, "maze.ch8"), frames=2, runs=200))
+    assert informe["ejecuciones"] + informe["repetidos"] == 200
+    assert informe["repetidos"] > 20
+    assert informe["instrucciones"] > 0 and not informe["fallas"]
@@ -0,0 +1,62 @@
+# -----------------------------------------------------------------------------
+# Grabaciones .c8in: grabar, leer y reproducir da el mismo hash final, con
+# los quirks guardados en la cabecera.
+# -----------------------------------------------------------------------------
+import os, struct
+
+import pytest
+
+from conftest import ROMS
+from chip8_grabacion import (
+    InputRecorder, load_recording, recording_quirks, replay,
+)
+from chip8_maquina import create_machine
+
+
+def _grabar(ruta, engine="interprete", quirks=None, frames=240):
+    with open(os.path.join(ROMS, "5-quirks.ch8"), "rb") as f:
+        rom = f.read()
+    grabador = InputRecorder(rom, 11, 8, quirks)
+    m = create_machine(rom, engine, rng_seed=11, cycles_per_frame=8, quirks=quirks)
+    for i in range(frames):
+        teclas = [k == (i // 40) % 16 for k in range(16)]
+        tecla = 1 if i == 30 else None
+        grabador.record(teclas, tecla)
+        m.set_keys(teclas, tecla)
+        m.run_frames(1)
+    grabador.save(ruta, m)
+    return rom
+
+
+@pytest.mark.parametrize("quirks", [None, "chip-48"])
+@pytest.mark.parametrize("engine", ["interprete", "jit"])
+def test_reproduce_el_mismo_estado(tmp_path, engine, quirks):
+    ruta = tmp_path / "caso.c8in"
+    rom = _grabar(ruta, "interprete", quirks)
+    grabacion = load_recording(ruta)
+    assert grabacion["frames"] == 240
+
+    m = create_machine(rom, engine, rng_seed=grabacion["seed"],
+                       cycles_per_frame=grabacion["cycles_per_frame"],
+                       quirks=recording_quirks(grabacion))
+    assert replay(m, grabacion) == grabacion["final_hash"]
+
+
+def test_quirks_distintos_se_rechazan(tmp_path):
+    ruta = tmp_path / "caso.c8in"
+    _grabar(ruta, quirks="chip-48", frames=10)
+    grabacion = load_recording(ruta)
+    assert recording_quirks(grabacion, "chip-48") == grabacion["quirks"]
+    with pytest.raises(ValueError, match="otros quirks"):
+        recording_quirks(grabacion, "modern")
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_versiones_viejas_se_rechazan(tmp_path, version):
+    ruta = tmp_path / "viejo.c8in"
+    _grabar(ruta, frames=10)
+    datos = bytearray(ruta.read_bytes())
+    struct.pack_into("<B", datos, 4, version)
+    ruta.write_bytes(bytes(datos))
+    with pytest.raises(ValueError, match=f"versión {version}"):
+        load_recording(ruta)
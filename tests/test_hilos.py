@@ -0,0 +1,71 @@
+# -----------------------------------------------------------------------------
+# Hilo de emulación: termina por max_cycles o stop() aunque la ROM espere una
+# tecla, y el buzón y el teclado compartido entregan lo que corresponde.
+# -----------------------------------------------------------------------------
+import time
+
+from chip8_audio import Beeper, NullSink
+from chip8_hilos import EmulationThread, FrameMailbox, SharedKeys
+from chip8_maquina import Chip8
+
+ESPERA_TECLA = bytes.fromhex("F00A 7101 1200")      # FX0A; V1 += 1; otra vez
+
+
+def _hilo(max_cycles=None):
+    m = Chip8(ESPERA_TECLA, rng_seed=1, cycles_per_frame=10)
+    teclado = SharedKeys()
+    hilo = EmulationThread(m, teclado, FrameMailbox(), Beeper(NullSink()),
+                           max_cycles=max_cycles)
+    hilo.start()
+    return m, teclado, hilo
+
+
+def _esperar(condicion, limite=3.0):
+    fin = time.monotonic() + limite
+    while not condicion() and time.monotonic() < fin:
+        time.sleep(0.01)
+    return condicion()
+
+
+def test_max_cycles_termina_durante_la_espera():
+    m, _, hilo = _hilo(max_cycles=200)      # 20 frames: ~1/3 s esperando FX0A
+    hilo.join(3.0)
+    assert not hilo.is_alive() and hilo.error is None
+    assert 200 <= m.cycles < 210
+    assert not hilo.esperando.is_set()
+
+
+def test_stop_y_tecla_durante_la_espera():
+    m, teclado, hilo = _hilo()
+    assert _esperar(hilo.esperando.is_set)
+    teclado.key_event(7, True)
+    assert _esperar(lambda: m.v_reg[1] == 1)
+    assert m.v_reg[0] == 7
+    assert _esperar(hilo.esperando.is_set)          # vuelve a esperar
+    hilo.stop()
+    hilo.join(1.0)
+    assert not hilo.is_alive() and hilo.error is None
+
+
+def test_buzon_entrega_el_ultimo_frame_y_sus_filas_sucias():
+    buzon = FrameMailbox()
+    assert buzon.take() is None
+    buzon.publish(1, [0, 1, 2])
+    assert buzon.take() == ((0, 1, 2), None)        # el primero: todo
+    assert buzon.take() is None
+    buzon.publish(2, [0, 5, 2])
+    buzon.publish(3, [9, 5, 2])                     # el 2 no se llega a ver
+    assert buzon.take() == ((9, 5, 2), 0b011)
+    buzon.publish(4, [0] * 64)
+    assert buzon.take() == ((0,) * 64, None)        # cambió la resolución
+
+
+def test_pulsaciones_de_a_una_por_frame():
+    teclado = SharedKeys()
+    teclado.key_event(3, True)
+    teclado.key_event(5, True)
+    teclado.key_event(3, False)
+    teclas, tecla = teclado.read()
+    assert tecla == 3 and teclas[5] and not teclas[3]
+    assert teclado.read()[1] == 5
+    assert teclado.read()[1] is None
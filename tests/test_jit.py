@@ -0,0 +1,139 @@
+# -----------------------------------------------------------------------------
+# JIT ≡ intérprete: mismo estado visible (chip8_verificador.machine_state,
+# ciclos incluidos) después de cada run_frames, con el mismo teclado, también
+# cuando la ROM termina con una excepción. "jit-caliente" es el JIT sin
+# código frío (traduce desde la primera vez que pide una entrada), para que
+# el código que corre una sola vez también pase por la traducción.
+# -----------------------------------------------------------------------------
+import glob, os, random
+
+import pytest
+
+from conftest import ROMS
+from chip8_instrucciones import StackError
+from chip8_jit import Chip8JIT
+from chip8_maquina import Chip8, create_machine
+from chip8_roms import prepare_rom
+from chip8_verificador import fuzz_rom, machine_state
+
+MOTORES = ("interprete", "jit", "jit-caliente")
+
+
+def _maquina(rom, engine, **kwargs):
+    m = create_machine(rom, "jit" if engine == "jit-caliente" else engine, **kwargs)
+    if engine == "jit-caliente":
+        m._interpretar_en_frio = False
+    return m
+
+
+def _correr(rom, engine, cycles_per_frame, quirks, pasos=40, seed=1):
+    """Estados después de cada run_frames de largo y teclado al azar."""
+    m = _maquina(rom, engine, rng_seed=seed, cycles_per_frame=cycles_per_frame,
+                 quirks=quirks)
+    rng, estados = random.Random(seed), []
+    for _ in range(pasos):
+        teclas = [rng.random() < 0.1 for _ in range(16)]
+        m.set_keys(teclas, rng.randrange(16) if rng.random() < 0.2 else None)
+        try:
+            m.run_frames(rng.choice((1, 2, 3, 7, 20)))
+        except Exception as e:
+            estados.append((type(e).__name__, machine_state(m), m.frames))
+            break
+        estados.append((None, machine_state(m), m.frames))
+    return estados
+
+
+@pytest.mark.parametrize("quirks", [None, "chip-48"])
+@pytest.mark.parametrize("cycles_per_frame", [8, 3])
+@pytest.mark.parametrize("ruta", sorted(glob.glob(os.path.join(ROMS, "*.ch8"))),
+                         ids=os.path.basename)
+def test_roms_iguales_al_interprete(ruta, cycles_per_frame, quirks):
+    with open(ruta, "rb") as f:
+        rom = f.read()
+    esperado = _correr(rom, "interprete", cycles_per_frame, quirks)
+    for engine in ("jit", "jit-caliente"):
+        assert _correr(rom, engine, cycles_per_frame, quirks) == esperado
+
+
+@pytest.mark.parametrize("semilla", range(24))
+def test_roms_aleatorias_iguales_al_interprete(semilla):
+    rom = fuzz_rom(random.Random(semilla))
+    for cycles_per_frame in (8, 50):
+        esperado = _correr(rom, "interprete", cycles_per_frame, None, pasos=15)
+        for engine in ("jit", "jit-caliente"):
+            assert _correr(rom, engine, cycles_per_frame, None, pasos=15) == esperado
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_fx55_sobre_codigo_ya_traducido(engine):
+    # FX55 en 0x20A reescribe 0x20C (7101 → 7105) justo antes de ejecutarlo.
+    rom = bytes.fromhex("A20C 6071 6105 4000 120C F155 7101 120E")
+    m = _maquina(rom, engine, rng_seed=1, cycles_per_frame=8)
+    m.run_frames(3)
+    assert m.v_reg[1] == 10
+    assert m.pc == 0x20E
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_ciclos_de_un_bloque_que_lanza(engine):
+    # La instrucción que lanza cuenta (como en el intérprete) y el PC queda después de ella.
+    rom = bytes.fromhex("6001 6102 00EE 6303")
+    m = _maquina(rom, engine, rng_seed=1, cycles_per_frame=8)
+    with pytest.raises(StackError):
+        m.run_frames(1)
+    assert (m.cycles, m.pc, m.v_reg[0], m.v_reg[1], m.v_reg[3]) == (3, 0x206, 1, 2, 0)
+
+
+def _estado_final(rom, engine, quirks, avance):
+    m = _maquina(rom, engine, rng_seed=1, cycles_per_frame=8, quirks=quirks)
+    with pytest.raises(IndexError):
+        avance(m)
+    return machine_state(m)
+
+
+@pytest.mark.parametrize("quirks", ["chip-48", "super-chip"])
+def test_ciclos_de_un_bucle_y_un_prefijo_que_lanzan(quirks):
+    # Bucle sobre sí mismo en 0x200 (V2 += 1; I += V2; F165): la lectura se
+    # sale de memoria en alguna vuelta. Cuentan las vueltas completas y la
+    # instrucción que lanzó.
+    bucle = bytes.fromhex("7201 F21E F165 1200")
+    # run(3) en un bloque de 6: sólo su comienzo, que lanza en F165.
+    prefijo = bytes.fromhex("AFFF 6001 F165 6203 6304 120A")
+    for rom, avance in ((bucle, lambda m: m.run_frames(600)), (prefijo, lambda m: m.run(3))):
+        esperado = _estado_final(rom, "interprete", quirks, avance)
+        for engine in ("jit", "jit-caliente"):
+            assert _estado_final(rom, engine, quirks, avance) == esperado
+
+
+def test_codigo_frio_se_traduce_la_segunda_vez():
+    # Bucle de 3 instrucciones: la primera vuelta va por el intérprete.
+    m = Chip8JIT(bytes.fromhex("7001 7101 1200"), rng_seed=1)
+    m.run(3)
+    assert 0x200 not in m._bloques and m.v_reg[0] == 1
+    m.run(3)
+    assert 0x200 in m._bloques and m.v_reg[0] == 2
+
+
+def test_precompile_deja_el_codigo_caliente(monkeypatch):
+    m = Chip8JIT(prepare_rom(bytes.fromhex("7001 7101 1200")), rng_seed=1)
+    m.precompile()
+
+    def interpretar(self, n):
+        raise AssertionError("corrió interpretado")
+    monkeypatch.setattr(Chip8, "run", interpretar)
+    m.run(3)
+    assert m.v_reg[0] == 1
+
+
+def test_frio_no_depende_de_la_cache_compartida():
+    # La misma corrida en una máquina nueva, con la caché de la ROM ya llena
+    # por la anterior: mismo estado y mismos ciclos salteados.
+    with open(os.path.join(ROMS, "pong.ch8"), "rb") as f:
+        rom = prepare_rom(f.read())
+    corridas = []
+    for _ in range(2):
+        m = Chip8JIT(rom, rng_seed=1, cycles_per_frame=50)
+        m.set_keys([k == 4 for k in range(16)], None)
+        m.run_frames(400)
+        corridas.append((machine_state(m), m.skipped_cycles))
+    assert corridas[0] == corridas[1]
@@ -0,0 +1,55 @@
+# -----------------------------------------------------------------------------
+# Lotes: el pool da los mismos informes que correr las tareas en serie.
+# -----------------------------------------------------------------------------
+import csv, json, os
+
+from conftest import ROMS
+from chip8_lotes import collect_tasks, main, run_batch
+
+DEFAULTS = {"cycles": 20_000, "frames": None, "engine": "interprete", "seed": 5,
+            "quirks": None, "precompile": True, "png_dir": None, "png_scale": 4}
+
+
+def _manifiesto(tmp_path):
+    with open(tmp_path / "rota.ch8", "wb") as f:
+        f.write(bytes.fromhex("6001 00EE"))     # RET con la pila vacía
+    ruta = tmp_path / "lote.json"
+    ruta.write_text(json.dumps([
+        os.path.join(ROMS, "pong.ch8"),
+        {"rom": os.path.join(ROMS, "pong.ch8"), "engine": "jit", "quirks": "chip-48"},
+        {"rom": "rota.ch8", "frames": 3},
+        {"rom": os.path.join(ROMS, "8-scrolling.ch8"), "cycles": 5_000},
+    ]))
+    return str(ruta)
+
+
+def _sin_tiempos(informes):
+    tiempos = ("wall_time", "compile_time", "instr_per_sec")
+    return [{k: v for k, v in inf.items() if k not in tiempos} for inf in informes]
+
+
+def test_pool_igual_que_en_serie(tmp_path):
+    tareas = collect_tasks(_manifiesto(tmp_path), DEFAULTS)
+    assert [t["id"] for t in tareas] == [0, 1, 2, 3]
+    assert tareas[2]["rom"] == str(tmp_path / "rota.ch8")     # relativa al manifiesto
+    en_serie = run_batch(tareas, jobs=1)
+    assert _sin_tiempos(run_batch(tareas, jobs=2)) == _sin_tiempos(en_serie)
+
+    pong, pong_chip48, rota, scrolling = en_serie
+    assert pong["cycles"] == 20_000 and pong["error"] is None
+    assert pong_chip48["engine"] == "jit" and pong_chip48["quirks"] == "chip-48"
+    assert pong_chip48["compile_time"] > 0 and pong["compile_time"] is None
+    assert rota["error"].startswith("StackError") and rota["cycles"] == 2
+    assert scrolling["cycles"] == 5_000
+
+
+def test_main_escribe_los_informes(tmp_path):
+    ruta_json, ruta_csv = tmp_path / "informe.json", tmp_path / "informe.csv"
+    codigo = main([_manifiesto(tmp_path), "--jobs", "1", "--cycles", "3000",
+                   "--json", str(ruta_json), "--csv", str(ruta_csv)])
+    assert codigo == 1                                  # la ROM rota cuenta como error
+    informes = json.loads(ruta_json.read_text())
+    with open(ruta_csv, newline="") as f:
+        filas = list(csv.DictReader(f))
+    assert [fila["gfx_hash"] for fila in filas] == [inf["gfx_hash"] for inf in informes]
+    assert sum(1 for inf in informes if inf["error"]) == 1
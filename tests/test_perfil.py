@@ -0,0 +1,55 @@
+# -----------------------------------------------------------------------------
+# Perfil por opcode: cuenta cada instrucción ejecutada, con los dos motores.
+# -----------------------------------------------------------------------------
+import os
+
+import pytest
+
+from conftest import ROMS
+from chip8_maquina import create_machine
+from chip8_perfil import attach_profiler, opcode_family
+
+
+def _perfilar(engine, avance):
+    with open(os.path.join(ROMS, "pong.ch8"), "rb") as f:
+        m = create_machine(f.read(), engine, rng_seed=3)
+    m.set_keys([k in (1, 4) for k in range(16)], None)
+    perfil = attach_profiler(m)
+    avance(m)
+    perfil.detach()
+    return m, perfil
+
+
+@pytest.mark.parametrize("avance", [lambda m: m.run_frames(300), lambda m: m.run_cycles(5003)],
+                         ids=["run_frames", "run_cycles"])
+@pytest.mark.parametrize("engine", ["interprete", "jit"])
+def test_cuenta_todas_las_instrucciones(engine, avance):
+    m, perfil = _perfilar(engine, avance)
+    ejecutadas = m.cycles - m.skipped_cycles
+    assert ejecutadas > 1000
+    assert sum(perfil.family_count.values()) == ejecutadas
+    assert sum(perfil.pc_count.values()) == ejecutadas
+    assert perfil.report()["instructions"] == ejecutadas
+
+
+def test_jit_e_interprete_dan_el_mismo_perfil():
+    avance = lambda m: m.run_frames(300)
+    _, jit = _perfilar("jit", avance)
+    _, interprete = _perfilar("interprete", avance)
+    assert jit.family_count == interprete.family_count
+    assert jit.pc_count == interprete.pc_count
+    assert jit.calls == interprete.calls
+
+
+def test_detach_vuelve_a_los_metodos_de_la_clase():
+    m, _ = _perfilar("jit", lambda m: m.run_frames(10))
+    assert "run" not in vars(m) and "run_frames" not in vars(m)
+
+
+@pytest.mark.parametrize("opcode, familia", [
+    (0x00E0, "00E0"), (0x00C4, "00CN"), (0x00FF, "00FF"), (0x0123, "0NNN"), (0x2ABC, "2NNN"),
+    (0x3A12, "3XNN"), (0x5120, "5XY0"), (0x5121, "????"), (0x812E, "8XYE"), (0xD015, "DXYN"),
+    (0xE19E, "EX9E"), (0xF530, "FX30"), (0xF285, "FX85"), (0xF1FF, "????"),
+])
+def test_familias(opcode, familia):
+    assert opcode_family(opcode) == familia
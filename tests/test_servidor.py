@@ -0,0 +1,43 @@
+# -----------------------------------------------------------------------------
+# Protocolo del servidor de sesiones: apply_delta(encode_delta(...)) y
+# apply_resolution(encode_resolution(...)) del lado del cliente.
+# -----------------------------------------------------------------------------
+import random
+
+import pytest
+
+import config as cfg
+from chip8_servidor import apply_delta, apply_resolution, encode_delta, encode_resolution
+
+
+@pytest.mark.parametrize("ancho, alto", [(cfg.SCREEN_W, cfg.SCREEN_H),
+                                         (cfg.HIRES_W, cfg.HIRES_H)])
+def test_delta_ida_y_vuelta(ancho, alto):
+    rng = random.Random(alto)
+    servidor = [rng.getrandbits(ancho) for _ in range(alto)]
+    cliente = [0] * alto
+    filas = (1 << alto) - 1             # el primer delta trae todas
+    assert apply_delta(cliente, encode_delta(1, servidor, filas)) == (1, filas)
+    assert cliente == servidor
+
+    antes = list(cliente)
+    filas = 1 | 1 << 7 | 1 << (alto - 1)
+    for y in (0, 7, alto - 1):
+        servidor[y] ^= rng.getrandbits(ancho) | 1
+    assert apply_delta(cliente, encode_delta(2, servidor, filas)) == (2, filas)
+    assert cliente == servidor
+    assert [y for y in range(alto) if cliente[y] != antes[y]] == [0, 7, alto - 1]
+
+
+def test_delta_sin_filas():
+    cliente = [5] * cfg.SCREEN_H
+    assert apply_delta(cliente, encode_delta(9, [0] * cfg.SCREEN_H, 0)) == (9, 0)
+    assert cliente == [5] * cfg.SCREEN_H
+
+
+def test_cambio_de_resolucion():
+    cliente = [1] * cfg.SCREEN_H
+    apply_resolution(cliente, encode_resolution([0] * cfg.HIRES_H))
+    assert cliente == [0] * cfg.HIRES_H
+    apply_resolution(cliente, encode_resolution([0] * cfg.SCREEN_H))
+    assert cliente == [0] * cfg.SCREEN_H
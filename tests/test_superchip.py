@@ -0,0 +1,52 @@
+# -----------------------------------------------------------------------------
+# Opcodes SUPER-CHIP (pantalla, fuente grande, flags RPL, EXIT) en los dos motores.
+# -----------------------------------------------------------------------------
+import pytest
+
+import config as cfg
+from chip8_maquina import create_machine
+
+MOTORES = ["interprete", "jit"]
+
+
+def _correr(engine, programa, frames=1):
+    m = create_machine(bytes.fromhex(programa), engine, rng_seed=1, cycles_per_frame=50)
+    m.run_frames(frames)
+    return m
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_alta_resolucion_dxy0_y_scroll(engine):
+    # 00FF, I = sprite, DXY0 en (0, 0), baja 2 filas (00C2), 4 píxeles a la derecha (00FB).
+    m = _correr(engine, "00FF A20E 6000 D000 00C2 00FB 120C" + "FF" * 32)
+    fila = 0xFFFF << (cfg.HIRES_W - 16) >> 4
+    assert len(m.gfx) == cfg.HIRES_H
+    assert m.gfx[:2] == [0, 0]
+    assert m.gfx[2:18] == [fila] * 16
+    assert not any(m.gfx[18:])
+    assert m.v_reg[0xF] == 0
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_scroll_izquierda_y_vuelta_a_baja_resolucion(engine):
+    # Un píxel en x = 8 (D011 con V0 = 8, V1 = 0) queda en x = 4 después de 00FC.
+    m = _correr(engine, "A20C 6008 6100 D011 00FC 120A 80")
+    assert m.gfx[0] == 0x80 << (cfg.SCREEN_W - 8 - 4)
+    m = _correr(engine, "00FF A20A D001 00FE 1208 80")
+    assert m.gfx == [0] * cfg.SCREEN_H
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_flags_rpl_y_fuente_grande(engine):
+    # V0..V2 = 1, 2, 3 → flags (F275); se pisan y vuelven de los flags (F285).
+    m = _correr(engine, "6001 6102 6203 F275 6000 6100 6200 F285 6307 F330 1214")
+    assert list(m.v_reg[:3]) == [1, 2, 3]
+    assert list(m.flags[:3]) == [1, 2, 3]
+    assert m.index == cfg.BIG_FONT_DIR + 7 * 10
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_exit_detiene_la_rom(engine):
+    m = _correr(engine, "6001 00FD 6002", frames=3)
+    assert m.pc == 0x202
+    assert m.v_reg[0] == 1
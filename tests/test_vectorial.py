@@ -0,0 +1,44 @@
+# -----------------------------------------------------------------------------
+# Motor vectorizado: cada instancia del lote termina igual que un Chip8 suelto.
+# -----------------------------------------------------------------------------
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import ROMS
+from chip8_maquina import Chip8
+from chip8_vectorial import ERR_STACK_UNDERFLOW, Chip8Vectorial
+
+# ROMs sin CXNN ni teclado: el resultado no depende del generador al azar.
+DETERMINISTAS = ["1-chip8-logo.ch8", "2-ibm-logo.ch8", "3-corax+.ch8", "4-flags.ch8"]
+
+
+def _rom(nombre):
+    with open(os.path.join(ROMS, nombre), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("quirks", [None, "cosmac-vip"])
+def test_lote_igual_al_interprete(quirks):
+    roms = [_rom(nombre) for nombre in DETERMINISTAS]
+    lote = Chip8Vectorial(roms, rng_seed=1, quirks=quirks)
+    lote.run_frames(120)
+    for i, rom in enumerate(roms):
+        m = Chip8(rom, rng_seed=1, quirks=quirks)
+        m.run_frames(120)
+        assert lote.gfx_of(i) == m.gfx, DETERMINISTAS[i]
+        assert list(lote.v_reg[i]) == list(m.v_reg)
+        assert (int(lote.pc[i]), int(lote.index[i])) == (m.pc, m.index)
+        assert lote.error[i] == 0
+    assert lote.cycles == m.cycles
+
+
+def test_una_instancia_con_error_no_frena_a_las_demas():
+    sana = bytes.fromhex("7001 1200")
+    lote = Chip8Vectorial([sana, bytes.fromhex("00EE"), sana], rng_seed=1,
+                          cycles_per_frame=10)
+    lote.run_frames(1)
+    assert list(lote.error) == [0, ERR_STACK_UNDERFLOW, 0]
+    assert list(lote.v_reg[:, 0]) == [5, 0, 5]